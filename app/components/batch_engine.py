@@ -0,0 +1,252 @@
+from typing import Dict, List, Optional
+from models.game_models import PlayerAction
+from app.components.game_engine import GameEngine, HIGH, LOW
+from app.config import settings
+from app.services.metrics import PhaseTimer
+
+try:
+    import numpy as np
+except ImportError as exc:  # Only the batch engine mode needs NumPy
+    raise ImportError("ENGINE_MODE=batch requires NumPy (pip install numpy)") from exc
+
+# Column dtypes, matching the EntityStore array typecodes
+COLUMNS = {
+    "ids": np.int64,
+    "x": np.float64,
+    "y": np.float64,
+    "width": np.float64,
+    "height": np.float64,
+    "kind": np.int8,
+    "speed": np.float64,
+    "spin": np.float64,
+    "collected": np.int8,
+}
+
+class BatchTable:
+    """Obstacle or coin columns for every session, one row per session slot.
+
+    Rows have a fixed capacity (the per-session entity cap) and each row's
+    live entities are packed at the front, so a whole tick can be computed
+    as 2D array operations masked by the per-row counts.
+    """
+
+    def __init__(self, rows: int, capacity: int):
+        self.capacity = capacity
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros((rows, capacity), dtype=dtype) for name, dtype in COLUMNS.items()
+        }
+        self.count = np.zeros(rows, dtype=np.intp)
+        self.slots = np.arange(capacity)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def rows(self) -> int:
+        return len(self.count)
+
+    def grow(self, rows: int):
+        """Resize to hold at least rows sessions, keeping existing rows"""
+        for name, column in self.columns.items():
+            grown = np.zeros((rows, self.capacity), dtype=column.dtype)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+        count = np.zeros(rows, dtype=np.intp)
+        count[:len(self.count)] = self.count
+        self.count = count
+
+    def live(self, rows: np.ndarray) -> tuple:
+        """Width of the occupied region of the given rows and its live-slot mask.
+
+        Rows are usually far from full, so only the first width slots (the
+        fullest row's count) need to be touched.
+        """
+        counts = self.count[rows]
+        width = int(counts.max())
+        return width, self.slots[:width] < counts[:, None]
+
+    def swap_remove(self, row: int, index: int):
+        """Remove an entity by moving the row's last entity into its slot"""
+        last = self.count[row] - 1
+        if index != last:
+            for column in self.columns.values():
+                column[row, index] = column[row, last]
+        self.count[row] = last
+
+class BatchStore:
+    """EntityStore-compatible view of one session's row in a BatchTable"""
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: BatchTable, row: int):
+        self.table = table
+        self.row = row
+
+    def __len__(self) -> int:
+        return int(self.table.count[self.row])
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name not in COLUMNS:
+            raise AttributeError(name)
+        table = self.table
+        return table.columns[name][self.row, :table.count[self.row]]
+
+    def add(self, entity_id: int, x: float, y: float, width: float, height: float,
+            kind: int = 0, speed: float = 0.0) -> int:
+        """Append an entity and return its index"""
+        table = self.table
+        index = int(table.count[self.row])
+        if index >= table.capacity:
+            raise IndexError("Batch table row is full")
+        values = (entity_id, x, y, width, height, kind, speed, 0.0, 0)
+        for column, value in zip(table.columns.values(), values):
+            column[self.row, index] = value
+        table.count[self.row] = index + 1
+        return index
+
+    def columns(self) -> tuple:
+        """All columns, in slot order"""
+        return tuple(getattr(self, name) for name in COLUMNS)
+
+    def swap_remove(self, index: int):
+        """Remove the entity at index by moving the last entity into its slot"""
+        self.table.swap_remove(self.row, index)
+
+    def clear(self):
+        """Remove every entity"""
+        self.table.count[self.row] = 0
+
+class BatchPhysics:
+    """Vectorized obstacle and coin physics for every session in one pass.
+
+    Engines created here keep their per-session logic (inputs, player state,
+    spawning, scoring) in GameEngine, but store their entities in shared
+    tables so movement, culling and collision tests run as NumPy operations
+    across all sessions at once. For the same seed and inputs the outcome is
+    identical to stepping each engine with GameEngine.step.
+    """
+
+    def __init__(self, rows: int = 64):
+        self.obstacles = BatchTable(rows, settings.max_obstacles_per_session)
+        self.coins = BatchTable(rows, settings.max_coins_per_session)
+        self.free_rows: List[int] = list(range(rows - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return self.obstacles.rows - len(self.free_rows)
+
+    def create_engine(self, seed: Optional[int] = None) -> GameEngine:
+        """Create an engine whose entities live in the batch tables"""
+        if not self.free_rows:
+            rows = self.obstacles.rows
+            self.obstacles.grow(rows * 2)
+            self.coins.grow(rows * 2)
+            self.free_rows.extend(range(rows * 2 - 1, rows - 1, -1))
+        row = self.free_rows.pop()
+        self.obstacles.count[row] = 0
+        self.coins.count[row] = 0
+        return GameEngine(seed, obstacles=BatchStore(self.obstacles, row), coins=BatchStore(self.coins, row))
+
+    def release(self, engine: GameEngine):
+        """Return an engine's table rows for reuse; the engine keeps private stores"""
+        if not isinstance(engine.obstacles, BatchStore):
+            return  # Already released
+        obstacles, _ = engine.detach_stores()
+        row = obstacles.row
+        self.obstacles.count[row] = 0
+        self.coins.count[row] = 0
+        self.free_rows.append(row)
+
+    def step(self, engines: List[GameEngine], dt: float, phases: Optional[PhaseTimer] = None):
+        """Advance every engine by one fixed-size tick, timing each phase into phases if given"""
+        active = [engine for engine in engines if engine.begin_step(dt)]
+        if phases is not None:
+            phases.lap("spawn")
+        if not active:
+            return
+        rows = np.fromiter((engine.obstacles.row for engine in active), dtype=np.intp, count=len(active))
+        players = np.array([
+            (player.x, player.y, player.width, player.height, engine.session.speed,
+             player.action == PlayerAction.JUMPING, player.action == PlayerAction.SLIDING)
+            for engine in active
+            for player in (engine.session.player,)
+        ], dtype=np.float64)
+        self.update_obstacles(rows, dt)
+        self.update_coins(rows, players[:, 4], dt)
+        if phases is not None:
+            phases.lap("movement")
+        dead, collected = self.check_collisions(rows, players)
+        if phases is not None:
+            phases.lap("collisions")
+        for engine, hit, coins in zip(active, dead.tolist(), collected.tolist()):
+            if hit:
+                engine.game_over()
+            elif coins:
+                engine.session.coins_collected += coins
+                engine.session.score += coins * settings.coin_score
+            engine.update_game_state(dt)
+        if phases is not None:
+            phases.lap("scoring")
+
+    def update_obstacles(self, rows: np.ndarray, dt: float):
+        """Move obstacles and cull those that left the screen"""
+        table = self.obstacles
+        width, live = table.live(rows)
+        x = table.x[rows, :width]
+        np.subtract(x, table.speed[rows, :width] * (60 * dt), out=x, where=live)  # 60 FPS reference
+        table.x[rows, :width] = x
+        self.cull(table, rows, live & (x < -table.width[rows, :width]))
+
+    def update_coins(self, rows: np.ndarray, speeds: np.ndarray, dt: float):
+        """Move and spin coins and cull those that left the screen"""
+        table = self.coins
+        width, live = table.live(rows)
+        x = table.x[rows, :width]
+        np.subtract(x, (speeds * 60 * dt)[:, None], out=x, where=live)
+        table.x[rows, :width] = x
+        spin = table.spin[rows, :width]
+        np.add(spin, 360 * dt, out=spin, where=live)
+        table.spin[rows, :width] = spin
+        self.cull(table, rows, live & (x < -table.width[rows, :width]))
+
+    def cull(self, table: BatchTable, rows: np.ndarray, culled: np.ndarray):
+        """Swap-remove culled entities, highest index first like the per-object path"""
+        for index in np.flatnonzero(culled.any(axis=1)):
+            for slot in np.flatnonzero(culled[index])[::-1]:
+                table.swap_remove(rows[index], slot)
+
+    def check_collisions(self, rows: np.ndarray, players: np.ndarray) -> tuple:
+        """Test every player against its session's entities.
+
+        Returns per-session arrays of whether an unavoidable obstacle was hit
+        and how many coins were collected. Coins are not collected on a tick
+        that ends the game.
+        """
+        left, top = players[:, 0:1], players[:, 1:2]
+        right, bottom = left + players[:, 2:3], top + players[:, 3:4]
+        jumping, sliding = players[:, 5:6] > 0, players[:, 6:7] > 0
+
+        table = self.obstacles
+        width, live = table.live(rows)
+        x, y = table.x[rows, :width], table.y[rows, :width]
+        hit = (live & (left < x + table.width[rows, :width]) & (right > x) &
+               (top < y + table.height[rows, :width]) & (bottom > y))
+        # Player jumped over a high obstacle or slid under a low one
+        kind = table.kind[rows, :width]
+        avoided = ((kind == HIGH) & jumping) | ((kind == LOW) & sliding)
+        dead = (hit & ~avoided).any(axis=1)
+
+        table = self.coins
+        width, live = table.live(rows)
+        x, y = table.x[rows, :width], table.y[rows, :width]
+        collected = table.collected[rows, :width]
+        picked = (live & (collected == 0) & (left < x + table.width[rows, :width]) & (right > x) &
+                  (top < y + table.height[rows, :width]) & (bottom > y))
+        picked[dead] = False
+        table.collected[rows, :width] = collected | picked
+        return dead, picked.sum(axis=1)
+
+# Global batch physics shared by every session in batch engine mode
+batch_physics = BatchPhysics()
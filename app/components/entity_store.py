@@ -0,0 +1,88 @@
+from array import array
+from typing import List
+
+class EntityStore:
+    """Struct-of-arrays storage for obstacles or coins.
+
+    Each attribute is a typed column and an entity is an index across the
+    columns. Despawning swaps the last entity into the freed slot, so removal
+    is O(1) and the columns stay dense.
+    """
+
+    __slots__ = ("ids", "x", "y", "width", "height", "kind", "speed", "spin", "collected")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.x = array("d")
+        self.y = array("d")
+        self.width = array("d")
+        self.height = array("d")
+        self.kind = array("b")  # Index into OBSTACLE_TYPES for obstacles
+        self.speed = array("d")
+        self.spin = array("d")
+        self.collected = array("b")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, entity_id: int, x: float, y: float, width: float, height: float,
+            kind: int = 0, speed: float = 0.0) -> int:
+        """Append an entity and return its index"""
+        self.ids.append(entity_id)
+        self.x.append(x)
+        self.y.append(y)
+        self.width.append(width)
+        self.height.append(height)
+        self.kind.append(kind)
+        self.speed.append(speed)
+        self.spin.append(0.0)
+        self.collected.append(0)
+        return len(self.ids) - 1
+
+    def columns(self) -> tuple:
+        """All columns, in slot order"""
+        return (self.ids, self.x, self.y, self.width, self.height,
+                self.kind, self.speed, self.spin, self.collected)
+
+    def swap_remove(self, index: int):
+        """Remove the entity at index by moving the last entity into its slot"""
+        last = len(self.ids) - 1
+        for column in self.columns():
+            if index != last:
+                column[index] = column[last]
+            column.pop()
+
+    def clear(self):
+        """Remove every entity, keeping the columns' memory for the next game"""
+        # Popping never shrinks an array's buffer; deleting a slice frees it
+        for column in self.columns():
+            for _ in range(len(column)):
+                column.pop()
+
+class EntityPool:
+    """Stores handed back by ended sessions, reused by new ones.
+
+    A store's columns grow to a session's peak entity count once and then
+    keep their memory, so reusing stores means new sessions spawn into
+    buffers that are already allocated.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.stores: List[EntityStore] = []
+
+    def __len__(self) -> int:
+        return len(self.stores)
+
+    def acquire(self) -> EntityStore:
+        """An empty store, pooled if there is one"""
+        return self.stores.pop() if self.stores else EntityStore()
+
+    def release(self, store: EntityStore):
+        """Take back a store that is no longer used"""
+        if len(self.stores) < self.max_size:
+            store.clear()
+            self.stores.append(store)
+
+# Global pool of obstacle and coin stores for the object engine
+entity_pool = EntityPool()
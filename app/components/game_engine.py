@@ -1,28 +1,107 @@
-import asyncio
 import random
-import time
-from typing import List
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
 from models.game_models import (
-    GameSession, GameState, PlayerAction, 
-    Obstacle, Coin, ObstacleType
+    GameSession, GameState, PlayerAction, ObstacleType
 )
+from app.components.entity_store import EntityStore, entity_pool
+from app.components.track import Track
 from app.config import settings
 
+# Obstacle types in spawn order; EntityStore.kind indexes into this
+OBSTACLE_TYPES = tuple(ObstacleType)
+HIGH = OBSTACLE_TYPES.index(ObstacleType.HIGH)
+LOW = OBSTACLE_TYPES.index(ObstacleType.LOW)
+
+# Obstacle (y, height) by kind
+OBSTACLE_SHAPES = {
+    ObstacleType.HIGH: (320, 60),  # Ground level
+    ObstacleType.LOW: (280, 40),  # Lower position for sliding under
+    ObstacleType.MOVING: (300, 50),
+}
+
+COIN_HEIGHTS = (250, 280, 310)
+
+# Entities enter off-screen right. One reached partway through a tick's
+# scroll starts that much further right, so after moving with the tick it
+# sits where it would have at any tick rate
+SPAWN_X = 800
+
+def resize_rows(rows: List[dict], spare: List[dict], count: int):
+    """Grow or shrink a list of reusable row dicts to count, parking extras in spare"""
+    while len(rows) > count:
+        spare.append(rows.pop())
+    while len(rows) < count:
+        rows.append(spare.pop() if spare else {})
+
+# Queueable player inputs and the engine methods they call
+INPUT_ACTIONS = {
+    "jump": "player_jump",
+    "slide": "player_slide",
+    "start": "start_game",
+    "pause": "pause_game",
+    "resume": "resume_game",
+}
+
 class GameEngine:
     """Core game engine handling game logic and state"""
     
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None, obstacles=None, coins=None):
         self.session = GameSession()
-        self.running = False
-        self.update_task = None
+        self.rng = random.Random(seed)  # Per-session stream that seeds each game
+        self.game_seed = 0
+        self.game_rng = random.Random(0)  # Track chunks; reseeded by every start_game
+        self.track = Track(self.game_rng, len(OBSTACLE_TYPES), COIN_HEIGHTS)
+        self.game_tick = 0  # Ticks simulated in the current game
+        self.game_inputs: List[Tuple[int, str]] = []  # (game_tick, action) for replays
+        self.on_game_over: Optional[Callable[["GameEngine"], None]] = None
+        # Batch mode passes in views of its shared tables instead
+        self.obstacles = obstacles if obstacles is not None else entity_pool.acquire()
+        self.coins = coins if coins is not None else entity_pool.acquire()
+        self.next_entity_id = 1  # Stable ids let clients patch entities in place
+        self.tick = 0  # Fixed-step ticks simulated so far
+        self.inputs: Deque[Tuple[int, str]] = deque()  # (tick, action) waiting to be applied
+        # Broad phase: indices of entities overlapping the player's x-range,
+        # gathered while entities move so collision checks skip the rest
+        self.near_obstacles: List[int] = []
+        self.near_coins: List[int] = []
+        # get_game_data fills these in place instead of building new dicts per call
+        self.snapshot: dict = {
+            "state": None, "score": 0, "distance": 0, "coins_collected": 0, "high_score": 0, "speed": 0.0,
+            "player": {}, "obstacles": [], "coins": [],
+        }
+        self.spare_obstacle_rows: List[dict] = []
+        self.spare_coin_rows: List[dict] = []
+        
+    def detach_stores(self) -> tuple:
+        """Hand over the obstacle and coin stores, carrying on with private empty ones.
+
+        A removed session's stores can then be reused by another session while
+        anything still holding this engine only ever touches its own memory.
+        """
+        stores = (self.obstacles, self.coins)
+        self.obstacles = EntityStore()
+        self.coins = EntityStore()
+        self.near_obstacles.clear()
+        self.near_coins.clear()
+        return stores
         
-    def start_game(self):
+    def start_game(self, seed: Optional[int] = None):
         """Start a new game"""
+        self.game_seed = self.rng.getrandbits(32) if seed is None else seed
+        self.game_rng = random.Random(self.game_seed)
+        self.track = Track(self.game_rng, len(OBSTACLE_TYPES), COIN_HEIGHTS)
+        self.game_tick = 0
+        self.game_inputs = []
         self.session = GameSession(
             state=GameState.PLAYING,
-            speed=settings.initial_speed
+            speed=settings.initial_speed,
+            high_score=self.session.high_score
         )
-        self.running = True
+        self.obstacles.clear()
+        self.coins.clear()
+        self.near_obstacles.clear()
+        self.near_coins.clear()
         
     def pause_game(self):
         """Pause the current game"""
@@ -39,7 +118,8 @@ class GameEngine:
         self.session.state = GameState.GAME_OVER
         if self.session.score > self.session.high_score:
             self.session.high_score = self.session.score
-        self.running = False
+        if self.on_game_over is not None:
+            self.on_game_over(self)
         
     def player_jump(self):
         """Make player jump"""
@@ -55,6 +135,31 @@ class GameEngine:
             self.session.player.action = PlayerAction.SLIDING
             self.session.player.action_timer = settings.slide_duration
             
+    def queue_input(self, action: str, tick: Optional[int] = None) -> bool:
+        """Queue a player input to be applied on the given tick"""
+        if action not in INPUT_ACTIONS or len(self.inputs) >= settings.max_queued_inputs:
+            return False
+        # Late inputs apply on the next tick; inputs may not run ahead too far
+        # or jump the queue
+        tick = self.tick + 1 if tick is None else tick
+        tick = min(max(tick, self.tick + 1), self.tick + settings.max_input_lead_ticks)
+        if self.inputs and tick < self.inputs[-1][0]:
+            tick = self.inputs[-1][0]
+        self.inputs.append((tick, action))
+        return True
+        
+    def apply_inputs(self):
+        """Apply queued inputs that are due on the current tick"""
+        while self.inputs and self.inputs[0][0] <= self.tick:
+            _, action = self.inputs.popleft()
+            self.record_input(action)
+            getattr(self, INPUT_ACTIONS[action])()
+            
+    def record_input(self, action: str):
+        """Remember an in-game input so the game can be replayed"""
+        if action != "start" and self.session.state in (GameState.PLAYING, GameState.PAUSED):
+            self.game_inputs.append((self.game_tick, action))
+            
     def update_player(self, dt: float):
         """Update player state"""
         if self.session.player.action_timer > 0:
@@ -63,94 +168,115 @@ class GameEngine:
                 self.session.player.action = PlayerAction.RUNNING
                 self.session.player.action_timer = 0
                 
-    def spawn_obstacle(self):
-        """Spawn a new obstacle"""
-        if random.random() < settings.obstacle_spawn_rate:
-            obstacle_type = random.choice(list(ObstacleType))
-            
-            # Position based on obstacle type
-            if obstacle_type == ObstacleType.HIGH:
-                y = 320  # Ground level
-                height = 60
-            elif obstacle_type == ObstacleType.LOW:
-                y = 280  # Lower position for sliding under
-                height = 40
-            else:  # MOVING
-                y = 300
-                height = 50
-                
-            obstacle = Obstacle(
-                x=800,  # Start off-screen right
-                y=y,
-                width=40,
-                height=height,
-                obstacle_type=obstacle_type,
-                speed=self.session.speed
-            )
-            self.session.obstacles.append(obstacle)
+    def new_entity_id(self) -> int:
+        """Allocate an id for a spawned obstacle or coin"""
+        entity_id = self.next_entity_id
+        self.next_entity_id += 1
+        return entity_id
+        
+    def spawn(self, dt: float):
+        """Spawn the obstacles and coins the player has reached on the track"""
+        self.track.advance(self.session.speed * 60 * dt, self.spawn_obstacle, self.spawn_coin)
+        
+    def spawn_obstacle(self, lead: float, kind: int):
+        """Spawn an obstacle reached lead pixels into this tick's scroll"""
+        if len(self.obstacles) >= settings.max_obstacles_per_session:
+            return  # Per-session memory cap
+        y, height = OBSTACLE_SHAPES[OBSTACLE_TYPES[kind]]
+        self.obstacles.add(
+            self.new_entity_id(),
+            SPAWN_X + lead,
+            y, 40, height,
+            kind=kind,
+            speed=self.session.speed
+        )
             
-    def spawn_coin(self):
-        """Spawn a collectible coin"""
-        if random.random() < settings.coin_spawn_rate:
-            # Random height for coins
-            y_positions = [250, 280, 310]  # Different heights
-            coin = Coin(
-                x=800,
-                y=random.choice(y_positions),
-                width=20,
-                height=20
-            )
-            self.session.coins.append(coin)
+    def spawn_coin(self, lead: float, height: float):
+        """Spawn a collectible coin reached lead pixels into this tick's scroll"""
+        if len(self.coins) >= settings.max_coins_per_session:
+            return  # Per-session memory cap
+        self.coins.add(self.new_entity_id(), SPAWN_X + lead, height, 20, 20)
             
     def update_obstacles(self, dt: float):
         """Update obstacle positions"""
-        for obstacle in self.session.obstacles[:]:
-            obstacle.x -= obstacle.speed * 60 * dt  # 60 FPS reference
+        store = self.obstacles
+        x, width, speed = store.x, store.width, store.speed
+        scale = 60 * dt  # 60 FPS reference
+        left, right = self.player_span()
+        near = self.near_obstacles
+        near.clear()  # Reused every tick rather than reallocated
+        # Walk backwards so swap-remove only moves already-updated entities
+        for i in range(len(store) - 1, -1, -1):
+            x[i] -= speed[i] * scale
             
+            if x[i] < right and x[i] + width[i] > left:
+                near.append(i)
             # Remove obstacles that are off-screen
-            if obstacle.x < -obstacle.width:
-                self.session.obstacles.remove(obstacle)
+            elif x[i] < -width[i]:
+                self.despawn(store, near, i)
                 
     def update_coins(self, dt: float):
         """Update coin positions and animations"""
-        for coin in self.session.coins[:]:
-            coin.x -= self.session.speed * 60 * dt
-            coin.spin_angle += 360 * dt  # Spin animation
+        store = self.coins
+        x, width, spin = store.x, store.width, store.spin
+        step = self.session.speed * 60 * dt
+        spin_step = 360 * dt  # Spin animation
+        left, right = self.player_span()
+        near = self.near_coins
+        near.clear()
+        for i in range(len(store) - 1, -1, -1):
+            x[i] -= step
+            spin[i] += spin_step
             
+            if x[i] < right and x[i] + width[i] > left:
+                near.append(i)
             # Remove coins that are off-screen
-            if coin.x < -coin.width:
-                self.session.coins.remove(coin)
+            elif x[i] < -width[i]:
+                self.despawn(store, near, i)
                 
+    def player_span(self) -> Tuple[float, float]:
+        """The player's horizontal extent, the broad-phase collision band"""
+        player = self.session.player
+        return player.x, player.x + player.width
+        
+    @staticmethod
+    def despawn(store: EntityStore, near: List[int], index: int):
+        """Swap-remove an entity, keeping broad-phase indices valid"""
+        last = len(store) - 1
+        store.swap_remove(index)
+        if last in near:
+            near[near.index(last)] = index
+            
     def check_collisions(self):
         """Check for collisions between player and objects"""
         player = self.session.player
+        left, right = player.x, player.x + player.width
+        top, bottom = player.y, player.y + player.height
         
-        # Check obstacle collisions
-        for obstacle in self.session.obstacles:
-            if self.objects_collide(player, obstacle):
+        # Narrow phase over the entities the broad phase found in the
+        # player's x-range
+        obstacles = self.obstacles
+        x, y, width, height, kind = obstacles.x, obstacles.y, obstacles.width, obstacles.height, obstacles.kind
+        for i in self.near_obstacles:
+            if left < x[i] + width[i] and right > x[i] and top < y[i] + height[i] and bottom > y[i]:
                 # Check if player can avoid obstacle
-                if obstacle.obstacle_type == ObstacleType.HIGH and player.action == PlayerAction.JUMPING:
+                if kind[i] == HIGH and player.action == PlayerAction.JUMPING:
                     continue  # Player jumped over
-                elif obstacle.obstacle_type == ObstacleType.LOW and player.action == PlayerAction.SLIDING:
+                elif kind[i] == LOW and player.action == PlayerAction.SLIDING:
                     continue  # Player slid under
                 else:
                     self.game_over()
                     return
                     
         # Check coin collisions
-        for coin in self.session.coins[:]:
-            if not coin.collected and self.objects_collide(player, coin):
-                coin.collected = True
+        coins = self.coins
+        x, y, width, height, collected = coins.x, coins.y, coins.width, coins.height, coins.collected
+        for i in self.near_coins:
+            if not collected[i] and left < x[i] + width[i] and right > x[i] and top < y[i] + height[i] and bottom > y[i]:
+                collected[i] = 1
                 self.session.coins_collected += 1
                 self.session.score += settings.coin_score
                 
-    def objects_collide(self, obj1, obj2) -> bool:
-        """Check if two game objects collide"""
-        return (obj1.x < obj2.x + obj2.width and
-                obj1.x + obj1.width > obj2.x and
-                obj1.y < obj2.y + obj2.height and
-                obj1.y + obj1.height > obj2.y)
-                
     def update_game_state(self, dt: float):
         """Update overall game state"""
         if self.session.state != GameState.PLAYING:
@@ -165,28 +291,31 @@ class GameEngine:
         if self.session.speed < settings.max_speed:
             self.session.speed += settings.speed_increment * dt
             
-    async def game_loop(self):
-        """Main game loop"""
-        last_time = time.time()
-        
-        while self.running:
-            current_time = time.time()
-            dt = current_time - last_time
-            last_time = current_time
+    def step(self, dt: float):
+        """Advance the simulation by one fixed-size tick"""
+        if self.begin_step(dt):
+            self.update_obstacles(dt)
+            self.update_coins(dt)
+            self.check_collisions()
+            self.update_game_state(dt)
             
-            if self.session.state == GameState.PLAYING:
-                self.update_player(dt)
-                self.spawn_obstacle()
-                self.spawn_coin()
-                self.update_obstacles(dt)
-                self.update_coins(dt)
-                self.check_collisions()
-                self.update_game_state(dt)
-                
-            await asyncio.sleep(1/60)  # 60 FPS target
+    def begin_step(self, dt: float) -> bool:
+        """Run the per-session phases that precede entity physics.
+
+        Returns whether the game is playing, i.e. whether obstacles and coins
+        should be moved and collision-tested this tick.
+        """
+        self.tick += 1
+        self.apply_inputs()
+        if self.session.state != GameState.PLAYING:
+            return False
+        self.game_tick += 1
+        self.update_player(dt)
+        self.spawn(dt)
+        return True
             
-    def get_game_data(self) -> dict:
-        """Get current game data for UI"""
+    def get_hud(self) -> dict:
+        """Get scalar HUD values for state sync"""
         return {
             "state": self.session.state.value,
             "score": self.session.score,
@@ -194,31 +323,77 @@ class GameEngine:
             "coins": self.session.coins_collected,
             "high_score": self.session.high_score,
             "speed": round(self.session.speed, 1),
-            "player": {
-                "x": self.session.player.x,
-                "y": self.session.player.y,
-                "action": self.session.player.action.value
-            },
-            "obstacles": [
-                {
-                    "x": obs.x,
-                    "y": obs.y,
-                    "width": obs.width,
-                    "height": obs.height,
-                    "type": obs.obstacle_type.value
-                }
-                for obs in self.session.obstacles
-            ],
-            "coins": [
-                {
-                    "x": coin.x,
-                    "y": coin.y,
-                    "spin": coin.spin_angle,
-                    "collected": coin.collected
-                }
-                for coin in self.session.coins
-            ]
+            "action": self.session.player.action.value
         }
+        
+    def obstacle_rows(self) -> List[tuple]:
+        """Obstacles as compact (id, x, y, width, height, type, speed) rows"""
+        store = self.obstacles
+        return [
+            (int(entity_id), round(x, 1), y, width, height, OBSTACLE_TYPES[kind].value, speed)
+            for entity_id, x, y, width, height, kind, speed
+            in zip(store.ids, store.x, store.y, store.width, store.height, store.kind, store.speed)
+        ]
+        
+    def coin_rows(self) -> List[tuple]:
+        """Coins as compact (id, x, y, spin, collected) rows"""
+        store = self.coins
+        return [
+            (int(entity_id), round(x, 1), y, int(spin) % 360, bool(collected))
+            for entity_id, x, y, spin, collected
+            in zip(store.ids, store.x, store.y, store.spin, store.collected)
+        ]
+        
+    def obstacle_row(self, i: int) -> tuple:
+        """One obstacle as an obstacle_rows row"""
+        store = self.obstacles
+        return (int(store.ids[i]), round(store.x[i], 1), store.y[i], store.width[i], store.height[i],
+                OBSTACLE_TYPES[store.kind[i]].value, store.speed[i])
+        
+    def coin_row(self, i: int) -> tuple:
+        """One coin as a coin_rows row"""
+        store = self.coins
+        return (int(store.ids[i]), round(store.x[i], 1), store.y[i], int(store.spin[i]) % 360,
+                bool(store.collected[i]))
+        
+    def get_game_data(self) -> dict:
+        """Get current game data for UI.
+
+        The dict and the per-entity dicts in it are reused by the next call,
+        so serialize it before stepping the engine again.
+        """
+        data = self.snapshot
+        session = self.session
+        data["state"] = session.state.value
+        data["score"] = session.score
+        data["distance"] = session.distance
+        data["coins_collected"] = session.coins_collected
+        data["high_score"] = session.high_score
+        data["speed"] = round(session.speed, 1)
+        player = data["player"]
+        player["x"] = session.player.x
+        player["y"] = session.player.y
+        player["action"] = session.player.action.value
+
+        store = self.obstacles
+        rows = data["obstacles"]
+        resize_rows(rows, self.spare_obstacle_rows, len(store))
+        for row, entity_id, x, y, width, height, kind in zip(
+                rows, store.ids, store.x, store.y, store.width, store.height, store.kind):
+            row["id"] = int(entity_id)  # Stable for the entity's life, so clients can key elements by it
+            row["x"] = x
+            row["y"] = y
+            row["width"] = width
+            row["height"] = height
+            row["type"] = OBSTACLE_TYPES[kind].value
 
-# Global game engine instance
-game_engine = GameEngine()
\ No newline at end of file
+        store = self.coins
+        rows = data["coins"]
+        resize_rows(rows, self.spare_coin_rows, len(store))
+        for row, entity_id, x, y, spin, collected in zip(rows, store.ids, store.x, store.y, store.spin, store.collected):
+            row["id"] = int(entity_id)
+            row["x"] = x
+            row["y"] = y
+            row["spin"] = spin
+            row["collected"] = bool(collected)
+        return data
@@ -0,0 +1,126 @@
+import random
+from array import array
+from functools import lru_cache
+from typing import Callable, Tuple
+from app.config import settings
+
+class TrackTemplate:
+    """One precomputed stretch of track: where its obstacles and coins go.
+
+    Offsets are in pixels from the start of the chunk, ascending. Templates
+    are read-only and shared by every session.
+    """
+
+    __slots__ = ("obstacle_offsets", "obstacle_kinds", "coin_offsets", "coin_heights")
+
+    def __init__(self):
+        self.obstacle_offsets = array("d")
+        self.obstacle_kinds = array("b")  # Index into OBSTACLE_TYPES
+        self.coin_offsets = array("d")
+        self.coin_heights = array("d")
+
+def placements(rng: random.Random, length: float, rate: float) -> array:
+    """Ascending offsets in [0, length) with exponential gaps, as per-pixel rolls at this rate would give"""
+    offsets = array("d")
+    if rate <= 0:
+        return offsets
+    offset = rng.expovariate(rate)
+    while offset < length:
+        offsets.append(offset)
+        offset += rng.expovariate(rate)
+    return offsets
+
+@lru_cache(maxsize=8)
+def template_pool(seed: int, size: int, length: float, obstacle_rate: float, coin_rate: float,
+                  kinds: int, coin_heights: Tuple[float, ...]) -> Tuple[TrackTemplate, ...]:
+    """Generate (once per parameter set) the templates every game's track is built from"""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(size):
+        template = TrackTemplate()
+        template.obstacle_offsets = placements(rng, length, obstacle_rate)
+        template.obstacle_kinds = array("b", (rng.randrange(kinds) for _ in template.obstacle_offsets))
+        template.coin_offsets = placements(rng, length, coin_rate)
+        template.coin_heights = array("d", (rng.choice(coin_heights) for _ in template.coin_offsets))
+        pool.append(template)
+    return tuple(pool)
+
+def offsets_at(offsets: array, index: int, end: float) -> float:
+    """The offset at index, or end when there are no more"""
+    return offsets[index] if index < len(offsets) else end
+
+class Track:
+    """A game's track, streamed chunk by chunk as the player advances.
+
+    Each chunk is a template from the shared pool, picked by the game's
+    seeded RNG, so a game costs one random draw per chunk instead of two per
+    tick and the same seed always lays out the same track. Entities spawn
+    by distance scrolled, so the layout does not depend on the tick rate.
+    """
+
+    def __init__(self, rng: random.Random, kinds: int, coin_heights: Tuple[float, ...]):
+        self.rng = rng
+        self.length = float(settings.track_chunk_length)
+        # Spawn rates are per 60 FPS reference tick at the initial speed, which
+        # scrolls initial_speed pixels
+        self.pool = template_pool(
+            settings.track_seed, settings.track_templates, self.length,
+            settings.obstacle_spawn_rate / settings.initial_speed,
+            settings.coin_spawn_rate / settings.initial_speed,
+            kinds, tuple(coin_heights)
+        )
+        self.distance = 0.0  # Pixels scrolled since the game started
+        self.chunk_start = -self.length
+        self.next_chunk()
+
+    def next_chunk(self):
+        """Stream in the next chunk"""
+        self.chunk_start += self.length
+        self.template = self.pool[self.rng.randrange(len(self.pool))]
+        self.next_obstacle = 0
+        self.next_coin = 0
+        self.next_due = self.chunk_start  # Distance at which advance has work to do
+
+    def chunks(self) -> int:
+        """Chunks streamed in so far"""
+        return round(self.chunk_start / self.length) + 1
+
+    def seek(self, chunks: int, distance: float, next_obstacle: int, next_coin: int):
+        """Return to a saved position: redraw the chunk choices from the game's
+        RNG up to the saved chunk, then pick up inside it where the save left off"""
+        for _ in range(chunks - self.chunks()):
+            self.next_chunk()
+        self.distance = distance
+        self.next_obstacle = next_obstacle
+        self.next_coin = next_coin
+        self.next_due = self.chunk_start + min(
+            offsets_at(self.template.obstacle_offsets, next_obstacle, self.length),
+            offsets_at(self.template.coin_offsets, next_coin, self.length)
+        )
+
+    def advance(self, pixels: float, obstacle: Callable[[float, int], None],
+                coin: Callable[[float, float], None]):
+        """Scroll the track, calling obstacle(lead, kind) and coin(lead, height) for
+        every placement reached, where lead is how far into the scroll it was"""
+        start = self.distance
+        self.distance += pixels
+        if self.distance < self.next_due:
+            return  # Most ticks reach nothing
+        while True:
+            position = self.distance - self.chunk_start
+            template = self.template
+            offsets = template.obstacle_offsets
+            while self.next_obstacle < len(offsets) and offsets[self.next_obstacle] <= position:
+                obstacle(self.chunk_start + offsets[self.next_obstacle] - start,
+                         template.obstacle_kinds[self.next_obstacle])
+                self.next_obstacle += 1
+            offsets = template.coin_offsets
+            while self.next_coin < len(offsets) and offsets[self.next_coin] <= position:
+                coin(self.chunk_start + offsets[self.next_coin] - start, template.coin_heights[self.next_coin])
+                self.next_coin += 1
+            if position < self.length:
+                break
+            self.next_chunk()
+        next_obstacle = offsets_at(template.obstacle_offsets, self.next_obstacle, self.length)
+        next_coin = offsets_at(template.coin_offsets, self.next_coin, self.length)
+        self.next_due = self.chunk_start + min(next_obstacle, next_coin)
@@ -1,16 +1,19 @@
 from nicegui import ui
-from typing import Dict, Any
+from typing import Callable, Optional
 import json
+from app.config import settings
 
 class GameUI:
     """Game UI components and management"""
     
-    def __init__(self):
+    def __init__(self, engine, on_activity: Optional[Callable[[], None]] = None):
+        self.engine = engine
+        self.on_activity = on_activity
         self.game_container = None
         self.score_elements = {}
         
-    def create_game_container(self) -> ui.element:
-        """Create the main game container"""
+    def create_game_container(self, watching: Optional[str] = None) -> ui.element:
+        """Create the main game container; spectators pass the watched player's name"""
         with ui.element('div').classes('game-container') as container:
             self.game_container = container
             
@@ -28,9 +31,14 @@ class GameUI:
             # Game UI overlay
             self.create_game_ui()
             
-            # Game screens
-            self.create_menu_screen()
-            self.create_game_over_screen()
+            # Game screens; spectators get no controls
+            if watching:
+                ui.html(f'Watching {watching}', tag='div').classes('spectator-banner')
+                self.create_game_over_screen(controls=False)
+            else:
+                self.create_menu_screen()
+                self.create_pause_screen()
+                self.create_game_over_screen()
             
         return container
         
@@ -42,34 +50,34 @@ class GameUI:
                 with ui.element('div').classes('score-item'):
                     ui.element('div').classes('score-icon distance-icon')
                     with ui.element('span'):
-                        ui.text('Distance: ')
+                        ui.html('Distance: ', tag='span')
                         self.score_elements['distance'] = ui.label('0m').classes('distance-value')
                         
                 with ui.element('div').classes('score-item'):
                     ui.element('div').classes('score-icon coin-icon')
                     with ui.element('span'):
-                        ui.text('Coins: ')
+                        ui.html('Coins: ', tag='span')
                         self.score_elements['coins'] = ui.label('0').classes('coins-value')
                         
                 with ui.element('div').classes('score-item'):
                     ui.element('div').classes('score-icon speed-icon')
                     with ui.element('span'):
-                        ui.text('Speed: ')
+                        ui.html('Speed: ', tag='span')
                         self.score_elements['speed'] = ui.label('2.0x').classes('speed-value')
                         
             # High score display
             with ui.element('div').classes('score-panel'):
                 with ui.element('div').classes('score-item'):
-                    ui.text('Score: ')
+                    ui.html('Score: ', tag='span')
                     self.score_elements['score'] = ui.label('0').classes('score-value')
                 with ui.element('div').classes('score-item'):
-                    ui.text('High Score: ')
+                    ui.html('High Score: ', tag='span')
                     self.score_elements['high_score'] = ui.label('0').classes('high-score-value')
                     
     def create_menu_screen(self):
         """Create game menu screen"""
         with ui.element('div').classes('game-menu').style('display: block;'):
-            ui.element('h1').classes('game-title').text('Temple Run Adventure')
+            ui.html('Temple Run Adventure', tag='h1').classes('game-title')
             
             with ui.element('div').style('margin: 30px 0;'):
                 ui.button('Start Game', on_click=self.start_game).classes('game-button')
@@ -86,38 +94,66 @@ class GameUI:
                     </div>
                 ''')
                 
-    def create_game_over_screen(self):
+    def create_pause_screen(self):
+        """Create the pause screen, shown e.g. for a game resumed after a restart"""
+        with ui.element('div').classes('pause-screen').style('display: none;'):
+            ui.html('Paused', tag='h2').classes('game-over-title')
+            ui.html('Press <span class="control-key">ENTER</span> to carry on', tag='div').classes('controls-info')
+            ui.button('Continue', on_click=self.resume_game).classes('game-button')
+                
+    def create_game_over_screen(self, controls: bool = True):
         """Create game over screen"""
         with ui.element('div').classes('game-over-screen').style('display: none;'):
-            ui.element('h2').classes('game-over-title').text('Game Over!')
+            ui.html('Game Over!', tag='h2').classes('game-over-title')
             
             with ui.element('div').classes('final-score'):
                 with ui.element('div').style('margin-bottom: 10px;'):
-                    ui.text('Final Score: ')
+                    ui.html('Final Score: ', tag='span')
                     ui.label('0').classes('final-score-value')
                     
                 with ui.element('div').style('margin-bottom: 10px;'):
-                    ui.text('Distance: ')
+                    ui.html('Distance: ', tag='span')
                     ui.label('0m').classes('final-distance-value')
                     
                 with ui.element('div'):
-                    ui.text('Coins Collected: ')
+                    ui.html('Coins Collected: ', tag='span')
                     ui.label('0').classes('final-coins-value')
                     
-            ui.button('Play Again', on_click=self.restart_game).classes('game-button restart-button')
+            if controls:
+                ui.button('Play Again', on_click=self.restart_game).classes('game-button restart-button')
             
+    def detach(self):
+        """Stop the controls driving the engine, e.g. once its session was evicted"""
+        self.engine = None
+        
     def start_game(self):
         """Start the game"""
-        from app.components.game_engine import game_engine
-        game_engine.start_game()
+        if self.engine is None:
+            return
+        # Buttons go through the input queue like keys, so replays record them
+        self.engine.queue_input("start")
+        if self.on_activity:
+            self.on_activity()
         self.hide_menu()
         
     def restart_game(self):
         """Restart the game"""
-        from app.components.game_engine import game_engine
-        game_engine.start_game()
+        if self.engine is None:
+            return
+        self.engine.queue_input("start")
+        if self.on_activity:
+            self.on_activity()
         self.hide_game_over()
         
+    def resume_game(self):
+        """Continue a paused game"""
+        if self.engine is None:
+            return
+        self.engine.queue_input("resume")
+        if self.on_activity:
+            self.on_activity()
+        self.hide_pause()
+        
     def hide_menu(self):
         """Hide menu screen"""
         ui.run_javascript('document.querySelector(".game-menu").style.display = "none";')
@@ -126,45 +162,35 @@ class GameUI:
         """Show menu screen"""
         ui.run_javascript('document.querySelector(".game-menu").style.display = "block";')
         
+    def hide_pause(self):
+        """Hide pause screen"""
+        ui.run_javascript('document.querySelector(".pause-screen").style.display = "none";')
+        
     def hide_game_over(self):
         """Hide game over screen"""
         ui.run_javascript('document.querySelector(".game-over-screen").style.display = "none";')
         
-    def show_game_over(self, game_data: Dict[str, Any]):
-        """Show game over screen with final scores"""
-        ui.run_javascript(f'''
-            const gameOverScreen = document.querySelector(".game-over-screen");
-            gameOverScreen.style.display = "flex";
-            
-            document.querySelector(".final-score-value").textContent = "{game_data['score']}";
-            document.querySelector(".final-distance-value").textContent = "{game_data['distance']}m";
-            document.querySelector(".final-coins-value").textContent = "{game_data['coins']}";
-        ''')
+    def configure_client(self):
+        """Send the simulation constants the client needs to predict motion"""
+        config = {
+            "tickRate": settings.tick_rate,
+            "updateRate": settings.ui_update_rate,
+            "maxSpeed": settings.max_speed,
+            "speedIncrement": settings.speed_increment,
+            "distanceScore": settings.distance_score,
+            "jumpDuration": settings.jump_duration,
+            "slideDuration": settings.slide_duration,
+            "renderer": settings.client_renderer,
+            "frameOverlay": settings.frame_overlay
+        }
+        ui.run_javascript(f'window.gameClient && window.gameClient.configure({json.dumps(config)});')
         
-    def update_game_display(self, game_data: Dict[str, Any]):
-        """Update game display with current data"""
-        # Update score elements
-        if 'score' in self.score_elements:
-            self.score_elements['score'].text = str(game_data['score'])
-        if 'distance' in self.score_elements:
-            self.score_elements['distance'].text = f"{game_data['distance']}m"
-        if 'coins' in self.score_elements:
-            self.score_elements['coins'].text = str(game_data['coins'])
-        if 'speed' in self.score_elements:
-            self.score_elements['speed'].text = f"{game_data['speed']}x"
-        if 'high_score' in self.score_elements:
-            self.score_elements['high_score'].text = str(game_data['high_score'])
-            
-        # Update game objects via JavaScript
-        ui.run_javascript(f'''
-            if (window.gameClient) {{
-                window.gameClient.updateGameDisplay({json.dumps(game_data)});
-                
-                if ("{game_data['state']}" === "game_over") {{
-                    window.gameClient.showGameOver({json.dumps(game_data)});
-                }}
-            }}
-        ''')
+    def update_game_display(self, frame: str):
+        """Update game display with an encoded state frame.
 
-# Global UI instance
-game_ui = GameUI()
\ No newline at end of file
+        The frame carries only the HUD values that changed since the last one
+        and the client writes them into the score labels itself, so the whole
+        frame goes out as a single websocket message. State changes such as
+        game over reach the client once, in the first frame after them.
+        """
+        ui.run_javascript(f'window.gameClient && window.gameClient.updateGameDisplay({frame});')
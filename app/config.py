@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 class GameSettings(BaseSettings):
     """Game configuration settings"""
@@ -20,8 +20,68 @@ class GameSettings(BaseSettings):
     # Game mechanics
     jump_duration: float = 0.6
     slide_duration: float = 0.4
-    obstacle_spawn_rate: float = 0.02
+    obstacle_spawn_rate: float = 0.02  # Per 60 FPS tick at the initial speed
     coin_spawn_rate: float = 0.015
+
+    # Track
+    track_chunk_length: int = 2400  # Pixels per precomputed track chunk
+    track_templates: int = 64  # Chunk layouts shared by all games
+    track_seed: int = 0  # Seeds the templates; changing it invalidates replays
+    
+    # Simulation
+    tick_rate: int = 60
+    max_catch_up_ticks: int = 5  # Ticks run per wake-up before dropping backlog
+    max_queued_inputs: int = 16
+    max_input_lead_ticks: int = 30  # How far ahead a client may schedule an input
+    engine_mode: Literal["object", "batch"] = "object"  # "batch" steps all sessions with NumPy
+    max_replay_ticks: int = 216000  # Longest replay the server will re-simulate (1 hour)
+    
+    # Client updates
+    ui_update_rate: int = 10  # Clients predict and interpolate between frames
+    max_pending_messages: int = 8  # Skip frames while this many are queued for a client
+    keyframe_interval: int = 20  # Frames between full state keyframes
+    min_update_rate: float = 2.0  # Floor for visible clients while the server sheds load
+    hidden_update_rate: float = 1.0  # Frames/s for clients whose tab is in the background
+    target_tick_load: float = 0.8  # Share of the tick budget above which frame rates drop
+    max_late_tick_ratio: float = 0.1  # Share of catch-up ticks that counts as overload
+    client_renderer: Literal["dom", "canvas"] = "dom"  # Default entity renderer; ?renderer= overrides it
+    frame_overlay: bool = False  # Show the client frame-time overlay by default; ?fps=1 or F toggles it
+    long_poll_timeout: float = 25.0  # Longest a GET /api/game/data?after= request waits for new data
+    rate_control_interval: float = 1.0
+    
+    # Session limits
+    max_sessions: int = 1000
+    session_idle_timeout: float = 600.0  # Seconds without input before eviction
+    session_sweep_interval: float = 30.0
+    max_obstacles_per_session: int = 64
+    max_coins_per_session: int = 64
+    
+    # Profiling
+    profiler_enabled: bool = False  # Allow starting the sampling profiler and allocation tracer through the debug API
+    profiler_interval_ms: float = 5.0
+    trace_allocations: bool = False  # Record allocations per tick with tracemalloc from startup (slow)
+    
+    # Spectators
+    max_viewers_per_session: int = 1000
+    spectator_drop_backlog: int = 64  # Disconnect a viewer with this many frames queued
+    
+    # Cluster
+    workers: int = 1  # Worker processes behind the sticky router; 1 runs a single process
+    worker_id: str = "0"
+    state_backend: str = "memory"  # "memory" or a Redis-compatible redis://host:port/db
+    heartbeat_interval: float = 2.0  # Seconds between worker heartbeats in the backend
+    
+    # Leaderboard
+    leaderboard_path: str = "data/leaderboard.db"
+    leaderboard_size: int = 100  # Top scores kept in memory and served by the API
+    leaderboard_flush_interval: float = 1.0  # Seconds between write-behind flushes
+    leaderboard_batch_size: int = 500  # Scores written per transaction
+    max_pending_scores: int = 10000  # Buffered scores kept if the disk falls behind
+    
+    # Session archive
+    session_archive_path: str = "data/sessions.db"  # Session snapshots for resuming games after a restart
+    session_archive_interval: float = 30.0  # Seconds between saves of sessions that changed
+    session_archive_ttl: float = 7 * 24 * 3600.0  # Seconds a snapshot is kept for a browser to come back
     
     class Config:
         env_file = ".env"
@@ -1,97 +1,458 @@
 import asyncio
-from nicegui import ui, app
-from app.components.game_engine import game_engine
-from app.components.ui_components import game_ui
+import gc
+from functools import partial
+from typing import Optional
+from fastapi import Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from nicegui import core
+from nicegui import ui, app, run, Client
+from models.game_models import GameState, ReplayClaim
+from app.components.ui_components import GameUI
+from app.services.session_registry import (
+    ClientSession, SessionLimitReached, session_registry
+)
+from app.services.tick_scheduler import tick_scheduler
+from app.services.client_loops import client_loops
+from app.services.input_protocol import decode_input
+from app.services.replay import Replay, replay_score
+from app.services.leaderboard import leaderboard
+from app.services.backend import state_backend
+from app.services.cluster import cluster_status, worker_heartbeat
+from app.services.spectators import spectators
+from app.services.metrics import PROMETHEUS_CONTENT_TYPE, Histogram, MetricsWriter, frame_timer, gc_monitor
+from app.services.profiler import allocation_tracer, profiler
+from app.services.rate_controller import rate_controller
+from app.services.snapshots import snapshots
+from app.services.session_archive import RESUME_COOKIE, new_resume_key, session_archive, valid_resume_key
+from app.services.assets import IMMUTABLE, assets
 from app.config import settings
 
-# Add CSS and JavaScript files
-ui.add_head_html('<link rel="stylesheet" href="/static/css/game.css">')
-ui.add_head_html('<script src="/static/js/game.js"></script>')
+# Add CSS and JavaScript files to every page, under content-hashed URLs the
+# app serves itself; compressed copies are made once, right after startup
+ui.add_head_html(f'<link rel="stylesheet" href="{assets.url("css/game.css")}">', shared=True)
+ui.add_head_html(f'<script src="{assets.url("js/game.js")}"></script>', shared=True)
+app.on_startup(assets.warm)
 
+# Modules, routes and settings loaded at startup live for the whole process;
+# freezing them keeps the garbage collector from rescanning them, and the
+# monitor times the collections that still happen
+app.on_startup(gc.freeze)
+app.on_startup(gc_monitor.install)
+if settings.trace_allocations:
+    app.on_startup(allocation_tracer.start)
+
+# Evict idle sessions in the background
+app.on_startup(session_registry.sweep_loop)
+
+# One shared fixed-timestep loop steps every session
+app.on_startup(tick_scheduler.run)
+tick_scheduler.on_tick(snapshots.notify)
+
+# Frame rates follow the server's load and each client's visibility
+app.on_startup(rate_controller.run)
+app.on_shutdown(tick_scheduler.stop)
+app.on_shutdown(client_loops.stop_all)
+
+# High scores are buffered in memory and written behind in batches
+app.on_startup(leaderboard.open)
+app.on_startup(leaderboard.flush_loop)
+app.on_shutdown(leaderboard.close)
+
+# Sessions are snapshotted to disk so returning players get their game back
+# after the machine was stopped; ended sessions are saved on their way out
+app.on_startup(session_archive.open)
+app.on_startup(session_archive.flush_loop)
+app.on_shutdown(session_archive.close)
+session_registry.on_remove(session_archive.retire)
+
+# Report this worker's load and sessions to the shared backend
+app.on_startup(worker_heartbeat.run)
+app.on_shutdown(state_backend.close)
+
+# Spectated sessions are encoded once per frame and fanned out to every viewer
+app.on_startup(spectators.run)
+
+# Evicted or disconnected sessions take their update loop and spectators with them
+session_registry.on_remove(lambda session: client_loops.stop(session.session_id))
+session_registry.on_remove(spectators.end)
+
+def end_session_page(session: ClientSession):
+    """Tell a still-connected player that their session was dropped, e.g. after idling"""
+    client = session.client
+    if client is None or not client.has_socket_connection:
+        return
+    with client:
+        client.run_javascript("window.gameClient && window.gameClient.endSession("
+                              "'This game was closed after being idle. Reload the page to play again.');")
+
+session_registry.on_remove(end_session_page)
+
+# Pages are plain functions: NiceGUI polls async pages for 0.1 s before the
+# first response, which is pure latency when the page never awaits anything
 @ui.page('/')
-async def index():
+def index(client: Client, request: Request):
     """Main game page"""
     ui.page_title(settings.game_title)
-    
+
+    try:
+        session = session_registry.create(client.id)
+    except SessionLimitReached:
+        ui.label('The temple is full right now. Please try again in a moment.')
+        return
+    session.client = client
+
+    # Returning browsers pick up their last session where they left it
+    resume_key = request.cookies.get(RESUME_COOKIE)
+    if valid_resume_key(resume_key):
+        session_archive.resume(session, resume_key)
+    else:
+        session.resume_key = new_resume_key()
+        ui.run_javascript(
+            f'document.cookie = "{RESUME_COOKIE}={session.resume_key}; path=/; '
+            f'max-age={int(settings.session_archive_ttl)}; samesite=lax" '
+            '+ (location.protocol === "https:" ? "; secure" : "");'
+        )
+
     # Create game container
-    game_ui.create_game_container()
-    
-    # Start game update loop
-    asyncio.create_task(game_update_loop())
-    
+    session.ui.create_game_container()
+
+    # Run the update loop only while the client is connected
+    client.on_connect(lambda: connect_client(client, session))
+    client.on_disconnect(lambda: session_registry.remove(session.session_id))
+
+    # Player inputs arrive as compact frames over the page's websocket
+    ui.on('game_input', lambda e: handle_input(session, e.args))
+    ui.on('game_visibility', lambda e: set_hidden(session, e.args))
+
     # Add JavaScript to expose game engine to client
     ui.run_javascript('''
+        const sendInput = (code) => window.gameClient && window.gameClient.sendInput(code);
         window.gameEngine = {
-            player_jump: () => fetch('/api/player/jump', {method: 'POST'}),
-            player_slide: () => fetch('/api/player/slide', {method: 'POST'}),
-            start_game: () => fetch('/api/game/start', {method: 'POST'}),
+            player_jump: () => sendInput('j'),
+            player_slide: () => sendInput('s'),
+            start_game: () => sendInput('g'),
+            resume_game: () => sendInput('r'),
             session: {state: 'menu'}
         };
     ''')
 
-async def game_update_loop():
-    """Main game update loop"""
-    while True:
-        if game_engine.session.state.value == "playing":
-            # Start game engine loop if not running
-            if not game_engine.running:
-                game_engine.running = True
-                asyncio.create_task(game_engine.game_loop())
-                
-        # Get current game data
-        game_data = game_engine.get_game_data()
-        
-        # Update UI
-        game_ui.update_game_display(game_data)
-        
-        # Check for game over
-        if game_data['state'] == 'game_over':
-            game_ui.show_game_over(game_data)
-            
-        await asyncio.sleep(1/30)  # 30 FPS UI updates
+@ui.page('/watch/{player}')
+def watch(player: str, client: Client):
+    """Spectate another player's live run"""
+    ui.page_title(f'{player} - {settings.game_title}')
+
+    session = session_registry.find_player(player)
+    if session is None:
+        ui.label(f'{player} is not playing right now.')
+        return
+    if not spectators.can_watch(session.session_id):
+        ui.label('Too many people are watching this run. Please try again in a moment.')
+        return
+
+    # The spectator's own page elements; frames are shared with the other viewers
+    view = GameUI(session.engine)
+    view.create_game_container(watching=player)
+    client.on_connect(partial(connect_spectator, client, session, view))
+    client.on_disconnect(lambda: spectators.unwatch(client.id))
+
+async def connect_spectator(client: Client, session: ClientSession, view: GameUI):
+    """Subscribe a (re)connected spectator to the session's shared frames"""
+    view.configure_client()
+    ui.run_javascript('window.gameClient && window.gameClient.watch();')
+    await spectators.watch(session, client)
+
+def connect_client(client: Client, session: ClientSession):
+    """Start streaming state to a (re)connected client from a fresh keyframe"""
+    session.sync.reset()
+    session.ui.configure_client()
+    client_loops.start(session.session_id, client, lambda: push_game_frame(session),
+                       pace=lambda: rate_controller.interval(session))
+
+def push_game_frame(session: ClientSession):
+    """Push one frame of game state to the session's client"""
+    frame_timer.start()
+    frame = session.sync.encode(session.engine)
+    frame_timer.lap("serialization")
+    if frame is None:
+        return  # Nothing changed since the last frame
+    session.ui.update_game_display(frame)
+    frame_timer.lap("ui_push")
+
+def handle_input(session: ClientSession, frame: str):
+    """Queue a websocket input frame on the session's engine"""
+    decoded = decode_input(frame)
+    if decoded is None:
+        return
+    action, tick = decoded
+    if session.engine.queue_input(action, tick):
+        session.touch()
+
+def set_hidden(session: ClientSession, hidden):
+    """Record whether the client's tab is in the background"""
+    session.hidden = bool(hidden)
+
+def get_session(session_id: Optional[str]) -> ClientSession:
+    """Resolve the caller's game session from the X-Session-Id header"""
+    session = session_registry.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown game session")
+    session.touch()
+    return session
+
+# NiceGUI renders 404s as an HTML error page; API clients get JSON instead
+page_not_found = app.exception_handlers[404]
+
+@app.exception_handler(404)
+async def not_found(request: Request, exception: Exception) -> Response:
+    """JSON 404s for /api/ routes, NiceGUI's error page for everything else"""
+    if request.url.path.startswith('/api/'):
+        return JSONResponse(status_code=404, content={"detail": getattr(exception, "detail", "Not Found")})
+    return await page_not_found(request, exception)
 
 # API endpoints for game controls
 @app.get('/api/game/data')
-def get_game_data():
-    """Get current game data"""
-    return game_engine.get_game_data()
+async def get_game_data(after: Optional[int] = None, x_session_id: Optional[str] = Header(None),
+                        if_none_match: Optional[str] = Header(None)):
+    """Get current game data; with after=<X-Snapshot-Seq>, wait for the next change first"""
+    # async so that snapshots are built on the event loop, between ticks
+    snapshot = snapshots.current(get_session(x_session_id).snapshot)
+    changed = if_none_match != snapshot.etag
+    if after == snapshot.seq:
+        changed = await snapshots.wait_newer(snapshot, after, settings.long_poll_timeout)
+    headers = {"ETag": snapshot.etag, "X-Snapshot-Seq": str(snapshot.seq),
+               "Cache-Control": "no-cache", "Vary": "X-Session-Id"}
+    if not changed:
+        snapshots.metrics.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
 @app.post('/api/game/start')
-def start_game():
+def start_game(x_session_id: Optional[str] = Header(None)):
     """Start a new game"""
-    game_engine.start_game()
+    get_session(x_session_id).engine.queue_input("start")
     return {"status": "started"}
 
 @app.post('/api/game/pause')
-def pause_game():
+def pause_game(x_session_id: Optional[str] = Header(None)):
     """Pause the game"""
-    game_engine.pause_game()
+    get_session(x_session_id).engine.queue_input("pause")
     return {"status": "paused"}
 
 @app.post('/api/game/resume')
-def resume_game():
+def resume_game(x_session_id: Optional[str] = Header(None)):
     """Resume the game"""
-    game_engine.resume_game()
+    get_session(x_session_id).engine.queue_input("resume")
     return {"status": "resumed"}
 
 @app.post('/api/player/jump')
-def player_jump():
+def player_jump(x_session_id: Optional[str] = Header(None)):
     """Make player jump"""
-    game_engine.player_jump()
+    get_session(x_session_id).engine.queue_input("jump")
     return {"action": "jump"}
 
 @app.post('/api/player/slide')
-def player_slide():
+def player_slide(x_session_id: Optional[str] = Header(None)):
     """Make player slide"""
-    game_engine.player_slide()
+    get_session(x_session_id).engine.queue_input("slide")
     return {"action": "slide"}
 
+@app.get('/api/game/replay')
+def get_replay(x_session_id: Optional[str] = Header(None)):
+    """Replay of the current or last game"""
+    engine = get_session(x_session_id).engine
+    return {"replay": Replay.from_engine(engine).encode(), "score": engine.session.score}
+
+@app.post('/api/replay/verify')
+async def verify_replay(claim: ReplayClaim):
+    """Re-simulate a replay and check that it earns the claimed score"""
+    try:
+        Replay.decode(claim.replay)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Long replays take a while; keep them off the event loop and tick scheduler
+    score = await run.cpu_bound(replay_score, claim.replay)
+    return {"valid": score == claim.score, "score": score}
+
+@app.get('/api/watch')
+def watchable_runs():
+    """Live runs that can be spectated at /watch/<player>"""
+    return [
+        {
+            "player": session.player,
+            "score": session.engine.session.score,
+            "viewers": spectators.viewers(session.session_id),
+        }
+        for session in session_registry
+        if session.engine.session.state == GameState.PLAYING
+    ]
+
+@app.get('/api/leaderboard')
+async def get_leaderboard(if_none_match: Optional[str] = Header(None)):
+    """Top scores, served from memory"""
+    etag = f'"{leaderboard.version}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=1"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=leaderboard.response(), media_type="application/json", headers=headers)
+
+@app.get('/api/debug/leaderboard')
+def leaderboard_metrics():
+    """Write-behind buffer metrics"""
+    return {"pending": len(leaderboard.pending), "best": leaderboard.best(), **leaderboard.metrics.to_dict()}
+
+@app.get('/api/debug/scheduler')
+def scheduler_metrics():
+    """Tick scheduler timing and overrun metrics"""
+    return {
+        "tick_rate": round(1 / tick_scheduler.timestep),
+        "engine_mode": settings.engine_mode,
+        "active_sessions": len(session_registry),
+        **tick_scheduler.metrics.to_dict(),
+        **rate_controller.to_dict()
+    }
+
+@app.get('/api/debug/snapshots')
+def snapshot_metrics():
+    """Game data requests, snapshot builds and long polls"""
+    return snapshots.metrics.to_dict()
+
+@app.get('/api/debug/archive')
+def archive_metrics():
+    """Session snapshots saved, written and restored"""
+    return {"pending": len(session_archive.pending), **session_archive.metrics.to_dict()}
+
+@app.get('/api/debug/cluster')
+async def cluster_metrics():
+    """Workers and their session counts, as reported through the state backend"""
+    return {"worker": settings.worker_id, **await cluster_status(state_backend)}
+
+@app.get('/api/debug/spectators')
+def spectator_metrics():
+    """Spectator broadcasts, viewers and fan-out cost"""
+    return spectators.describe()
+
+@app.get('/api/debug/profiler')
+def profiler_status():
+    """Sampling profiler state and the functions it caught running most"""
+    return profiler.describe()
+
+@app.get('/api/debug/profiler/folded')
+def profiler_folded():
+    """Profiler samples as folded stacks for a flame graph"""
+    return Response(content=profiler.folded(), media_type="text/plain")
+
+@app.post('/api/debug/profiler/start')
+async def start_profiler():
+    """Start sampling the event loop, if enabled in settings"""
+    # async so that this runs on, and the profiler samples, the event loop thread
+    if not settings.profiler_enabled:
+        raise HTTPException(status_code=403, detail="Set PROFILER_ENABLED=true to allow profiling")
+    profiler.start()
+    return profiler.describe()
+
+@app.post('/api/debug/profiler/stop')
+def stop_profiler():
+    """Stop sampling and keep the samples for reading"""
+    profiler.stop()
+    return profiler.describe()
+
+@app.get('/api/debug/allocations')
+def allocation_status():
+    """Memory allocated per scheduler tick while the allocation tracer runs"""
+    return allocation_tracer.describe()
+
+@app.post('/api/debug/allocations/start')
+def start_allocation_tracer():
+    """Start tracing per-tick allocations, if enabled in settings"""
+    if not settings.profiler_enabled:
+        raise HTTPException(status_code=403, detail="Set PROFILER_ENABLED=true to allow allocation tracing")
+    allocation_tracer.start()
+    return allocation_tracer.describe()
+
+@app.post('/api/debug/allocations/stop')
+def stop_allocation_tracer():
+    """Stop tracing and keep the measurements for reading"""
+    allocation_tracer.stop()
+    return allocation_tracer.describe()
+
+@app.get('/api/debug/loops')
+def live_loops():
+    """Client update loops that are currently running"""
+    if not settings.profiler_enabled:
+        raise HTTPException(status_code=403, detail="Set PROFILER_ENABLED=true to list client loops")
+    return {"count": len(client_loops), "loops": client_loops.describe()}
+
+@app.get('/metrics')
+async def prometheus_metrics():
+    """Live performance metrics in the Prometheus text format"""
+    out = MetricsWriter()
+    tick = tick_scheduler.metrics
+    out.counter("ticks", tick.ticks, "Scheduler ticks run")
+    out.counter("tick_overruns", tick.overruns, "Ticks that took longer than one timestep")
+    out.counter("dropped_ticks", tick.dropped_ticks, "Ticks skipped to avoid a catch-up spiral")
+    out.counter("late_ticks", tick.late_ticks, "Ticks run to catch up after a late wake-up")
+    out.histograms("tick_seconds", {"": tick.durations}, None, "Wall time to step every session once")
+    out.histograms("engine_phase_seconds", tick_scheduler.phases.histograms, "phase",
+                   "Wall time of each engine phase per tick, across all sessions")
+    out.histograms("frame_phase_seconds", frame_timer.histograms, "phase",
+                   "Wall time to encode and push one client frame")
+    out.histograms("gc_pause_seconds", gc_monitor.pauses, "generation", "Garbage collector pauses")
+    out.counter("gc_collected_objects", gc_monitor.collected, "Objects freed by the garbage collector")
+    if allocation_tracer.bytes.count:
+        out.histograms("tick_allocated_bytes", {"": allocation_tracer.bytes}, None,
+                       "Memory allocated while stepping every session once (allocation tracer)")
+
+    out.gauge("active_sessions", len(session_registry), "Registered game sessions")
+    out.gauge("update_rate_hz", rate_controller.rate, "Frame rate for visible, playing clients")
+    out.gauge("tick_load", rate_controller.load, "Share of the tick budget used recently")
+    out.gauge("hidden_sessions", sum(session.hidden for session in session_registry),
+              "Sessions whose tab is in the background")
+    out.gauge("client_loops", len(client_loops), "Running client update loops")
+    out.gauge("spectators", len(spectators), "Clients watching another player")
+    out.gauge("asyncio_tasks", len(asyncio.all_tasks()), "Tasks alive on the event loop")
+    entities = {"obstacles": Histogram((0, 4, 8, 16, 32, 64)), "coins": Histogram((0, 4, 8, 16, 32, 64))}
+    for session in session_registry:
+        entities["obstacles"].observe(len(session.engine.obstacles))
+        entities["coins"].observe(len(session.engine.coins))
+    out.histograms("entities_per_session", entities, "kind", "Live entities per session at scrape time")
+
+    # Packets queued on each websocket but not yet written, i.e. slow or stalled clients
+    queues = [socket.queue.qsize() for socket in list(core.sio.eio.sockets.values())]
+    out.labelled("websocket_send_queue", "gauge", {"total": sum(queues), "max": max(queues, default=0)},
+                 "stat", "Packets waiting in websocket send queues")
+    out.counter("game_data_requests", snapshots.metrics.requests, "GET /api/game/data requests")
+    out.counter("game_data_builds", snapshots.metrics.builds, "Game data snapshots serialized")
+    out.gauge("game_data_long_polls", snapshots.metrics.waiting, "Long polls waiting for the next tick")
+    out.gauge("leaderboard_pending", len(leaderboard.pending), "Scores buffered for the next write")
+    out.counter("session_snapshots_saved", session_archive.metrics.saved, "Session snapshots encoded")
+    out.counter("session_snapshot_bytes", session_archive.metrics.bytes_saved, "Bytes of session snapshots encoded")
+    out.counter("session_snapshots_restored", session_archive.metrics.restored,
+                "Sessions restored for a returning browser")
+    out.gauge("profiler_running", int(profiler.running), "Whether the sampling profiler is running")
+    return Response(content=out.text(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get('/static/{path:path}')
+def static_asset(path: str, accept_encoding: Optional[str] = Header(None),
+                 if_none_match: Optional[str] = Header(None)):
+    """CSS and JavaScript, precompressed; fingerprinted URLs are cached for good"""
+    asset, immutable = assets.find(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    headers = {"ETag": asset.etag, "Vary": "Accept-Encoding",
+               "Cache-Control": IMMUTABLE if immutable else "no-cache"}
+    if if_none_match == asset.etag:
+        return Response(status_code=304, headers=headers)
+    encoding = assets.negotiate(asset, accept_encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=asset.body(encoding), media_type=asset.media_type, headers=headers)
+
 # Health check endpoint for deployment
 @app.get('/health')
 def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "game_state": game_engine.session.state.value,
+        "active_sessions": len(session_registry),
         "version": "1.0.0"
-    }
\ No newline at end of file
+    }
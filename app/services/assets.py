@@ -0,0 +1,104 @@
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: without it assets are served gzip-compressed only
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "static")
+URL_PREFIX = "/static/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+class Asset:
+    """A static file held in memory under a content-hashed URL.
+
+    Compressed copies are made once, on first request or when the assets
+    are warmed after startup, and kept for the life of the process.
+    """
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.data = data
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        self.url = f"{URL_PREFIX}{stem}.{digest}{ext}"
+        self.etag = f'"{digest}"'
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.encodings: Dict[str, bytes] = {}
+
+    def body(self, encoding: Optional[str]) -> bytes:
+        """The asset's bytes in the given content encoding (None for identity)"""
+        if encoding is None:
+            return self.data
+        if encoding not in self.encodings:
+            self.encodings[encoding] = compress(self.data, encoding)
+        return self.encodings[encoding]
+
+class StaticAssets:
+    """The game's CSS and JavaScript, served by the app itself.
+
+    Fingerprinted URLs can be cached forever; the plain paths still work
+    for anything that links them directly, but must be revalidated.
+    """
+
+    def __init__(self, directory: str = STATIC_DIR):
+        self.directory = directory
+        self.assets: Dict[str, Asset] = {}  # Keyed by both the plain and the fingerprinted path
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    asset = Asset(name, f.read())
+                self.assets[name] = asset
+                self.assets[asset.url[len(URL_PREFIX):]] = asset
+
+    def url(self, name: str) -> str:
+        """Fingerprinted URL for a file under static/"""
+        return self.assets[name].url
+
+    def find(self, path: str) -> Tuple[Optional[Asset], bool]:
+        """The asset for a path below /static/ and whether that URL is immutable"""
+        asset = self.assets.get(path)
+        if asset is None:
+            return None, False
+        return asset, path != asset.name
+
+    @staticmethod
+    def negotiate(asset: Asset, accept_encoding: Optional[str]) -> Optional[str]:
+        """Best content encoding the client accepts: brotli, then gzip, else None.
+
+        Brotli at its best quality is slow to compress, so it is only offered
+        once warm() has made it; a visitor arriving earlier gets gzip.
+        """
+        accepted = set()
+        for part in (accept_encoding or "").lower().split(","):
+            coding, _, params = part.partition(";")
+            if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(coding.strip())
+        if "br" in asset.encodings and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    async def warm(self):
+        """Compress every asset off the event loop so first visitors don't wait for it"""
+        encodings = ["gzip"] + (["br"] if brotli is not None else [])
+        for asset in set(self.assets.values()):
+            for encoding in encodings:
+                await asyncio.to_thread(asset.body, encoding)
+
+# Global static assets, loaded when the app is imported
+assets = StaticAssets()
@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import fnmatch
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from app.config import settings
+
+class StateBackend(ABC):
+    """Shared store for state that must be visible to every worker.
+
+    Holds session metadata, worker heartbeats and the leaderboard's top
+    scores. Game simulation state never goes through the backend; a session
+    lives entirely on the worker that owns it.
+    """
+
+    @abstractmethod
+    async def set_many(self, items: Dict[str, str], ttl: Optional[float] = None):
+        """Set several keys, optionally expiring after ttl seconds"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """The value of one live key, or None"""
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        """Remove keys and sorted sets"""
+
+    @abstractmethod
+    async def scan(self, prefix: str) -> Dict[str, str]:
+        """All live keys starting with prefix and their values"""
+
+    @abstractmethod
+    async def zadd(self, key: str, members: Dict[str, float]):
+        """Add members to a sorted set"""
+
+    @abstractmethod
+    async def ztop(self, key: str, count: int) -> List[Tuple[str, float]]:
+        """Highest-scoring members of a sorted set, best first"""
+
+    @abstractmethod
+    async def ztrim(self, key: str, keep: int):
+        """Drop all but the keep highest-scoring members"""
+
+    async def close(self):
+        pass
+
+class InProcessBackend(StateBackend):
+    """Backend held in this process's memory; the single-worker default"""
+
+    def __init__(self):
+        self.values: Dict[str, Tuple[str, Optional[float]]] = {}  # key -> (value, expires at)
+        self.sorted_sets: Dict[str, Dict[str, float]] = {}
+
+    def live(self, key: str) -> bool:
+        """Whether key exists and has not expired, dropping it if it has"""
+        entry = self.values.get(key)
+        if entry is None:
+            return False
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self.values[key]
+            return False
+        return True
+
+    async def set_many(self, items: Dict[str, str], ttl: Optional[float] = None):
+        expires = time.monotonic() + ttl if ttl else None
+        for key, value in items.items():
+            self.values[key] = (value, expires)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.values[key][0] if self.live(key) else None
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.values.pop(key, None)
+            self.sorted_sets.pop(key, None)
+
+    async def scan(self, prefix: str) -> Dict[str, str]:
+        return {key: self.values[key][0] for key in list(self.values) if key.startswith(prefix) and self.live(key)}
+
+    async def zadd(self, key: str, members: Dict[str, float]):
+        self.sorted_sets.setdefault(key, {}).update(members)
+
+    async def ztop(self, key: str, count: int) -> List[Tuple[str, float]]:
+        members = self.sorted_sets.get(key, {})
+        return sorted(members.items(), key=lambda item: (-item[1], item[0]))[:count]
+
+    async def ztrim(self, key: str, keep: int):
+        members = self.sorted_sets.get(key)
+        if members and len(members) > keep:
+            self.sorted_sets[key] = dict(await self.ztop(key, keep))
+
+SCAN_COUNT = 500  # Keys the server looks at per SCAN step
+
+class RespError(Exception):
+    """Error reply from a Redis-compatible server"""
+
+class RespBackend(StateBackend):
+    """Backend on a Redis-compatible server, spoken over RESP"""
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.lock = asyncio.Lock()
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        if self.db:
+            self.writer.write(encode_command("SELECT", self.db))
+            reply = await read_reply(self.reader)
+            if isinstance(reply, RespError):
+                raise reply
+
+    async def pipeline(self, commands: List[tuple]) -> list:
+        """Send commands in one write and read their replies in order"""
+        async with self.lock:
+            if self.writer is None or self.writer.is_closing():
+                await self.connect()
+            try:
+                self.writer.write(b"".join(encode_command(*command) for command in commands))
+                await self.writer.drain()
+                replies = [await read_reply(self.reader) for _ in commands]
+            except (OSError, asyncio.IncompleteReadError):
+                # Reconnect on the next call rather than reading a half-consumed stream
+                self.writer.close()
+                self.writer = None
+                raise
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    async def set_many(self, items: Dict[str, str], ttl: Optional[float] = None):
+        if items:
+            expiry = ("PX", int(ttl * 1000)) if ttl else ()
+            await self.pipeline([("SET", key, value, *expiry) for key, value in items.items()])
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.pipeline([("DEL", *keys)])
+
+    async def get(self, key: str) -> Optional[str]:
+        value = (await self.pipeline([("GET", key)]))[0]
+        return value.decode() if value is not None else None
+
+    async def scan(self, prefix: str) -> Dict[str, str]:
+        # SCAN walks the keyspace in steps instead of blocking the server
+        # the way KEYS does
+        keys = []
+        cursor = b"0"
+        while True:
+            cursor, page = (await self.pipeline([("SCAN", cursor, "MATCH", prefix + "*", "COUNT", SCAN_COUNT)]))[0]
+            keys.extend(page)
+            if cursor == b"0":
+                break
+        keys = list(dict.fromkeys(keys))  # SCAN may return a key more than once
+        if not keys:
+            return {}
+        values = (await self.pipeline([("MGET", *keys)]))[0]
+        return {key.decode(): value.decode() for key, value in zip(keys, values) if value is not None}
+
+    async def zadd(self, key: str, members: Dict[str, float]):
+        if members:
+            pairs = [part for member, score in members.items() for part in (score, member)]
+            await self.pipeline([("ZADD", key, *pairs)])
+
+    async def ztop(self, key: str, count: int) -> List[Tuple[str, float]]:
+        reply = (await self.pipeline([("ZREVRANGE", key, 0, count - 1, "WITHSCORES")]))[0]
+        return [(reply[i].decode(), float(reply[i + 1])) for i in range(0, len(reply), 2)]
+
+    async def ztrim(self, key: str, keep: int):
+        await self.pipeline([("ZREMRANGEBYRANK", key, 0, -keep - 1)])
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+def encode_command(*parts) -> bytes:
+    """Encode a command as a RESP array of bulk strings"""
+    encoded = [b"*%d\r\n" % len(parts)]
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode()
+        encoded.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(encoded)
+
+async def read_reply(reader: asyncio.StreamReader):
+    """Read one RESP reply"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Backend closed the connection")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        return RespError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RespError(f"Unexpected reply {line!r}")
+
+class RespServer:
+    """Minimal Redis-compatible server over an InProcessBackend.
+
+    Implements just the commands RespBackend sends, so a multi-worker
+    cluster (or a test) can share state without a real Redis install.
+    """
+
+    def __init__(self, backend: Optional[InProcessBackend] = None):
+        self.backend = backend or InProcessBackend()
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening and return the bound port"""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                command = await read_reply(reader)
+                if not isinstance(command, list) or not command:
+                    break
+                writer.write(await self.execute([part.decode() for part in command]))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # Client went away or the server is shutting down
+        finally:
+            writer.close()
+
+    async def execute(self, command: List[str]) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        backend = self.backend
+        try:
+            if name == "PING":
+                return b"+PONG\r\n"
+            if name == "SELECT":
+                return b"+OK\r\n"
+            if name == "SET":
+                ttl = float(args[3]) / 1000 if len(args) >= 4 and args[2].upper() == "PX" else None
+                await backend.set_many({args[0]: args[1]}, ttl)
+                return b"+OK\r\n"
+            if name == "GET":
+                return encode_bulk(backend.values[args[0]][0] if backend.live(args[0]) else None)
+            if name == "MGET":
+                return b"*%d\r\n" % len(args) + b"".join(
+                    encode_bulk(backend.values[key][0] if backend.live(key) else None) for key in args
+                )
+            if name == "DEL":
+                await backend.delete(*args)
+                return b":%d\r\n" % len(args)
+            if name == "SCAN":
+                # Everything in one step; cursor 0 tells the client it is done
+                pattern = args[args.index("MATCH") + 1] if "MATCH" in args else "*"
+                keys = [key for key in list(backend.values) if fnmatch.fnmatchcase(key, pattern) and backend.live(key)]
+                return b"*2\r\n" + encode_bulk("0") + b"*%d\r\n" % len(keys) + b"".join(encode_bulk(key) for key in keys)
+            if name == "ZADD":
+                await backend.zadd(args[0], {args[i + 1]: float(args[i]) for i in range(1, len(args), 2)})
+                return b":%d\r\n" % ((len(args) - 1) // 2)
+            if name == "ZREVRANGE":
+                stop = int(args[2])
+                members = await backend.ztop(args[0], len(backend.sorted_sets.get(args[0], {})))
+                members = members[int(args[1]):None if stop == -1 else stop + 1]
+                parts = [part for member, score in members for part in (member, repr(score))]
+                return b"*%d\r\n" % len(parts) + b"".join(encode_bulk(part) for part in parts)
+            if name == "ZREMRANGEBYRANK":
+                # Only the "keep the top N" form that RespBackend.ztrim sends
+                await backend.ztrim(args[0], -int(args[2]) - 1)
+                return b":0\r\n"
+        except (IndexError, ValueError):
+            return b"-ERR syntax error\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+def encode_bulk(value: Optional[str]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    data = value.encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+def create_backend(url: str) -> StateBackend:
+    """Backend for a STATE_BACKEND setting: "memory" or redis://host:port/db"""
+    if url == "memory":
+        return InProcessBackend()
+    if url.startswith("redis://"):
+        return RespBackend(url)
+    raise ValueError(f"Unsupported state backend {url!r}")
+
+# Global backend shared by the services in this worker
+state_backend = create_backend(settings.state_backend)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Redis-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    async def serve():
+        server = RespServer()
+        port = await server.start(args.host, args.port)
+        print(f"Stand-in backend listening on {args.host}:{port}")
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
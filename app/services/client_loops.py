@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ClientLoop:
+    """Per-client UI update loop tied to the client's connection lifecycle"""
+
+    def __init__(self, session_id: str, client: Any, frame: Callable[[], None], interval: float,
+                 pace: Optional[Callable[[], Optional[float]]] = None):
+        self.session_id = session_id
+        self.client = client
+        self.frame = frame
+        self.interval = interval
+        self.pace = pace  # Current interval between frames, or None while suspended
+        self.started = time.monotonic()
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.frames_suspended = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def pending_messages(self) -> int:
+        """Messages queued for the client's websocket but not yet sent"""
+        return len(self.client.outbox.messages)
+
+    async def run(self, max_pending: int):
+        """Push frames until cancelled, skipping frames while the socket is backed up"""
+        while True:
+            interval = self.pace() if self.pace is not None else self.interval
+            if interval is None:
+                # Suspended: only check back at the base interval whether that changed
+                self.frames_suspended += 1
+                interval = self.interval
+            elif self.pending_messages() >= max_pending:
+                self.frames_skipped += 1
+            else:
+                with self.client:
+                    self.frame()
+                self.frames_sent += 1
+            await asyncio.sleep(interval)
+
+    def describe(self) -> Dict[str, Any]:
+        """Loop status for the debug endpoint.
+
+        The session id doubles as the client's X-Session-Id credential, so
+        loops are only named by a hash of it.
+        """
+        return {
+            "loop": hashlib.sha256(self.session_id.encode()).hexdigest()[:12],
+            "age_s": round(time.monotonic() - self.started, 1),
+            "interval_ms": round(self.interval * 1000, 1),
+            "frames_sent": self.frames_sent,
+            "frames_skipped": self.frames_skipped,
+            "frames_suspended": self.frames_suspended,
+            "pending_messages": self.pending_messages(),
+        }
+
+class ClientLoopManager:
+    """Starts update loops on client connect and cancels them on disconnect"""
+
+    def __init__(self, update_rate: Optional[int] = None, max_pending: Optional[int] = None):
+        self.interval = 1 / (update_rate or settings.ui_update_rate)
+        self.max_pending = max_pending or settings.max_pending_messages
+        self._loops: Dict[str, ClientLoop] = {}
+
+    def __len__(self) -> int:
+        return len(self._loops)
+
+    def start(self, session_id: str, client: Any, frame: Callable[[], None],
+              pace: Optional[Callable[[], Optional[float]]] = None) -> ClientLoop:
+        """Start (or restart after a reconnect) the update loop for a client"""
+        self.stop(session_id)
+        loop = ClientLoop(session_id, client, frame, self.interval, pace)
+        loop.task = asyncio.create_task(loop.run(self.max_pending), name=f'client loop {session_id}')
+        loop.task.add_done_callback(lambda task: self._forget(session_id, task))
+        self._loops[session_id] = loop
+        return loop
+
+    def stop(self, session_id: str):
+        """Cancel the update loop for a client, if any"""
+        loop = self._loops.pop(session_id, None)
+        if loop is not None and loop.task is not None:
+            loop.task.cancel()
+
+    def stop_all(self):
+        """Cancel every update loop, e.g. on shutdown"""
+        for session_id in list(self._loops):
+            self.stop(session_id)
+
+    def _forget(self, session_id: str, task: asyncio.Task):
+        """Drop a loop whose task ended on its own (e.g. after an error)"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Update loop for %s crashed", session_id, exc_info=task.exception())
+        loop = self._loops.get(session_id)
+        if loop is not None and loop.task is task:
+            del self._loops[session_id]
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Status of all live loops"""
+        return [loop.describe() for loop in self._loops.values()]
+
+# Global client loop manager
+client_loops = ClientLoopManager()
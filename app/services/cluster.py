@@ -0,0 +1,268 @@
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from http.cookies import SimpleCookie
+from typing import Dict, List, Optional
+import uvicorn
+from app.config import settings
+from app.services.backend import RespError, RespServer, StateBackend, create_backend, state_backend
+from app.services.session_registry import SessionRegistry, session_registry
+
+logger = logging.getLogger(__name__)
+
+WORKER_COOKIE = "temple_worker"
+WORKER_PREFIX = "worker:"
+SESSION_PREFIX = "session:"
+WATCH_PATH = "/watch/"  # Spectator pages must load on the worker running the watched game
+
+# Headers that describe a single hop and must not be forwarded
+HOP_HEADERS = {
+    b"connection", b"keep-alive", b"proxy-authenticate", b"proxy-authorization",
+    b"te", b"trailer", b"transfer-encoding", b"upgrade", b"host",
+}
+
+class WorkerHeartbeat:
+    """Publishes this worker's load and session metadata to the state backend"""
+
+    def __init__(self, registry: SessionRegistry, backend: StateBackend,
+                 worker_id: Optional[str] = None, interval: Optional[float] = None):
+        self.registry = registry
+        self.backend = backend
+        self.worker_id = worker_id or settings.worker_id
+        self.interval = interval or settings.heartbeat_interval
+        self.started = time.time()
+
+    async def beat(self):
+        """Write the worker record and a short-lived key per live session"""
+        ttl = self.interval * 3  # Survive a missed beat, expire soon after a crash
+        items = {
+            WORKER_PREFIX + self.worker_id: json.dumps({
+                "worker": self.worker_id,
+                "pid": os.getpid(),
+                "port": settings.port,
+                "sessions": len(self.registry),
+                "started": round(self.started),
+            })
+        }
+        for session in self.registry:
+            items[SESSION_PREFIX + session.player] = json.dumps({"worker": self.worker_id, "created": round(session.created)})
+        await self.backend.set_many(items, ttl)
+
+    async def run(self):
+        """Beat until cancelled"""
+        while True:
+            try:
+                await self.beat()
+            except (OSError, EOFError, RespError):
+                logger.exception("Worker heartbeat failed")
+            await asyncio.sleep(self.interval)
+
+async def cluster_status(backend: StateBackend) -> dict:
+    """Workers and player counts as last reported through the backend"""
+    workers = [json.loads(value) for value in (await backend.scan(WORKER_PREFIX)).values()]
+    workers.sort(key=lambda worker: worker["worker"])
+    return {"workers": workers, "sessions": sum(worker["sessions"] for worker in workers)}
+
+class StickyRouter:
+    """ASGI reverse proxy that pins each browser to one worker.
+
+    A new browser is sent to the least-loaded worker and gets a cookie
+    naming it; page loads, API calls and the NiceGUI websocket then all
+    reach the worker that holds its session.
+
+    For development only: every request and websocket frame goes through
+    this one Python process, which caps the cluster's throughput. Production
+    deployments put the workers behind a sticky external load balancer.
+    """
+
+    def __init__(self, upstreams: List[str], backend: StateBackend):
+        self.upstreams = upstreams  # host:port of each worker, indexed by worker id
+        self.backend = backend
+        self.loads = [0] * len(upstreams)  # Sessions per worker, from heartbeats plus recent assignments
+        # Only the router proxies; workers skip importing the HTTP client at startup
+        import httpx
+        self.http = httpx.AsyncClient(timeout=30.0)
+
+    def pick(self, headers: Dict[bytes, bytes]) -> tuple:
+        """Worker index for a request and whether it was newly assigned"""
+        cookie = SimpleCookie(headers.get(b"cookie", b"").decode("latin-1"))
+        if WORKER_COOKIE in cookie:
+            try:
+                worker = int(cookie[WORKER_COOKIE].value)
+                if 0 <= worker < len(self.upstreams):
+                    return worker, False
+            except ValueError:
+                pass
+        worker = min(range(len(self.upstreams)), key=self.loads.__getitem__)
+        self.loads[worker] += 1
+        return worker, True
+
+    async def session_worker(self, player: str) -> Optional[int]:
+        """Worker running a player's session, from its heartbeat key"""
+        key = SESSION_PREFIX + player
+        try:
+            value = await self.backend.get(key)
+        except (OSError, EOFError, RespError):
+            logger.exception("Could not look up the worker for %s", player)
+            return None
+        if value is None:
+            return None
+        worker = int(json.loads(value)["worker"])
+        return worker if 0 <= worker < len(self.upstreams) else None
+
+    async def refresh_loads(self):
+        """Track worker loads from their heartbeats"""
+        while True:
+            try:
+                for worker in (await cluster_status(self.backend))["workers"]:
+                    index = int(worker["worker"])
+                    if 0 <= index < len(self.loads):
+                        self.loads[index] = worker["sessions"]
+            except (OSError, EOFError, RespError, ValueError):
+                logger.exception("Could not read worker loads")
+            await asyncio.sleep(settings.heartbeat_interval)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return
+        headers = dict(scope["headers"])
+        worker = None
+        if scope["path"].startswith(WATCH_PATH):
+            worker = await self.session_worker(scope["path"][len(WATCH_PATH):])
+        if worker is not None:
+            assigned = True  # Re-pin the browser so the page's websocket follows
+        else:
+            worker, assigned = self.pick(headers)
+        if scope["type"] == "websocket":
+            await self.proxy_websocket(scope, receive, send, worker)
+        else:
+            await self.proxy_http(scope, receive, send, worker, assigned)
+
+    def forwarded_headers(self, scope) -> list:
+        headers = [(name, value) for name, value in scope["headers"] if name.lower() not in HOP_HEADERS]
+        client = scope.get("client")
+        if client:
+            headers.append((b"x-forwarded-for", client[0].encode()))
+        host = dict(scope["headers"]).get(b"host")
+        if host:
+            headers.append((b"x-forwarded-host", host))
+        return headers
+
+    async def proxy_http(self, scope, receive, send, worker: int, assigned: bool):
+        import httpx
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        url = f"http://{self.upstreams[worker]}{raw_path(scope)}"
+        if scope["query_string"]:
+            url += "?" + scope["query_string"].decode()
+        request = self.http.build_request(scope["method"], url, headers=self.forwarded_headers(scope), content=body)
+        try:
+            response = await self.http.send(request, stream=True)
+        except httpx.TransportError:
+            await send({"type": "http.response.start", "status": 502, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"Worker unavailable"})
+            return
+        try:
+            headers = [(name, value) for name, value in response.headers.raw if name.lower() not in HOP_HEADERS]
+            if assigned:
+                headers.append((b"set-cookie", f"{WORKER_COOKIE}={worker}; Path=/; HttpOnly; SameSite=Lax".encode()))
+            await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
+
+    async def proxy_websocket(self, scope, receive, send, worker: int):
+        import websockets
+        await receive()  # websocket.connect
+        url = f"ws://{self.upstreams[worker]}{raw_path(scope)}"
+        if scope["query_string"]:
+            url += "?" + scope["query_string"].decode()
+        headers = [(name.decode(), value.decode()) for name, value in self.forwarded_headers(scope)
+                   if not name.startswith(b"sec-websocket")]
+        try:
+            upstream = await websockets.connect(url, additional_headers=headers,
+                                                subprotocols=scope.get("subprotocols") or None,
+                                                max_size=None, compression=None)
+        except (OSError, websockets.WebSocketException):
+            await send({"type": "websocket.close", "code": 1011})
+            return
+        await send({"type": "websocket.accept", "subprotocol": upstream.subprotocol})
+
+        async def client_to_worker():
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                await upstream.send(message["text"] if message.get("text") is not None else message["bytes"])
+
+        async def worker_to_client():
+            async for message in upstream:
+                key = "text" if isinstance(message, str) else "bytes"
+                await send({"type": "websocket.send", key: message})
+            await send({"type": "websocket.close", "code": 1000})
+
+        tasks = [asyncio.create_task(client_to_worker()), asyncio.create_task(worker_to_client())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await upstream.close()
+
+def raw_path(scope) -> str:
+    """Request path as sent by the client, without decoding"""
+    return (scope.get("raw_path") or scope["path"].encode()).decode("latin-1")
+
+def run_cluster(workers: int, host: str, port: int):
+    """Run workers on consecutive ports behind a sticky router on host:port"""
+    logger.warning("WORKERS=%d: the built-in sticky router is meant for development; it proxies all "
+                   "traffic through one process. Use a sticky load balancer in production.", workers)
+    asyncio.run(serve_cluster(workers, host, port))
+
+async def serve_cluster(workers: int, host: str, port: int):
+    backend_url = settings.state_backend
+    stand_in = None
+    if backend_url == "memory":
+        # Workers need one shared backend; host a stand-in in the router process
+        stand_in = RespServer()
+        backend_url = f"redis://127.0.0.1:{await stand_in.start()}/0"
+    processes = [
+        subprocess.Popen([sys.executable, "main.py"], env={
+            **os.environ,
+            "WORKERS": "1",
+            "WORKER_ID": str(worker),
+            "HOST": "127.0.0.1",
+            "PORT": str(port + 1 + worker),
+            "STATE_BACKEND": backend_url,
+        })
+        for worker in range(workers)
+    ]
+    backend = create_backend(backend_url)
+    router = StickyRouter([f"127.0.0.1:{port + 1 + worker}" for worker in range(workers)], backend)
+    refresher = asyncio.create_task(router.refresh_loads())
+    server = uvicorn.Server(uvicorn.Config(router, host=host, port=port, lifespan="off", log_level="warning"))
+    try:
+        await server.serve()
+    finally:
+        refresher.cancel()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+        await router.http.aclose()
+        await backend.close()
+        if stand_in is not None:
+            await stand_in.stop()
+
+# Global heartbeat for this worker
+worker_heartbeat = WorkerHeartbeat(session_registry, state_backend)
@@ -0,0 +1,40 @@
+from typing import Optional, Tuple
+
+# Single-character action codes used on the wire
+ACTION_CODES = {
+    "j": "jump",
+    "s": "slide",
+    "g": "start",
+    "p": "pause",
+    "r": "resume",
+}
+CODES = {action: code for code, action in ACTION_CODES.items()}
+
+def encode_input(action: str, tick: Optional[int] = None) -> str:
+    """Encode an input as its action code followed by the base-36 target tick"""
+    code = CODES[action]
+    return code if tick is None else code + base36(tick)
+
+def decode_input(frame: str) -> Optional[Tuple[str, Optional[int]]]:
+    """Decode an input frame into (action, tick), or None if malformed"""
+    if not isinstance(frame, str) or not 0 < len(frame) <= 16:
+        return None
+    action = ACTION_CODES.get(frame[0])
+    if action is None:
+        return None
+    if len(frame) == 1:
+        return action, None
+    try:
+        return action, int(frame[1:], 36)
+    except ValueError:
+        return None
+
+def base36(value: int) -> str:
+    """Format a non-negative integer in base 36"""
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    encoded = ""
+    while True:
+        value, remainder = divmod(value, 36)
+        encoded = digits[remainder] + encoded
+        if value == 0:
+            return encoded
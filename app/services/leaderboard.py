@@ -0,0 +1,225 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+from app.config import settings
+from app.services.backend import RespError, StateBackend, state_backend
+
+logger = logging.getLogger(__name__)
+
+TOP_KEY = "leaderboard:top"  # Backend sorted set shared by all workers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    distance INTEGER NOT NULL,
+    coins INTEGER NOT NULL,
+    replay TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, created);
+"""
+
+class LeaderboardMetrics:
+    """Counters for the write-behind buffer"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.flushed = 0
+        self.dropped = 0  # Submissions lost because the buffer was full
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    def to_dict(self) -> dict:
+        """Metrics as a JSON-friendly dict"""
+        return {
+            "submitted": self.submitted,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+class Leaderboard:
+    """Persistent high scores on SQLite (WAL) with write-behind batching.
+
+    Game overs only append to an in-memory buffer and update the cached
+    top-N list, so they never wait on disk. A background loop writes the
+    buffer to SQLite in one transaction per batch, off the event loop.
+    Top scores are also shared through the state backend, so every worker
+    serves the same list.
+    """
+
+    def __init__(self, path: Optional[str] = None, size: Optional[int] = None,
+                 batch_size: Optional[int] = None, max_pending: Optional[int] = None,
+                 backend: Optional[StateBackend] = None):
+        self.backend = backend
+        self.path = path or settings.leaderboard_path
+        self.size = size or settings.leaderboard_size
+        self.batch_size = batch_size or settings.leaderboard_batch_size
+        self.max_pending = max_pending or settings.max_pending_scores
+        self.pending: Deque[tuple] = deque()
+        self.metrics = LeaderboardMetrics()
+        self.connection: Optional[sqlite3.Connection] = None
+        self._top: List[Tuple[int, int, dict]] = []  # (-score, order, entry), best first
+        self._order = 0  # Tie-break: earlier scores rank higher
+        self._response: Optional[bytes] = None
+        # Bumped whenever the top-N list changes; starts from the clock so
+        # ETags from before a restart never match
+        self.version = time.time_ns() // 1_000_000
+        self._flush_lock = asyncio.Lock()
+        self.published = False  # Whether the backend has seen the scores loaded at open
+
+    def open(self):
+        """Open (or create) the database and load the top-N cache"""
+        if self.connection is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")  # Durable enough with WAL, far fewer fsyncs
+        self.connection.executescript(SCHEMA)
+        rows = self.connection.execute(
+            "SELECT player, score, distance, coins, created FROM scores ORDER BY score DESC, created LIMIT ?",
+            (self.size,)
+        ).fetchall()
+        self._top = []
+        for player, score, distance, coins, created in rows:
+            self._cache(player, score, distance, coins, created)
+
+    def close(self):
+        """Write out anything still buffered and close the database"""
+        if self.connection is None:
+            return
+        self.write_batch(self.take_batch(len(self.pending)))
+        self.connection.close()
+        self.connection = None
+
+    def submit(self, player: str, score: int, distance: int, coins: int, replay: str = ""):
+        """Record a finished game without touching the disk"""
+        self.metrics.submitted += 1
+        if len(self.pending) >= self.max_pending:
+            self.pending.popleft()
+            self.metrics.dropped += 1
+        created = time.time()
+        self.pending.append((player, score, distance, coins, replay, created))
+        self._cache(player, score, distance, coins, created)
+
+    def floor(self) -> float:
+        """Score a new entry has to beat to make the top-N list"""
+        return -self._top[-1][0] if len(self._top) >= self.size else float("-inf")
+
+    def _cache(self, player: str, score: int, distance: int, coins: int, created: float):
+        """Insert into the top-N cache if the score ranks"""
+        if score <= self.floor():
+            return
+        self._order += 1
+        entry = entry_dict(player, score, distance, coins, created)
+        bisect.insort(self._top, (-score, self._order, entry))
+        del self._top[self.size:]
+        self.changed()
+
+    def changed(self):
+        """Invalidate the encoded response after the top-N list changed"""
+        self.version += 1
+        self._response = None
+
+    def top(self, limit: Optional[int] = None) -> List[dict]:
+        """Best scores, highest first"""
+        return [entry for _, _, entry in self._top[:limit or self.size]]
+
+    def best(self) -> int:
+        """All-time high score"""
+        return -self._top[0][0] if self._top else 0
+
+    def response(self) -> bytes:
+        """The full top-N list as JSON, encoded once per change"""
+        if self._response is None:
+            self._response = json.dumps({"version": self.version, "scores": self.top()}).encode()
+        return self._response
+
+    def take_batch(self, limit: int) -> List[tuple]:
+        """Remove up to limit buffered submissions"""
+        return [self.pending.popleft() for _ in range(min(limit, len(self.pending)))]
+
+    def write_batch(self, batch: List[tuple]):
+        """Insert submissions in a single transaction"""
+        if not batch or self.connection is None:
+            return
+        start = time.perf_counter()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO scores (player, score, distance, coins, replay, created) VALUES (?, ?, ?, ?, ?, ?)",
+                batch
+            )
+        self.metrics.flushes += 1
+        self.metrics.flushed += len(batch)
+        self.metrics.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    async def flush(self) -> int:
+        """Write buffered submissions in batches on a worker thread"""
+        written = 0
+        ranked = [] if self.published else self.top()  # Seed the backend with scores loaded from disk
+        async with self._flush_lock:
+            while self.pending and self.connection is not None:
+                batch = self.take_batch(self.batch_size)
+                try:
+                    await asyncio.to_thread(self.write_batch, batch)
+                except sqlite3.Error:
+                    logger.exception("Leaderboard flush failed; requeueing %d scores", len(batch))
+                    self.pending.extendleft(reversed(batch))
+                    break
+                written += len(batch)
+                floor = self.floor()
+                ranked.extend(
+                    entry_dict(player, score, distance, coins, created)
+                    for player, score, distance, coins, _, created in batch if score >= floor
+                )
+            if self.backend is not None:
+                await self.sync(ranked)
+        return written
+
+    async def sync(self, ranked: List[dict]):
+        """Publish newly ranked scores to the backend and adopt the shared top-N"""
+        try:
+            if ranked:
+                await self.backend.zadd(TOP_KEY, {json.dumps(entry): entry["score"] for entry in ranked})
+                await self.backend.ztrim(TOP_KEY, self.size)
+            shared = await self.backend.ztop(TOP_KEY, self.size)
+        except (OSError, EOFError, RespError):
+            logger.exception("Leaderboard backend sync failed")
+            return
+        self.published = True
+        entries = [json.loads(member) for member, _ in shared]
+        # Scores submitted here but not flushed yet are not in the shared
+        # list; keep them ranked until the next flush publishes them
+        entries.extend(entry_dict(player, score, distance, coins, created)
+                       for player, score, distance, coins, _, created in self.pending)
+        entries.sort(key=lambda entry: (-entry["score"], entry["created"]))
+        del entries[self.size:]
+        if entries and entries != self.top():
+            self._top = [(-entry["score"], order, entry) for order, entry in enumerate(entries)]
+            self._order = len(entries)
+            self.changed()
+
+    async def flush_loop(self):
+        """Periodically flush the write-behind buffer and sync with other workers"""
+        while True:
+            await asyncio.sleep(settings.leaderboard_flush_interval)
+            await self.flush()
+
+def entry_dict(player: str, score: int, distance: int, coins: int, created: float) -> dict:
+    """A leaderboard entry as served by the API"""
+    return {"player": player, "score": score, "distance": distance, "coins": coins, "created": round(created)}
+
+# Global leaderboard
+leaderboard = Leaderboard(backend=state_backend)
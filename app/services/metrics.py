@@ -0,0 +1,132 @@
+import bisect
+import gc
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds, from 10 us to 100 ms; the 60 Hz budget is 16.7 ms
+TIME_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.0167, 0.025, 0.05, 0.1,
+)
+
+# Upper bounds in bytes for allocation histograms
+BYTE_BUCKETS = (0, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus model"""
+
+    def __init__(self, buckets: Iterable[float] = TIME_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count of observations <= le) for every bucket and +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+class PhaseTimer:
+    """Times consecutive phases of a tick, one histogram per phase.
+
+    ``start()`` marks the beginning and each ``lap(phase)`` records the time
+    since the previous mark, so a tick costs one clock read per phase.
+    """
+
+    def __init__(self, phases: Iterable[str]):
+        self.histograms: Dict[str, Histogram] = {phase: Histogram() for phase in phases}
+        self.mark = 0.0
+
+    def start(self):
+        self.mark = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.histograms[phase].observe(now - self.mark)
+        self.mark = now
+
+    def observe(self, phase: str, seconds: float):
+        """Record a phase timed elsewhere"""
+        self.histograms[phase].observe(seconds)
+
+class GcMonitor:
+    """Times garbage collector pauses through gc.callbacks, one histogram per generation"""
+
+    def __init__(self):
+        self.pauses: Dict[str, Histogram] = {str(generation): Histogram() for generation in range(3)}
+        self.collected = 0
+        self.longest = 0.0
+        self.installed = False
+        self._start = 0.0
+
+    def install(self):
+        if not self.installed:
+            gc.callbacks.append(self._callback)
+            self.installed = True
+
+    def _callback(self, phase: str, info: dict):
+        if phase == "start":
+            self._start = time.perf_counter()
+        else:
+            pause = time.perf_counter() - self._start
+            self.pauses[str(info["generation"])].observe(pause)
+            self.longest = max(self.longest, pause)
+            self.collected += info["collected"]
+
+class MetricsWriter:
+    """Builds a Prometheus text exposition"""
+
+    def __init__(self, prefix: str = "temple_"):
+        self.prefix = prefix
+        self.lines: List[str] = []
+
+    def header(self, name: str, kind: str, help_text: str) -> str:
+        name = self.prefix + name
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def gauge(self, name: str, value: float, help_text: str):
+        name = self.header(name, "gauge", help_text)
+        self.lines.append(f"{name} {value}")
+
+    def counter(self, name: str, value: float, help_text: str):
+        name = self.header(name + "_total", "counter", help_text)
+        self.lines.append(f"{name} {value}")
+
+    def labelled(self, name: str, kind: str, values: Dict[str, float], label: str, help_text: str):
+        """One series per label value"""
+        name = self.header(name, kind, help_text)
+        for key, value in values.items():
+            self.lines.append(f'{name}{{{label}="{key}"}} {value}')
+
+    def histograms(self, name: str, histograms: Dict[str, Histogram], label: Optional[str], help_text: str):
+        """Histograms sharing a name, told apart by label (or a single one when label is None)"""
+        name = self.header(name, "histogram", help_text)
+        for key, histogram in histograms.items():
+            labels = f'{label}="{key}",' if label else ""
+            for bound, count in histogram.cumulative():
+                self.lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {count}')
+            suffix = f"{{{labels[:-1]}}}" if labels else ""
+            self.lines.append(f"{name}_sum{suffix} {histogram.sum}")
+            self.lines.append(f"{name}_count{suffix} {histogram.count}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+# Per-frame costs of sending state to clients, recorded by the update loops
+frame_timer = PhaseTimer(("serialization", "ui_push"))
+
+# Global garbage collector pause monitor
+gc_monitor = GcMonitor()
@@ -0,0 +1,147 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+from app.config import settings
+from app.services.metrics import BYTE_BUCKETS, Histogram
+
+class SamplingProfiler:
+    """Statistical profiler for the event loop thread.
+
+    A background thread reads the loop thread's current stack every few
+    milliseconds and counts identical stacks. Nothing is hooked into the
+    profiled code, so the cost is one stack walk per sample and it can be
+    left running against production traffic for a while.
+    """
+
+    def __init__(self, interval_ms: Optional[float] = None, max_depth: int = 64):
+        self.interval = (interval_ms or settings.profiler_interval_ms) / 1000
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()  # Folded stack, root first -> samples
+        self.started = 0.0
+        self.stopped = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id: Optional[int] = None):
+        """Start sampling a thread (by default the calling one), discarding earlier samples"""
+        if self.running:
+            return
+        target = thread_id or threading.get_ident()
+        self.samples.clear()
+        self.started = time.time()
+        self.stopped = 0.0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, args=(target,), name="sampling profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.stopped = time.time()
+
+    def _sample(self, thread_id: int):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """Samples in folded-stack format, for flamegraph.pl or speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def top(self, limit: int = 20) -> List[Dict[str, object]]:
+        """Functions by share of samples they were running in (self time)"""
+        total = sum(self.samples.values()) or 1
+        leaves: Counter = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [
+            {"function": function, "samples": count, "percent": round(count / total * 100, 1)}
+            for function, count in leaves.most_common(limit)
+        ]
+
+    def describe(self) -> Dict[str, object]:
+        """Profiler status and the hottest functions for the debug endpoint"""
+        end = self.stopped or time.time()
+        return {
+            "enabled": settings.profiler_enabled,
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "duration_s": round(end - self.started, 1) if self.started else 0.0,
+            "samples": sum(self.samples.values()),
+            "top": self.top(),
+        }
+
+class AllocationTracer:
+    """Allocations made by each scheduler tick, measured with tracemalloc.
+
+    Records the memory every tick allocated on top of what was already in
+    use (its peak, so short-lived objects count) and the blocks it left
+    allocated. tracemalloc slows every allocation down while it runs, so
+    this is a diagnostic mode rather than something to leave on.
+    """
+
+    def __init__(self):
+        self.bytes = Histogram(BYTE_BUCKETS)
+        self.net_blocks = 0
+        self._before = 0
+        self._blocks = 0
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Start tracing, discarding earlier measurements"""
+        if self.running:
+            return
+        self.bytes = Histogram(BYTE_BUCKETS)
+        self.net_blocks = 0
+        tracemalloc.start()
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def begin(self):
+        """Mark the start of a tick"""
+        tracemalloc.reset_peak()
+        self._before = tracemalloc.get_traced_memory()[0]
+        self._blocks = sys.getallocatedblocks()
+
+    def end(self):
+        """Record the tick started by begin()"""
+        self.bytes.observe(tracemalloc.get_traced_memory()[1] - self._before)
+        self.net_blocks += sys.getallocatedblocks() - self._blocks
+
+    def describe(self) -> Dict[str, object]:
+        """Per-tick allocation figures for the debug endpoint"""
+        ticks = self.bytes.count
+        return {
+            "enabled": settings.profiler_enabled,
+            "running": self.running,
+            "ticks": ticks,
+            "bytes_per_tick": round(self.bytes.sum / ticks) if ticks else 0,
+            "net_blocks_per_tick": round(self.net_blocks / ticks, 2) if ticks else 0.0,
+            "bytes_histogram": self.bytes.cumulative(),
+        }
+
+# Global profiler for the event loop thread
+profiler = SamplingProfiler()
+
+# Global per-tick allocation tracer, used by the tick scheduler while running
+allocation_tracer = AllocationTracer()
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Optional
+from models.game_models import GameState
+from app.config import settings
+from app.services.session_registry import ClientSession
+from app.services.tick_scheduler import TickScheduler, tick_scheduler
+
+# Game states with nothing moving; their clients need one frame and then none
+IDLE_STATES = (GameState.MENU.value, GameState.PAUSED.value, GameState.GAME_OVER.value)
+
+class RateController:
+    """Adapts how often clients get state frames to the server's load.
+
+    Every control interval it looks at how much of the tick budget the
+    scheduler used and whether the event loop kept waking it on time.
+    Overruns, dropped or late ticks or a busy scheduler halve the
+    broadcast rate; spare capacity raises it again step by step (AIMD), never
+    below min_update_rate. Hidden tabs get hidden_update_rate and sessions
+    sitting in the menu, paused or on the game-over screen get no frames once
+    the client has seen that state. Simulation keeps running at the full tick rate throughout.
+    """
+
+    def __init__(self, scheduler: TickScheduler, update_rate: Optional[float] = None,
+                 min_rate: Optional[float] = None, hidden_rate: Optional[float] = None,
+                 target_load: Optional[float] = None):
+        self.scheduler = scheduler
+        self.max_rate = update_rate or settings.ui_update_rate
+        self.min_rate = min(min_rate or settings.min_update_rate, self.max_rate)
+        self.hidden_rate = min(hidden_rate or settings.hidden_update_rate, self.min_rate)
+        self.target_load = target_load or settings.target_tick_load
+        self.rate = float(self.max_rate)  # Current rate for visible, playing clients
+        self.load = 0.0  # Share of the tick budget used over the last control interval
+        self.reductions = 0
+        self._last = (0, 0, 0, 0, 0.0)  # ticks, overruns, dropped, late, total tick time
+
+    def interval(self, session: ClientSession) -> Optional[float]:
+        """Seconds until the session's next frame, or None while it needs none"""
+        if session.engine.session.state.value in IDLE_STATES and session.sync.hud.get("state") in IDLE_STATES:
+            return None  # The client already shows the menu or pause screen
+        return 1 / (self.hidden_rate if session.hidden else self.rate)
+
+    def broadcast_interval(self) -> float:
+        """Seconds between frames for streams shared by many clients"""
+        return 1 / self.rate
+
+    def adjust(self):
+        """Update the rate from the scheduler's metrics since the last call"""
+        metrics = self.scheduler.metrics
+        ticks, overruns, dropped, late, busy = self._last
+        self._last = (metrics.ticks, metrics.overruns, metrics.dropped_ticks, metrics.late_ticks,
+                      metrics.total_tick_duration)
+        ticks = metrics.ticks - ticks
+        if ticks == 0:
+            return
+        self.load = (metrics.total_tick_duration - busy) / (ticks * self.scheduler.timestep)
+        overloaded = (metrics.overruns > overruns or metrics.dropped_ticks > dropped
+                      or (metrics.late_ticks - late) / ticks > settings.max_late_tick_ratio
+                      or self.load > self.target_load)
+        if overloaded:
+            if self.rate > self.min_rate:
+                self.reductions += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+        elif self.load < self.target_load / 2:
+            self.rate = min(self.max_rate, self.rate + 1)
+
+    async def run(self):
+        """Adjust the rate once per control interval"""
+        while True:
+            await asyncio.sleep(settings.rate_control_interval)
+            self.adjust()
+
+    def to_dict(self) -> dict:
+        """Controller state as a JSON-friendly dict"""
+        return {
+            "update_rate": round(self.rate, 2),
+            "min_update_rate": self.min_rate,
+            "hidden_update_rate": self.hidden_rate,
+            "tick_load": round(self.load, 3),
+            "reductions": self.reductions,
+        }
+
+# Global controller pacing every client update loop
+rate_controller = RateController(tick_scheduler)
@@ -0,0 +1,78 @@
+from typing import List, Optional, Tuple
+from models.game_models import GameSession, GameState
+from app.components.game_engine import GameEngine, INPUT_ACTIONS
+from app.services.input_protocol import ACTION_CODES, CODES, base36
+from app.config import settings
+
+REPLAY_VERSION = "r2"  # Bumped whenever the same inputs would play out differently
+
+class Replay:
+    """A game recorded as its seed and the inputs applied before each tick"""
+
+    def __init__(self, seed: int, ticks: int, inputs: List[Tuple[int, str]], tick_rate: Optional[int] = None):
+        self.seed = seed
+        self.ticks = ticks  # Simulated ticks in the game
+        self.inputs = inputs  # (game_tick, action) in the order they were applied
+        self.tick_rate = tick_rate or settings.tick_rate
+
+    @classmethod
+    def from_engine(cls, engine: GameEngine) -> "Replay":
+        """Replay of the engine's current (or last) game"""
+        return cls(engine.game_seed, engine.game_tick, list(engine.game_inputs))
+
+    def encode(self) -> str:
+        """Compact text form, e.g. ``r2.60.1x3k9a.2n4.j1c,s3f``.
+
+        Fields are the format version, tick rate, seed, game length in ticks
+        and the inputs, each an action code followed by the base-36 number of
+        ticks since the previous input.
+        """
+        previous = 0
+        inputs = []
+        for tick, action in self.inputs:
+            inputs.append(CODES[action] + base36(tick - previous))
+            previous = tick
+        return ".".join((REPLAY_VERSION, str(self.tick_rate), base36(self.seed), base36(self.ticks), ",".join(inputs)))
+
+    @classmethod
+    def decode(cls, text: str) -> "Replay":
+        """Parse an encoded replay, raising ValueError if it is malformed"""
+        fields = text.split(".")
+        if len(fields) != 5 or fields[0] != REPLAY_VERSION:
+            raise ValueError("Unsupported replay format")
+        tick_rate, seed, ticks = int(fields[1]), int(fields[2], 36), int(fields[3], 36)
+        if tick_rate != settings.tick_rate:
+            # The timestep changes how far each tick moves, so a replay is
+            # only scored at the rate the server itself plays at
+            raise ValueError(f"Replay tick rate must be {settings.tick_rate}")
+        if ticks > settings.max_replay_ticks:
+            raise ValueError("Replay out of range")
+        inputs = []
+        tick = 0
+        for item in filter(None, fields[4].split(",")):
+            action = ACTION_CODES.get(item[0])
+            if action is None or action == "start":
+                raise ValueError(f"Unknown replay input {item!r}")
+            tick += int(item[1:], 36)
+            inputs.append((tick, action))
+        return cls(seed, ticks, inputs, tick_rate)
+
+def run_replay(replay: Replay) -> GameSession:
+    """Re-simulate a replay headlessly, as fast as possible"""
+    engine = GameEngine()
+    engine.start_game(seed=replay.seed)
+    dt = 1 / settings.tick_rate
+    inputs = replay.inputs
+    applied = 0
+    while engine.game_tick < replay.ticks and engine.session.state != GameState.GAME_OVER:
+        while applied < len(inputs) and inputs[applied][0] <= engine.game_tick:
+            getattr(engine, INPUT_ACTIONS[inputs[applied][1]])()
+            applied += 1
+        if engine.session.state != GameState.PLAYING:
+            break  # Paused and never resumed
+        engine.step(dt)
+    return engine.session
+
+def replay_score(text: str) -> int:
+    """Score a game actually earns when its encoded replay is re-simulated"""
+    return run_replay(Replay.decode(text)).score
@@ -0,0 +1,371 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import secrets
+import sqlite3
+import struct
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+from models.game_models import GameSession, GameState, Player, PlayerAction
+from app.components.entity_store import EntityStore
+from app.components.game_engine import COIN_HEIGHTS, OBSTACLE_TYPES, GameEngine
+from app.components.track import Track
+from app.services.input_protocol import ACTION_CODES, CODES
+from app.services.session_registry import ClientSession, SessionRegistry, session_registry
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RESUME_COOKIE = "temple_resume"  # Long-lived browser cookie naming the session's snapshot
+RESUME_KEY = re.compile(r"[0-9a-f]{32}")
+
+MAGIC = b"TRSS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sB")
+# Game session, player, engine counters and track position, then the
+# lengths of the variable parts: obstacles, coins, recorded inputs and name
+FIELDS = struct.Struct("<BqqqdqddddddBdqqqQIdIIIIIB")
+
+GAME_STATES = tuple(GameState)
+PLAYER_ACTIONS = tuple(PlayerAction)
+
+# Entity columns saved per kind; the others are zero for that kind
+OBSTACLE_COLUMNS = ("ids", "x", "y", "width", "height", "kind", "speed")
+COIN_COLUMNS = ("ids", "x", "y", "width", "height", "spin", "collected")
+TYPECODES = {name: getattr(EntityStore(), name).typecode for name in EntityStore.__slots__}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    saved REAL NOT NULL,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+def encode_session(player: str, engine: GameEngine) -> bytes:
+    """Pack a session into the snapshot format.
+
+    Everything needed to carry on exactly where the game was: the session
+    and player, the engine's tick counters, the entity columns as raw
+    bytes and the recorded inputs, so replays of a resumed game still
+    verify. The track RNG is not saved; it is rebuilt from the game seed
+    and the number of chunks streamed. Entity columns are in native byte
+    order.
+    """
+    session = engine.session
+    body = session.player
+    track = engine.track
+    name = player.encode()[:255]
+    inputs = engine.game_inputs
+    parts = [
+        HEADER.pack(MAGIC, FORMAT_VERSION),
+        FIELDS.pack(
+            GAME_STATES.index(session.state), session.score, session.distance, session.coins_collected,
+            session.speed, session.high_score, session.last_update, session.game_time,
+            body.x, body.y, body.width, body.height, PLAYER_ACTIONS.index(body.action), body.action_timer,
+            engine.tick, engine.game_tick, engine.next_entity_id, engine.game_seed,
+            track.chunks(), track.distance, track.next_obstacle, track.next_coin,
+            len(engine.obstacles), len(engine.coins), len(inputs), len(name),
+        ),
+        name,
+        struct.pack(f"<{len(inputs)}I", *(tick for tick, _ in inputs)),
+        "".join(CODES[action] for _, action in inputs).encode(),
+    ]
+    for store, columns in ((engine.obstacles, OBSTACLE_COLUMNS), (engine.coins, COIN_COLUMNS)):
+        parts.extend(getattr(store, column).tobytes() for column in columns)
+    return b"".join(parts)
+
+def decode_session(data: bytes, engine: GameEngine) -> str:
+    """Load a snapshot into a fresh engine and return the player name; ValueError if it is unreadable"""
+    try:
+        magic, version = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a version {FORMAT_VERSION} session snapshot")
+        (state, score, distance, coins_collected, speed, high_score, last_update, game_time,
+         x, y, width, height, action, action_timer, tick, game_tick, next_entity_id, game_seed,
+         chunks, track_distance, next_obstacle, next_coin,
+         obstacles, coins, inputs, name_length) = FIELDS.unpack_from(data, HEADER.size)
+        offset = HEADER.size + FIELDS.size
+        player = data[offset:offset + name_length].decode()
+        offset += name_length
+        ticks = struct.unpack_from(f"<{inputs}I", data, offset)
+        offset += 4 * inputs
+        actions = data[offset:offset + inputs].decode()
+        offset += inputs
+        obstacle_columns, offset = read_columns(OBSTACLE_COLUMNS, obstacles, data, offset)
+        coin_columns, offset = read_columns(COIN_COLUMNS, coins, data, offset)
+        if offset != len(data):
+            raise ValueError("Session snapshot has the wrong length")
+        game_inputs = [(input_tick, ACTION_CODES[code]) for input_tick, code in zip(ticks, actions)]
+        session = GameSession(
+            state=GAME_STATES[state], score=score, distance=distance, coins_collected=coins_collected,
+            speed=speed, high_score=high_score, last_update=last_update, game_time=game_time,
+            player=Player(x=x, y=y, width=width, height=height,
+                          action=PLAYER_ACTIONS[action], action_timer=action_timer),
+        )
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        raise ValueError(f"Corrupt session snapshot: {e}") from e
+
+    # Only touch the engine once the whole snapshot has been read
+    engine.session = session
+    fill_store(engine.obstacles, obstacle_columns, obstacles)
+    fill_store(engine.coins, coin_columns, coins)
+    engine.tick = tick
+    engine.game_tick = game_tick
+    engine.next_entity_id = next_entity_id
+    engine.game_inputs = game_inputs
+    engine.inputs.clear()
+    engine.near_obstacles.clear()
+    engine.near_coins.clear()
+    engine.game_seed = game_seed
+    engine.game_rng = random.Random(game_seed)
+    engine.track = Track(engine.game_rng, len(OBSTACLE_TYPES), COIN_HEIGHTS)
+    engine.track.seek(chunks, track_distance, next_obstacle, next_coin)
+    return player
+
+def read_columns(columns: Tuple[str, ...], count: int, data: bytes, offset: int) -> Tuple[Dict[str, array], int]:
+    """Saved entity columns by name, and the offset after them"""
+    saved = {}
+    for name in columns:
+        column = array(TYPECODES[name])
+        size = count * column.itemsize
+        if offset + size > len(data):
+            raise ValueError("Session snapshot is truncated")
+        column.frombytes(data[offset:offset + size])
+        saved[name] = column
+        offset += size
+    return saved, offset
+
+def fill_store(store, saved: Dict[str, array], count: int):
+    """Replace a store's entities with count saved ones"""
+    store.clear()
+    if isinstance(store, EntityStore):
+        # Append whole columns; the ones not saved for this kind are zeros
+        for name in EntityStore.__slots__:
+            column = getattr(store, name)
+            if name in saved:
+                column.extend(saved[name])
+            else:
+                column.frombytes(bytes(count * column.itemsize))
+        return
+    # Batch mode stores are views of shared tables: add row by row
+    kind, speed = saved.get("kind"), saved.get("speed")
+    for i in range(count):
+        store.add(saved["ids"][i], saved["x"][i], saved["y"][i], saved["width"][i], saved["height"][i],
+                  kind[i] if kind else 0, speed[i] if speed else 0.0)
+        if "spin" in saved:
+            store.spin[i] = saved["spin"][i]
+            store.collected[i] = saved["collected"][i]
+
+def new_resume_key() -> str:
+    """A fresh resume cookie value"""
+    return secrets.token_hex(16)
+
+def valid_resume_key(key: Optional[str]) -> bool:
+    """Whether a cookie value looks like a resume key we handed out"""
+    return key is not None and RESUME_KEY.fullmatch(key) is not None
+
+class ArchiveMetrics:
+    """Counters for session snapshots"""
+
+    def __init__(self):
+        self.saved = 0  # Snapshots encoded
+        self.bytes_saved = 0
+        self.written = 0  # Snapshots written to disk
+        self.restored = 0
+        self.misses = 0  # Returning browsers without a snapshot
+        self.failed = 0  # Snapshots that could not be read
+        self.handovers = 0  # Keys taken over from a live session, e.g. on a page reload
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    def to_dict(self) -> dict:
+        """Metrics as a JSON-friendly dict"""
+        return {
+            "saved": self.saved,
+            "bytes_saved": self.bytes_saved,
+            "written": self.written,
+            "restored": self.restored,
+            "misses": self.misses,
+            "failed": self.failed,
+            "handovers": self.handovers,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+class SessionArchive:
+    """Binary session snapshots in SQLite, for picking up games after a restart.
+
+    The machine is stopped whenever it sits idle, so sessions have to
+    outlive the process. Every archive interval, sessions whose game moved
+    on since their last snapshot are encoded and written in one
+    transaction off the event loop; on shutdown and when a session ends,
+    it is saved straight away. Nothing is loaded at startup: a snapshot is
+    read only when its browser comes back, found by the resume cookie.
+    """
+
+    def __init__(self, path: Optional[str] = None, registry: Optional[SessionRegistry] = None):
+        self.path = path or settings.session_archive_path
+        self.registry = registry if registry is not None else session_registry
+        self.pending: Dict[str, Tuple[float, bytes]] = {}  # key -> (saved at, snapshot) not yet on disk
+        self.fingerprints: Dict[str, tuple] = {}  # key -> state of the live session when last saved
+        self.metrics = ArchiveMetrics()
+        self.connection: Optional[sqlite3.Connection] = None
+        self._flush_lock = asyncio.Lock()
+
+    def open(self):
+        """Open (or create) the database"""
+        if self.connection is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def purge(self) -> int:
+        """Drop expired snapshots; return how many"""
+        with self.connection:
+            return self.connection.execute("DELETE FROM sessions WHERE saved < ?",
+                                           (time.time() - settings.session_archive_ttl,)).rowcount
+
+    def close(self):
+        """Save every live session and close the database"""
+        if self.connection is None:
+            return
+        self.collect()
+        self.write_batch(self.take_batch())
+        self.connection.close()
+        self.connection = None
+
+    @staticmethod
+    def fingerprint(session: ClientSession) -> tuple:
+        """What a snapshot would change with; ticks in the menu or paused don't count"""
+        game = session.engine.session
+        return game.state, session.engine.game_tick, game.high_score, session.player
+
+    def save(self, session: ClientSession):
+        """Encode a session's snapshot for the next write"""
+        if session.resume_key is None:
+            return
+        snapshot = encode_session(session.player, session.engine)
+        self.pending[session.resume_key] = (time.time(), snapshot)
+        self.fingerprints[session.resume_key] = self.fingerprint(session)
+        self.metrics.saved += 1
+        self.metrics.bytes_saved += len(snapshot)
+
+    def retire(self, session: ClientSession):
+        """Save a session that is being removed and stop tracking it"""
+        self.save(session)
+        if session.resume_key is not None:
+            self.fingerprints.pop(session.resume_key, None)
+
+    def collect(self) -> int:
+        """Save the live sessions that changed since their last snapshot"""
+        changed = [
+            session for session in self.registry
+            if session.resume_key is not None
+            and self.fingerprints.get(session.resume_key) != self.fingerprint(session)
+        ]
+        for session in changed:
+            self.save(session)
+        return len(changed)
+
+    def take_batch(self) -> List[tuple]:
+        """Remove every pending snapshot as (key, saved, data) rows"""
+        batch = [(key, saved, data) for key, (saved, data) in self.pending.items()]
+        self.pending.clear()
+        return batch
+
+    def write_batch(self, batch: List[tuple]):
+        """Upsert snapshots in a single transaction"""
+        if not batch or self.connection is None:
+            return
+        start = time.perf_counter()
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO sessions (key, saved, data) VALUES (?, ?, ?)", batch)
+        self.metrics.flushes += 1
+        self.metrics.written += len(batch)
+        self.metrics.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    async def flush(self) -> int:
+        """Save changed sessions and write pending snapshots on a worker thread"""
+        async with self._flush_lock:
+            self.collect()
+            batch = self.take_batch()
+            try:
+                await asyncio.to_thread(self.write_batch, batch)
+            except sqlite3.Error:
+                logger.exception("Session archive flush failed; keeping %d snapshots", len(batch))
+                for key, saved, data in batch:
+                    self.pending.setdefault(key, (saved, data))  # Unless a newer one came in meanwhile
+                return 0
+            return len(batch)
+
+    async def flush_loop(self):
+        """Periodically write sessions that changed"""
+        # Expired snapshots are dropped here rather than in open() so that a
+        # large archive doesn't hold up startup
+        try:
+            await asyncio.to_thread(self.purge)
+        except sqlite3.Error:
+            logger.exception("Could not drop expired session snapshots")
+        while True:
+            await asyncio.sleep(settings.session_archive_interval)
+            await self.flush()
+
+    def load(self, key: str) -> Optional[bytes]:
+        """The latest snapshot for a resume key"""
+        if key in self.pending:
+            return self.pending[key][1]
+        if self.connection is None:
+            return None
+        row = self.connection.execute("SELECT data FROM sessions WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def resume(self, session: ClientSession, key: str) -> bool:
+        """Tie a new session to a resume key and restore its snapshot, if there is one.
+
+        After a reload NiceGUI keeps the old page's session alive for a few
+        seconds, and a second tab shares the cookie; either way a live
+        session may still hold the key. It is saved first, so the newest
+        state is restored, and then let go of the key, so that only one live
+        session ever writes a key's snapshot.
+        """
+        holder = self.registry.find_resume_key(key)
+        if holder is not None and holder is not session:
+            self.save(holder)
+            holder.resume_key = None
+            self.metrics.handovers += 1
+        session.resume_key = key
+        data = self.load(key)
+        if data is None:
+            self.metrics.misses += 1
+            return False
+        try:
+            player = decode_session(data, session.engine)
+        except ValueError:
+            logger.warning("Discarding unreadable session snapshot for %s", session.player, exc_info=True)
+            self.metrics.failed += 1
+            return False
+        # Player names must stay unique among live sessions: the handed-over
+        # session gives its name up, anyone else keeps theirs
+        namesake = self.registry.find_player(player)
+        if namesake is None or namesake is session:
+            session.player = player
+        elif namesake is holder:
+            holder.player = self.registry.unique_player_name()
+            session.player = player
+        # Let the player find their feet before the track moves again
+        session.engine.pause_game()
+        self.fingerprints[key] = self.fingerprint(session)
+        self.metrics.restored += 1
+        return True
+
+# Global session archive
+session_archive = SessionArchive()
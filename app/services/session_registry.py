@@ -0,0 +1,165 @@
+import asyncio
+import secrets
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+from app.components.game_engine import GameEngine
+from app.components.entity_store import entity_pool
+from app.components.ui_components import GameUI
+from app.services.state_sync import StateEncoder
+from app.services.snapshots import Snapshot
+from app.services.leaderboard import leaderboard
+from app.services.replay import Replay
+from app.config import settings
+
+def create_engine() -> GameEngine:
+    """Create an engine for the configured engine mode"""
+    if settings.engine_mode == "batch":
+        from app.components.batch_engine import batch_physics
+        return batch_physics.create_engine()
+    return GameEngine()
+
+def release_engine(engine: GameEngine):
+    """Free whatever a session's engine holds outside the engine itself.
+
+    The engine gives up its stores first, so they are only reused once
+    nothing references them any more.
+    """
+    if settings.engine_mode == "batch":
+        from app.components.batch_engine import batch_physics
+        batch_physics.release(engine)
+    else:
+        for store in engine.detach_stores():
+            entity_pool.release(store)
+
+def new_player_name() -> str:
+    """A random public player name, e.g. Runner-1f3a9c0e"""
+    return f"Runner-{secrets.token_hex(4)}"
+
+class SessionLimitReached(Exception):
+    """Raised when the registry cannot hold another session"""
+
+class ClientSession:
+    """Game engine and UI bound to a single browser client"""
+
+    def __init__(self, session_id: str, player: Optional[str] = None):
+        self.session_id = session_id
+        self.player = player or new_player_name()  # Public name; the session id is a credential
+        self.engine = create_engine()
+        self.engine.on_game_over = self.record_score
+        self.ui = GameUI(self.engine, on_activity=self.touch)
+        self.sync = StateEncoder()
+        self.snapshot = Snapshot(self.engine)  # Served by GET /api/game/data
+        self.hidden = False  # The client's tab is in the background
+        self.resume_key: Optional[str] = None  # Names the session's snapshot in the session archive
+        self.client = None  # NiceGUI client showing the session, set by its page
+        self.created = time.monotonic()
+        self.last_active = self.created
+
+    def touch(self):
+        """Record player activity"""
+        self.last_active = time.monotonic()
+
+    def idle_for(self, now: float) -> float:
+        """Seconds since the last player activity"""
+        return now - self.last_active
+
+    def record_score(self, engine: GameEngine):
+        """Submit a finished game to the leaderboard"""
+        session = engine.session
+        leaderboard.submit(self.player, session.score, session.distance, session.coins_collected,
+                           Replay.from_engine(engine).encode())
+
+class SessionRegistry:
+    """Registry of per-client game sessions keyed by NiceGUI client id"""
+
+    def __init__(self, max_sessions: Optional[int] = None, idle_timeout: Optional[float] = None):
+        self.max_sessions = max_sessions if max_sessions is not None else settings.max_sessions
+        self.idle_timeout = idle_timeout if idle_timeout is not None else settings.session_idle_timeout
+        self._sessions: Dict[str, ClientSession] = {}
+        self._remove_handlers: List[Callable[[ClientSession], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __iter__(self) -> Iterator[ClientSession]:
+        return iter(list(self._sessions.values()))
+
+    def engines(self) -> List[GameEngine]:
+        """Engines of all registered sessions"""
+        return [session.engine for session in self._sessions.values()]
+
+    def create(self, session_id: str) -> ClientSession:
+        """Create a session for a newly connected client"""
+        if session_id in self._sessions:
+            return self._sessions[session_id]
+        if len(self._sessions) >= self.max_sessions:
+            self.evict_idle()
+        if len(self._sessions) >= self.max_sessions:
+            raise SessionLimitReached(f"Session limit of {self.max_sessions} reached")
+        session = ClientSession(session_id, self.unique_player_name())
+        self._sessions[session_id] = session
+        return session
+
+    def get(self, session_id: Optional[str]) -> Optional[ClientSession]:
+        """Look up a session by id"""
+        if session_id is None:
+            return None
+        return self._sessions.get(session_id)
+
+    def find_player(self, player: str) -> Optional[ClientSession]:
+        """Look up a session by its public player name"""
+        for session in self._sessions.values():
+            if session.player == player:
+                return session
+        return None
+
+    def unique_player_name(self) -> str:
+        """A player name no live session uses; /watch, /api/watch and the cluster key sessions by name"""
+        while True:
+            name = new_player_name()
+            if self.find_player(name) is None:
+                return name
+
+    def find_resume_key(self, key: str) -> Optional[ClientSession]:
+        """Look up the live session holding a resume key"""
+        for session in self._sessions.values():
+            if session.resume_key == key:
+                return session
+        return None
+
+    def on_remove(self, handler: Callable[[ClientSession], None]):
+        """Register a callback invoked whenever a session is dropped"""
+        self._remove_handlers.append(handler)
+
+    def remove(self, session_id: str) -> Optional[ClientSession]:
+        """Drop a session, e.g. when its client disconnects or it is evicted"""
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            for handler in self._remove_handlers:
+                handler(session)
+            # An evicted session's page is still open: its buttons must not
+            # reach the engine whose stores go back to the pool
+            session.ui.detach()
+            release_engine(session.engine)
+        return session
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Remove sessions without activity for longer than the idle timeout"""
+        now = time.monotonic() if now is None else now
+        stale = [
+            session.session_id
+            for session in self._sessions.values()
+            if session.idle_for(now) > self.idle_timeout
+        ]
+        for session_id in stale:
+            self.remove(session_id)
+        return len(stale)
+
+    async def sweep_loop(self):
+        """Periodically evict idle sessions"""
+        while True:
+            await asyncio.sleep(settings.session_sweep_interval)
+            self.evict_idle()
+
+# Global session registry
+session_registry = SessionRegistry()
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import secrets
+from typing import Optional
+from app.components.game_engine import GameEngine
+
+class Snapshot:
+    """An engine's game data serialized at most once per tick.
+
+    ``seq`` only advances when the serialized data changes, so it doubles as
+    the ETag and as the cursor long-polling clients pass back in ``after``.
+    """
+
+    def __init__(self, engine: GameEngine):
+        self.engine = engine
+        self.tag = secrets.token_hex(4)  # Keeps ETags of different sessions apart
+        self.tick = -1  # Engine tick the body was built on
+        self.seq = 0
+        self.body = b""
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.tag}-{self.seq}"'
+
+    def refresh(self) -> bool:
+        """Rebuild the body if the engine ticked since the last call; return whether it did"""
+        if self.engine.tick == self.tick:
+            return False
+        self.tick = self.engine.tick
+        body = json.dumps(self.engine.get_game_data(), ensure_ascii=False, separators=(",", ":")).encode()
+        if body != self.body:
+            self.body = body
+            self.seq += 1
+        return True
+
+class SnapshotMetrics:
+    """Counters for the game data endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.builds = 0  # Snapshots serialized; at most one per session per tick
+        self.not_modified = 0  # 304s for a matching If-None-Match or a long poll that timed out
+        self.long_polls = 0
+        self.waiting = 0  # Long polls blocked right now
+
+    def to_dict(self) -> dict:
+        """Metrics as a JSON-friendly dict"""
+        return {
+            "requests": self.requests,
+            "builds": self.builds,
+            "not_modified": self.not_modified,
+            "long_polls": self.long_polls,
+            "waiting": self.waiting,
+        }
+
+class SnapshotService:
+    """Serves cached game data snapshots and wakes long polls after every tick"""
+
+    def __init__(self):
+        self.metrics = SnapshotMetrics()
+        self._next_tick: Optional[asyncio.Future] = None  # Created only while someone waits
+
+    def current(self, snapshot: Snapshot) -> Snapshot:
+        """The snapshot, rebuilt first if the engine has ticked"""
+        self.metrics.requests += 1
+        if snapshot.refresh():
+            self.metrics.builds += 1
+        return snapshot
+
+    def notify(self):
+        """Called by the tick scheduler after each tick"""
+        if self._next_tick is not None:
+            if not self._next_tick.done():
+                self._next_tick.set_result(None)
+            self._next_tick = None
+
+    async def wait_newer(self, snapshot: Snapshot, after: int, timeout: float) -> bool:
+        """Block until the snapshot moves on from seq after; False if timeout came first"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        self.metrics.long_polls += 1
+        self.metrics.waiting += 1
+        try:
+            while snapshot.seq == after:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                if self._next_tick is None:
+                    self._next_tick = loop.create_future()
+                try:
+                    # Shielded so a timed-out poll doesn't cancel everyone else's wake-up
+                    await asyncio.wait_for(asyncio.shield(self._next_tick), remaining)
+                except asyncio.TimeoutError:
+                    return False
+                if snapshot.refresh():
+                    self.metrics.builds += 1
+            return True
+        finally:
+            self.metrics.waiting -= 1
+
+# Global snapshot service for the game data API
+snapshots = SnapshotService()
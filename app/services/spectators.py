@@ -0,0 +1,209 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from nicegui import core
+from app.services.session_registry import ClientSession
+from app.services.rate_controller import rate_controller
+from app.services.state_sync import StateEncoder
+from app.config import settings
+
+LIVE = "live"  # Gets every frame
+KEYFRAMES = "keyframes"  # Fell behind; gets keyframes only until it catches up
+
+class Viewer:
+    """One spectating browser client"""
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.mode = LIVE
+        self.joined = time.monotonic()
+
+    def sockets(self) -> List[tuple]:
+        """(sid, engine.io sid) of the client's socket.io connections"""
+        return list(core.sio.manager.get_participants("/", self.client.id))
+
+    def backlog(self) -> int:
+        """Packets queued on the client's websocket but not yet written"""
+        backlog = 0
+        for _, eio_sid in self.sockets():
+            socket = core.sio.eio.sockets.get(eio_sid)
+            if socket is not None:
+                backlog = max(backlog, socket.queue.qsize())
+        return backlog
+
+class Broadcast:
+    """Frame stream of one watched session, shared by all its viewers.
+
+    Each frame is encoded once and emitted to a socket.io room, which
+    serializes the packet once for every socket in it. Viewers that fall
+    behind move to a second room that only receives keyframes.
+    """
+
+    def __init__(self, session: ClientSession):
+        self.session = session
+        self.encoder = StateEncoder()
+        self.viewers: Dict[str, Viewer] = {}  # client id -> viewer
+        self.live_room = f"watch:{session.session_id}"
+        self.keyframe_room = f"watch:{session.session_id}:kf"
+        self.keyframe_due = False  # A viewer joined and needs a keyframe to start from
+
+    def room(self, mode: str) -> str:
+        return self.live_room if mode == LIVE else self.keyframe_room
+
+    def encode(self) -> Optional[str]:
+        """The next frame, or None if nothing changed"""
+        if self.keyframe_due:
+            self.encoder.frames_since_keyframe = self.encoder.keyframe_interval
+            self.keyframe_due = False
+        return self.encoder.encode(self.session.engine)
+
+    def is_keyframe(self) -> bool:
+        """Whether the frame just encoded was a keyframe"""
+        return self.encoder.frames_since_keyframe == 0
+
+class SpectatorMetrics:
+    """Counters for the spectator fan-out"""
+
+    def __init__(self):
+        self.frames = 0  # Frames encoded, once each regardless of viewers
+        self.deliveries = 0  # Frames addressed to viewers
+        self.downsampled = 0  # Times a viewer was moved to keyframes only
+        self.dropped = 0  # Viewers disconnected for falling too far behind
+        self.encode_time = 0.0
+        self.emit_time = 0.0
+
+    def to_dict(self) -> dict:
+        """Metrics as a JSON-friendly dict"""
+        return {
+            "frames": self.frames,
+            "deliveries": self.deliveries,
+            "downsampled": self.downsampled,
+            "dropped": self.dropped,
+            "encode_ms": round(self.encode_time * 1000, 3),
+            "emit_ms": round(self.emit_time * 1000, 3),
+        }
+
+class SpectatorHub:
+    """Streams live sessions to any number of watching clients"""
+
+    def __init__(self, max_viewers: Optional[int] = None,
+                 slow_backlog: Optional[int] = None, drop_backlog: Optional[int] = None):
+        self.max_viewers = max_viewers or settings.max_viewers_per_session
+        self.slow_backlog = slow_backlog or settings.max_pending_messages
+        self.drop_backlog = drop_backlog or settings.spectator_drop_backlog
+        self.broadcasts: Dict[str, Broadcast] = {}  # watched session id -> broadcast
+        self.watching: Dict[str, str] = {}  # viewer client id -> watched session id
+        self.metrics = SpectatorMetrics()
+
+    def __len__(self) -> int:
+        return len(self.watching)
+
+    def viewers(self, session_id: str) -> int:
+        """Number of clients watching a session"""
+        broadcast = self.broadcasts.get(session_id)
+        return len(broadcast.viewers) if broadcast else 0
+
+    def can_watch(self, session_id: str) -> bool:
+        return self.viewers(session_id) < self.max_viewers
+
+    async def watch(self, session: ClientSession, client: Any):
+        """Subscribe a connected client to a session's frames"""
+        self.unwatch(client.id)
+        broadcast = self.broadcasts.get(session.session_id)
+        if broadcast is None:
+            broadcast = self.broadcasts[session.session_id] = Broadcast(session)
+        viewer = Viewer(client)
+        broadcast.viewers[client.id] = viewer
+        self.watching[client.id] = session.session_id
+        broadcast.keyframe_due = True
+        for sid, _ in viewer.sockets():
+            await core.sio.enter_room(sid, broadcast.live_room)
+
+    def unwatch(self, client_id: str):
+        """Stop sending frames to a client; socket.io drops its rooms on disconnect"""
+        session_id = self.watching.pop(client_id, None)
+        broadcast = self.broadcasts.get(session_id)
+        if broadcast is None:
+            return
+        broadcast.viewers.pop(client_id, None)
+        if not broadcast.viewers:
+            del self.broadcasts[session_id]
+
+    def end(self, session: ClientSession):
+        """The watched player left; tell the viewers and close the broadcast"""
+        broadcast = self.broadcasts.pop(session.session_id, None)
+        if broadcast is None:
+            return
+        for client_id, viewer in broadcast.viewers.items():
+            self.watching.pop(client_id, None)
+            with viewer.client:
+                viewer.client.run_javascript('window.gameClient && window.gameClient.endWatch();')
+
+    async def throttle(self, broadcast: Broadcast):
+        """Downsample viewers whose sockets are backed up, restore ones that caught up, drop hopeless ones"""
+        for client_id, viewer in list(broadcast.viewers.items()):
+            backlog = viewer.backlog()
+            if backlog >= self.drop_backlog:
+                self.metrics.dropped += 1
+                self.unwatch(client_id)
+                for sid, _ in viewer.sockets():
+                    await core.sio.disconnect(sid)
+                continue
+            if viewer.mode == LIVE and backlog >= self.slow_backlog:
+                mode = KEYFRAMES
+                self.metrics.downsampled += 1
+            elif viewer.mode == KEYFRAMES and backlog == 0:
+                mode = LIVE  # Deltas resume applying at the next keyframe
+            else:
+                continue
+            for sid, _ in viewer.sockets():
+                await core.sio.leave_room(sid, broadcast.room(viewer.mode))
+                await core.sio.enter_room(sid, broadcast.room(mode))
+            viewer.mode = mode
+
+    async def publish(self, broadcast: Broadcast):
+        """Encode one frame and send the same packet to every viewer"""
+        await self.throttle(broadcast)
+        if not broadcast.viewers:
+            return
+        start = time.perf_counter()
+        frame = broadcast.encode()
+        if frame is None:
+            return
+        message = {"code": f"window.gameClient && window.gameClient.updateGameDisplay({frame});"}
+        self.metrics.frames += 1
+        self.metrics.encode_time += time.perf_counter() - start
+        start = time.perf_counter()
+        if broadcast.is_keyframe():
+            rooms = [broadcast.live_room, broadcast.keyframe_room]
+            self.metrics.deliveries += len(broadcast.viewers)
+        else:
+            rooms = broadcast.live_room
+            self.metrics.deliveries += sum(viewer.mode == LIVE for viewer in broadcast.viewers.values())
+        await core.sio.emit("run_javascript", message, room=rooms)
+        self.metrics.emit_time += time.perf_counter() - start
+
+    async def run(self):
+        """Publish every broadcast once per update interval, slowing down with the server's load"""
+        while True:
+            for broadcast in list(self.broadcasts.values()):
+                await self.publish(broadcast)
+            await asyncio.sleep(rate_controller.broadcast_interval())
+
+    def describe(self) -> Dict[str, Any]:
+        """Broadcast status for the debug endpoint"""
+        return {
+            "viewers": len(self.watching),
+            "broadcasts": [
+                {
+                    "player": broadcast.session.player,
+                    "viewers": len(broadcast.viewers),
+                    "keyframes_only": sum(viewer.mode == KEYFRAMES for viewer in broadcast.viewers.values()),
+                }
+                for broadcast in self.broadcasts.values()
+            ],
+            **self.metrics.to_dict(),
+        }
+
+# Global spectator hub
+spectators = SpectatorHub()
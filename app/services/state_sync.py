@@ -0,0 +1,124 @@
+import json
+from typing import Any, Dict, Optional
+from app.components.game_engine import GameEngine
+from app.config import settings
+
+class StateEncoder:
+    """Per-client encoder sending sequenced state deltas and periodic keyframes"""
+
+    def __init__(self, keyframe_interval: Optional[int] = None):
+        self.keyframe_interval = keyframe_interval or settings.keyframe_interval
+        self.reset()
+
+    def reset(self):
+        """Forget what the client has seen; the next frame is a keyframe"""
+        self.seq = 0
+        self.frames_since_keyframe = 0
+        self.hud: Dict[str, Any] = {}
+        self.obstacles: Dict[int, float] = {}  # id -> last sent x
+        self.coins: Dict[int, tuple] = {}  # id -> last sent (x, spin, collected)
+        # The previous frame's dicts, refilled by the next diff instead of reallocated
+        self.spare_obstacles: Dict[int, float] = {}
+        self.spare_coins: Dict[int, tuple] = {}
+
+    def encode(self, engine: GameEngine) -> Optional[str]:
+        """Encode the next frame as JSON, or None if nothing changed"""
+        if self.seq == 0 or self.frames_since_keyframe >= self.keyframe_interval:
+            frame = self.keyframe(engine)
+        else:
+            frame = self.delta(engine)
+            if frame is None:
+                return None
+        self.seq += 1
+        frame["seq"] = self.seq
+        frame["t"] = engine.tick
+        return json.dumps(frame, separators=(",", ":"))
+
+    def keyframe(self, engine: GameEngine) -> Dict[str, Any]:
+        """Full state; the client drops everything it had before"""
+        self.frames_since_keyframe = 0
+        self.hud = engine.get_hud()
+        obstacles = engine.obstacle_rows()
+        coins = engine.coin_rows()
+        self.obstacles.clear()
+        self.obstacles.update((row[0], row[1]) for row in obstacles)
+        self.coins.clear()
+        self.coins.update((row[0], (row[1], row[3], row[4])) for row in coins)
+        player = engine.session.player
+        return {
+            "kf": 1,
+            "hud": dict(self.hud),
+            "player": {"x": player.x, "y": player.y},
+            "obs": {"add": obstacles},
+            "coin": {"add": coins},
+        }
+
+    def delta(self, engine: GameEngine) -> Optional[Dict[str, Any]]:
+        """Changed HUD values plus spawned (add), despawned (rm) and moved (mv) entities"""
+        self.frames_since_keyframe += 1
+        frame: Dict[str, Any] = {}
+
+        hud = engine.get_hud()
+        changed = {key: value for key, value in hud.items() if self.hud.get(key) != value}
+        if changed:
+            self.hud = hud
+            frame["hud"] = changed
+
+        obstacles = self.diff_obstacles(engine)
+        if obstacles:
+            frame["obs"] = obstacles
+        coins = self.diff_coins(engine)
+        if coins:
+            frame["coin"] = coins
+        return frame or None
+
+    def diff_obstacles(self, engine: GameEngine) -> Dict[str, list]:
+        """Spawned, removed and moved obstacles, read straight from the entity columns"""
+        added, moved = [], []
+        previous_x = self.obstacles
+        seen = self.spare_obstacles
+        seen.clear()
+        store = engine.obstacles
+        for i, (entity_id, x) in enumerate(zip(store.ids, store.x)):
+            entity_id, x = int(entity_id), round(x, 1)
+            seen[entity_id] = x
+            previous = previous_x.get(entity_id)
+            if previous is None:
+                added.append(engine.obstacle_row(i))
+            elif previous != x:
+                moved.append((entity_id, x))
+        removed = [entity_id for entity_id in previous_x if entity_id not in seen]
+        self.obstacles, self.spare_obstacles = seen, previous_x
+        return self.patch(added, removed, moved)
+
+    def diff_coins(self, engine: GameEngine) -> Dict[str, list]:
+        """Spawned, removed and changed coins, read straight from the entity columns"""
+        added, moved = [], []
+        previous_states = self.coins
+        seen = self.spare_coins
+        seen.clear()
+        store = engine.coins
+        for i, (entity_id, x, spin, collected) in enumerate(zip(store.ids, store.x, store.spin, store.collected)):
+            entity_id = int(entity_id)
+            state = (round(x, 1), int(spin) % 360, bool(collected))
+            seen[entity_id] = state
+            previous = previous_states.get(entity_id)
+            if previous is None:
+                added.append(engine.coin_row(i))
+            elif previous != state:
+                moved.append((entity_id,) + state)
+        removed = [entity_id for entity_id in previous_states if entity_id not in seen]
+        self.coins, self.spare_coins = seen, previous_states
+        return self.patch(added, removed, moved)
+
+    @staticmethod
+    def patch(added: list, removed: list, moved: list) -> Dict[str, list]:
+        """Drop empty sections from an entity patch"""
+        patch = {}
+        if added:
+            patch["add"] = added
+        if removed:
+            patch["rm"] = removed
+        if moved:
+            patch["mv"] = moved
+        return patch
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from typing import Callable, List, Optional
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.metrics import Histogram, PhaseTimer
+from app.services.profiler import allocation_tracer
+from app.services.session_registry import session_registry
+
+# Engine phases timed every tick: inputs, player and spawning; entity motion;
+# collision tests; score, distance and speed updates
+ENGINE_PHASES = ("spawn", "movement", "collisions", "scoring")
+
+class TickMetrics:
+    """Counters describing how well the scheduler keeps up with its tick rate"""
+
+    def __init__(self):
+        self.ticks = 0
+        self.overruns = 0  # Ticks whose batch took longer than one timestep
+        self.dropped_ticks = 0  # Ticks skipped to avoid a catch-up spiral
+        self.late_ticks = 0  # Ticks run to catch up because the loop woke late
+        self.sessions_stepped = 0
+        self.last_tick_duration = 0.0
+        self.max_tick_duration = 0.0
+        self.total_tick_duration = 0.0
+        self.durations = Histogram()
+
+    def record(self, duration: float, sessions: int, timestep: float):
+        """Record one batch tick"""
+        self.ticks += 1
+        self.sessions_stepped += sessions
+        self.last_tick_duration = duration
+        self.total_tick_duration += duration
+        self.durations.observe(duration)
+        if duration > self.max_tick_duration:
+            self.max_tick_duration = duration
+        if duration > timestep:
+            self.overruns += 1
+
+    def to_dict(self) -> dict:
+        """Metrics as a JSON-friendly dict"""
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "dropped_ticks": self.dropped_ticks,
+            "late_ticks": self.late_ticks,
+            "sessions_stepped": self.sessions_stepped,
+            "last_tick_ms": round(self.last_tick_duration * 1000, 3),
+            "max_tick_ms": round(self.max_tick_duration * 1000, 3),
+            "avg_tick_ms": round(self.total_tick_duration / self.ticks * 1000, 3) if self.ticks else 0.0,
+        }
+
+class TickScheduler:
+    """Single fixed-timestep loop that steps every active session in one batch"""
+
+    def __init__(self, engines: Callable[[], List[GameEngine]],
+                 tick_rate: Optional[int] = None, max_catch_up: Optional[int] = None,
+                 step_batch: Optional[Callable[[List[GameEngine], float, PhaseTimer], None]] = None):
+        self.engines = engines
+        self.step_batch = step_batch  # Steps all engines at once instead of one by one
+        self.timestep = 1 / (tick_rate or settings.tick_rate)
+        self.max_catch_up = max_catch_up or settings.max_catch_up_ticks
+        self.metrics = TickMetrics()
+        self.phases = PhaseTimer(ENGINE_PHASES)
+        self.accumulator = 0.0
+        self.running = False
+        self._tick_handlers: List[Callable[[], None]] = []
+
+    def on_tick(self, handler: Callable[[], None]):
+        """Register a callback run after every tick"""
+        self._tick_handlers.append(handler)
+
+    def tick(self):
+        """Step every session once with the fixed timestep"""
+        tracing = allocation_tracer.running
+        if tracing:
+            allocation_tracer.begin()
+        start = time.perf_counter()
+        engines = self.engines()
+        self.phases.mark = start
+        if self.step_batch is not None:
+            self.step_batch(engines, self.timestep, self.phases)
+        else:
+            self.step_engines(engines)
+        self.metrics.record(time.perf_counter() - start, len(engines), self.timestep)
+        if tracing:
+            allocation_tracer.end()
+        for handler in self._tick_handlers:
+            handler()
+
+    def step_engines(self, engines: List[GameEngine]):
+        """Step every engine phase by phase, timing each phase once per tick.
+
+        Sessions are independent, so running one phase across all of them
+        before the next gives the same result as GameEngine.step on each.
+        """
+        dt = self.timestep
+        phases = self.phases
+        active = [engine for engine in engines if engine.begin_step(dt)]
+        phases.lap("spawn")
+        for engine in active:
+            engine.update_obstacles(dt)
+            engine.update_coins(dt)
+        phases.lap("movement")
+        for engine in active:
+            engine.check_collisions()
+        phases.lap("collisions")
+        for engine in active:
+            engine.update_game_state(dt)
+        phases.lap("scoring")
+
+    def advance(self, elapsed: float) -> int:
+        """Add elapsed wall time to the accumulator and run the ticks it covers"""
+        self.accumulator += elapsed
+        steps = 0
+        while self.accumulator >= self.timestep:
+            if steps == self.max_catch_up:
+                # Too far behind: drop the backlog instead of spiralling
+                dropped = int(self.accumulator / self.timestep)
+                self.metrics.dropped_ticks += dropped
+                self.accumulator -= dropped * self.timestep
+                break
+            self.tick()
+            self.accumulator -= self.timestep
+            steps += 1
+        if steps > 1:
+            self.metrics.late_ticks += steps - 1
+        return steps
+
+    async def run(self):
+        """Drive the simulation until stopped"""
+        self.running = True
+        last_time = time.perf_counter()
+        while self.running:
+            current_time = time.perf_counter()
+            self.advance(current_time - last_time)
+            last_time = current_time
+            # Sleep until the accumulator holds another full timestep
+            await asyncio.sleep(self.timestep - self.accumulator)
+
+    def stop(self):
+        """Stop the loop after the current wake-up"""
+        self.running = False
+
+def batch_stepper() -> Optional[Callable[[List[GameEngine], float, PhaseTimer], None]]:
+    """The vectorized stepper when running in batch engine mode"""
+    if settings.engine_mode != "batch":
+        return None
+    from app.components.batch_engine import batch_physics
+    return batch_physics.step
+
+# Global scheduler stepping every registered session
+tick_scheduler = TickScheduler(session_registry.engines, step_batch=batch_stepper())
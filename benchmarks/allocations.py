@@ -0,0 +1,90 @@
+"""Allocation and garbage collector benchmark.
+
+Steps N bot-played sessions and encodes a delta frame and a get_game_data
+snapshot for each of them at the client update rate, the way a busy server
+does. Reports memory allocated per tick and per frame (tracemalloc peak
+above the starting point and net blocks left behind), how often the
+garbage collector ran and how long its pauses were, and the worst tick.
+
+Usage: python -m benchmarks.allocations [--sessions N] [--seconds N]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.metrics import GcMonitor
+from app.services.profiler import AllocationTracer
+from app.services.state_sync import StateEncoder
+from benchmarks.bot import bot_inputs
+
+DT = 1 / settings.tick_rate
+
+def play(engines: list, encoders: list, ticks: int, tracer: AllocationTracer = None,
+         frame_tracer: AllocationTracer = None) -> list:
+    """Step, restart finished games and encode frames; return each tick's wall time"""
+    frame_every = settings.tick_rate // settings.ui_update_rate
+    durations = []
+    for tick in range(ticks):
+        for engine in engines:
+            bot_inputs(engine)
+            if engine.session.state.value == "game_over":
+                engine.start_game()
+        if tracer:
+            tracer.begin()
+        start = time.perf_counter()
+        for engine in engines:
+            engine.step(DT)
+        if tick % frame_every == 0:
+            for engine, encoder in zip(engines, encoders):
+                if frame_tracer:
+                    frame_tracer.begin()
+                encoder.encode(engine)
+                json.dumps(engine.get_game_data())
+                if frame_tracer:
+                    frame_tracer.end()
+        durations.append(time.perf_counter() - start)
+        if tracer:
+            tracer.end()
+    return durations
+
+def run(sessions: int, seconds: int):
+    engines = [GameEngine(seed) for seed in range(sessions)]
+    encoders = [StateEncoder() for _ in engines]
+    for engine in engines:
+        engine.start_game()
+    play(engines, encoders, settings.tick_rate * 10)  # Warm up buffers and pools
+
+    ticks = seconds * settings.tick_rate
+    monitor = GcMonitor()
+    monitor.install()
+    collections = [stat["collections"] for stat in gc.get_stats()]
+    durations = play(engines, encoders, ticks)
+    collections = [stat["collections"] - before for stat, before in zip(gc.get_stats(), collections)]
+    gc.callbacks.remove(monitor._callback)
+
+    tracer, frame_tracer = AllocationTracer(), AllocationTracer()
+    tracemalloc.start()
+    play(engines, encoders, min(ticks, 600), tracer, frame_tracer)
+    tracemalloc.stop()
+
+    total_pause = sum(histogram.sum for histogram in monitor.pauses.values())
+    print(f"{sessions} sessions, {seconds} s at {settings.tick_rate} Hz, frames at {settings.ui_update_rate} Hz")
+    print(f"  tick (step + frames)   p50 {sorted(durations)[len(durations) // 2] * 1000:.3f} ms, "
+          f"max {max(durations) * 1000:.3f} ms")
+    print(f"  allocated per tick     {tracer.bytes.sum / tracer.bytes.count / 1024:.2f} KiB peak, "
+          f"{tracer.net_blocks / tracer.bytes.count:.1f} net blocks")
+    print(f"  allocated per frame    {frame_tracer.bytes.sum / frame_tracer.bytes.count / 1024:.2f} KiB peak, "
+          f"{frame_tracer.net_blocks / frame_tracer.bytes.count:.2f} net blocks")
+    print(f"  gc collections         gen0 {collections[0]}, gen1 {collections[1]}, gen2 {collections[2]} "
+          f"({sum(collections) / seconds:.1f}/s)")
+    print(f"  gc pauses              {total_pause * 1000:.1f} ms total, longest {monitor.longest * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--seconds", type=int, default=30)
+    args = parser.parse_args()
+    run(args.sessions, args.seconds)
@@ -0,0 +1,102 @@
+"""Batch physics benchmark and equivalence check.
+
+First replays the same seeded sessions, driven by a simple bot, through
+the per-object GameEngine path and the NumPy batch engine and checks that
+every tick ends in exactly the same state. Then reports throughput of both
+engine modes in session-ticks per second.
+
+Usage: python -m benchmarks.batch_physics [--sessions 100,1000,5000] [--ticks N] [--verify-ticks N]
+"""
+import argparse
+import time
+from typing import List
+from app.components.batch_engine import BatchPhysics
+from app.components.game_engine import GameEngine
+from app.config import settings
+from benchmarks.bot import bot_inputs
+from models.game_models import GameState
+
+DT = 1 / settings.tick_rate
+
+def snapshot(engine: GameEngine) -> tuple:
+    """Everything a tick can change, in a comparable form"""
+    session = engine.session
+    player = session.player
+    obstacles = sorted(zip(*(column.tolist() for column in engine.obstacles.columns())))
+    coins = sorted(zip(*(column.tolist() for column in engine.coins.columns())))
+    return (engine.tick, session.state, session.score, session.distance, session.coins_collected,
+            session.high_score, session.speed, session.game_time, player.action, player.action_timer,
+            engine.next_entity_id, obstacles, coins)
+
+def verify(sessions: int, ticks: int) -> int:
+    """Step object and batch engines side by side; return the mismatching ticks"""
+    batch = BatchPhysics(rows=sessions)
+    objects = [GameEngine(seed) for seed in range(sessions)]
+    batched = [batch.create_engine(seed) for seed in range(sessions)]
+    for engine in objects + batched:
+        engine.start_game()
+    mismatches = games = 0
+    for _ in range(ticks):
+        for engine in objects + batched:
+            bot_inputs(engine)
+        for engine in objects:
+            engine.step(DT)
+        batch.step(batched, DT)
+        games += sum(engine.session.state == GameState.GAME_OVER for engine in objects)
+        for seed, (expected, actual) in enumerate(zip(objects, batched)):
+            if snapshot(expected) != snapshot(actual):
+                mismatches += 1
+                print(f"  mismatch: session {seed} at tick {expected.tick}")
+                break
+        if mismatches:
+            break
+    print(f"equivalence: {sessions} sessions x {ticks} ticks, {games} game-over ticks, "
+          f"{'OK' if not mismatches else 'FAILED'}")
+    return mismatches
+
+def playing(engines: List[GameEngine]):
+    """Restart finished games so every session keeps simulating"""
+    for engine in engines:
+        if engine.session.state != GameState.PLAYING:
+            engine.start_game()
+
+def bench_object(sessions: int, ticks: int) -> float:
+    engines = [GameEngine(seed) for seed in range(sessions)]
+    playing(engines)
+    elapsed = 0.0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        for engine in engines:
+            engine.step(DT)
+        elapsed += time.perf_counter() - start
+        playing(engines)
+    return sessions * ticks / elapsed
+
+def bench_batch(sessions: int, ticks: int) -> float:
+    batch = BatchPhysics(rows=sessions)
+    engines = [batch.create_engine(seed) for seed in range(sessions)]
+    playing(engines)
+    elapsed = 0.0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        batch.step(engines, DT)
+        elapsed += time.perf_counter() - start
+        playing(engines)
+    return sessions * ticks / elapsed
+
+def run(sizes: List[int], ticks: int, verify_ticks: int):
+    if verify(min(sizes), verify_ticks):
+        raise SystemExit(1)
+    print(f"\n{'sessions':>10} {'object st/s':>14} {'batch st/s':>14} {'speedup':>8}")
+    for sessions in sizes:
+        obj = bench_object(sessions, ticks)
+        batch = bench_batch(sessions, ticks)
+        print(f"{sessions:>10} {obj:>14,.0f} {batch:>14,.0f} {batch / obj:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="100,1000,5000", help="Concurrent sessions per run")
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--verify-ticks", type=int, default=3600, help="Ticks to compare both modes for")
+    args = parser.parse_args()
+    run([int(size) for size in args.sessions.split(",")], args.ticks, args.verify_ticks)
@@ -0,0 +1,17 @@
+"""Scripted player shared by the headless benchmarks."""
+from app.components.game_engine import GameEngine, HIGH, LOW
+from models.game_models import GameState, PlayerAction
+
+def bot_inputs(engine: GameEngine):
+    """Restart after a crash and dodge the nearest obstacle ahead"""
+    if engine.session.state == GameState.GAME_OVER:
+        engine.queue_input("start")
+        return
+    player = engine.session.player
+    if player.action != PlayerAction.RUNNING or engine.inputs:
+        return  # Busy, or a dodge is already queued
+    store = engine.obstacles
+    for x, kind in zip(store.x, store.kind):
+        if 0 < x - player.x - player.width < 60:
+            engine.queue_input("jump" if kind == HIGH else "slide" if kind == LOW else "jump")
+            return
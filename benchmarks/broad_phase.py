@@ -0,0 +1,102 @@
+"""Broad-phase collision benchmark.
+
+Turns the obstacle and coin spawn rates up and measures the per-tick cost of
+moving entities and testing them for collisions. The engine gathers the
+entities in the player's x-range while it moves them and narrow-phase tests
+only those; the previous engine moved them and then scanned every entity.
+Both paths are timed in full, motion included, on twin engines playing the
+same track. The player is kept alive so the track fills up.
+
+Usage: python -m benchmarks.broad_phase [--rates 0.02,0.1,0.5,1.0] [--ticks N]
+"""
+import argparse
+import time
+from app.components.game_engine import GameEngine, HIGH, LOW
+from app.config import settings
+from models.game_models import GameState, PlayerAction
+
+DT = 1 / settings.tick_rate
+
+def full_scan(engine: GameEngine) -> int:
+    """The pre-broad-phase collision loops, without side effects"""
+    player = engine.session.player
+    left, right = player.x, player.x + player.width
+    top, bottom = player.y, player.y + player.height
+    hits = 0
+    obstacles = engine.obstacles
+    x, y, width, height, kind = obstacles.x, obstacles.y, obstacles.width, obstacles.height, obstacles.kind
+    for i in range(len(obstacles)):
+        if left < x[i] + width[i] and right > x[i] and top < y[i] + height[i] and bottom > y[i]:
+            if kind[i] == HIGH and player.action == PlayerAction.JUMPING:
+                continue
+            elif kind[i] == LOW and player.action == PlayerAction.SLIDING:
+                continue
+            hits += 1
+    coins = engine.coins
+    x, y, width, height, collected = coins.x, coins.y, coins.width, coins.height, coins.collected
+    for i in range(len(coins)):
+        if not collected[i] and left < x[i] + width[i] and right > x[i] and top < y[i] + height[i] and bottom > y[i]:
+            hits += 1
+    return hits
+
+def full_scan_motion(engine: GameEngine, dt: float):
+    """The pre-broad-phase motion loops: move and cull, nothing gathered"""
+    store = engine.obstacles
+    x, width, speed = store.x, store.width, store.speed
+    scale = 60 * dt
+    for i in range(len(store) - 1, -1, -1):
+        x[i] -= speed[i] * scale
+        if x[i] < -width[i]:
+            store.swap_remove(i)
+    store = engine.coins
+    x, width, spin = store.x, store.width, store.spin
+    step = engine.session.speed * 60 * dt
+    spin_step = 360 * dt
+    for i in range(len(store) - 1, -1, -1):
+        x[i] -= step
+        spin[i] += spin_step
+        if x[i] < -width[i]:
+            store.swap_remove(i)
+
+def run_rate(rate: float, ticks: int) -> tuple:
+    """Average entities on track and full-scan / broad-phase seconds per tick, motion included"""
+    settings.obstacle_spawn_rate = settings.coin_spawn_rate = rate
+    scanned, broad = GameEngine(seed=1), GameEngine(seed=1)
+    scanned.start_game()
+    broad.start_game()
+    entities = 0
+    scan_time = broad_time = 0.0
+    for _ in range(ticks):
+        scanned.begin_step(DT)
+        start = time.perf_counter()
+        full_scan_motion(scanned, DT)
+        full_scan(scanned)
+        scan_time += time.perf_counter() - start
+
+        broad.begin_step(DT)
+        start = time.perf_counter()
+        broad.update_obstacles(DT)
+        broad.update_coins(DT)
+        broad.check_collisions()
+        broad_time += time.perf_counter() - start
+
+        for engine in (scanned, broad):
+            engine.session.state = GameState.PLAYING  # Keep playing through crashes
+            engine.update_game_state(DT)
+        entities += len(broad.obstacles) + len(broad.coins)
+    return entities / ticks, scan_time / ticks, broad_time / ticks
+
+def run(rates: list, ticks: int):
+    settings.max_obstacles_per_session = settings.max_coins_per_session = 1_000_000
+    print("microseconds per tick to move every entity and test collisions")
+    print(f"{'spawn rate':>10} {'entities':>9} {'full scan us':>13} {'broad phase us':>15} {'speedup':>8}")
+    for rate in rates:
+        entities, scan, broad = run_rate(rate, ticks)
+        print(f"{rate:>10} {entities:>9.0f} {scan * 1e6:>13.2f} {broad * 1e6:>15.2f} {scan / broad:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="0.02,0.1,0.5,1.0", help="Obstacle and coin spawn rates per tick")
+    parser.add_argument("--ticks", type=int, default=3600)
+    args = parser.parse_args()
+    run([float(rate) for rate in args.rates.split(",")], args.ticks)
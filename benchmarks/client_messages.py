@@ -0,0 +1,62 @@
+"""Outbound websocket traffic per client.
+
+Connects N simulated players that play, crash and restart continuously,
+then reports what each client receives: messages/s and bytes/s (JSON as
+sent over socket.io), broken down by message type, plus state frames/s
+and messages per frame.
+
+Usage: python -m benchmarks.client_messages [--sessions N] [--seconds N] [--port N]
+"""
+import argparse
+import asyncio
+from collections import Counter
+import aiohttp
+from benchmarks.sim_client import SimulatedClient, keep_playing, run_server
+
+async def bench(port: int, sessions: int, seconds: float):
+    base_url = f"http://127.0.0.1:{port}"
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        players = [SimulatedClient(base_url, http) for _ in range(sessions)]
+        for player in players:
+            await player.connect()
+        playing = [asyncio.create_task(keep_playing(player)) for player in players]
+        await asyncio.sleep(2.0)  # Past the first keyframes and configure messages
+
+        counts, sizes = Counter(), Counter()
+        frames = sum(player.frames for player in players)
+        for player in players:
+            counts.subtract(player.message_counts)
+            sizes.subtract(player.message_bytes)
+        await asyncio.sleep(seconds)
+        for player in players:
+            counts.update(player.message_counts)
+            sizes.update(player.message_bytes)
+        frames = sum(player.frames for player in players) - frames
+
+        for task in playing:
+            task.cancel()
+        for player in players:
+            await player.disconnect()
+
+    per_client = seconds * sessions
+    messages, total_bytes = sum(counts.values()), sum(sizes.values())
+    print(f"{sessions} sessions playing for {seconds:.0f} s, per client:")
+    print(f"{'type':>16} {'msgs/s':>8} {'bytes/s':>9}")
+    for event, count in counts.most_common():
+        if count:
+            print(f"{event:>16} {count / per_client:>8.2f} {sizes[event] / per_client:>9.0f}")
+    print(f"{'total':>16} {messages / per_client:>8.2f} {total_bytes / per_client:>9.0f}")
+    print(f"state frames/s {frames / per_client:.2f}, messages per frame {messages / max(frames, 1):.2f}")
+
+def run(port: int, sessions: int, seconds: float):
+    with run_server(port):
+        asyncio.run(bench(port, sessions, seconds))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8096)
+    args = parser.parse_args()
+    run(args.port, args.sessions, args.seconds)
@@ -0,0 +1,114 @@
+"""Cluster scaling benchmark.
+
+Starts the app with 1, 2, 4... workers behind the sticky router and ramps up
+simulated players through the router, each keeping a game running. A step
+passes while players still receive at least --min-frame-ratio of the
+configured frame rate and no worker's tick loop overruns more than
+--max-overrun of its ticks. Reports the most players each worker count
+sustained and how it compares with linear scaling.
+
+The load generator runs on the same machine, so the result only means
+something when there are spare cores for it and for every worker. All
+traffic also passes through the built-in router, a single Python process,
+so this measures the development setup: the router itself becomes the
+limit well before the workers do, and it is not evidence of how a cluster
+behind an external load balancer scales.
+
+Usage: python -m benchmarks.cluster_scaling [--workers 1,2,4] [--step N] [--hold SECONDS]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import aiohttp
+from app.config import settings
+from benchmarks.sim_client import SimulatedClient, keep_playing, run_server, wait_for_health
+
+def worker_ports(port: int, workers: int) -> list:
+    """Ports the workers listen on; a single worker serves the main port itself"""
+    return [port] if workers == 1 else [port + 1 + worker for worker in range(workers)]
+
+async def scheduler_metrics(http: aiohttp.ClientSession, port: int, workers: int) -> list:
+    """Tick metrics read directly from each worker"""
+    metrics = []
+    for worker_port in worker_ports(port, workers):
+        async with http.get(f"http://127.0.0.1:{worker_port}/api/debug/scheduler") as response:
+            metrics.append(json.loads(await response.text()))
+    return metrics
+
+async def measure_step(clients: list, http: aiohttp.ClientSession, port: int, workers: int, hold: float) -> tuple:
+    """Median delivered frames/s per player and worst overrun ratio over hold seconds"""
+    before = await scheduler_metrics(http, port, workers)
+    frames = [client.frames for client in clients]
+    await asyncio.sleep(hold)
+    after = await scheduler_metrics(http, port, workers)
+    rates = [(client.frames - count) / hold for client, count in zip(clients, frames)]
+    overrun = max(
+        (new["overruns"] - old["overruns"]) / max(1, new["ticks"] - old["ticks"])
+        for old, new in zip(before, after)
+    )
+    return statistics.median(rates), overrun
+
+async def ramp(port: int, workers: int, step: int, hold: float, max_players: int,
+               min_frame_ratio: float, max_overrun: float) -> int:
+    base_url = f"http://127.0.0.1:{port}"
+    target_rate = settings.ui_update_rate * min_frame_ratio
+    capacity = 0
+    connector = aiohttp.TCPConnector(limit=0)
+    # No shared cookie jar: every simulated browser keeps its own worker cookie
+    async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar()) as http:
+        clients, players = [], []
+        try:
+            while len(clients) < max_players:
+                for _ in range(step):
+                    client = SimulatedClient(base_url, http)
+                    await client.connect()
+                    clients.append(client)
+                    players.append(asyncio.create_task(keep_playing(client)))
+                await asyncio.sleep(1.0)  # Let the new games start
+                rate, overrun = await measure_step(clients, http, port, workers, hold)
+                ok = rate >= target_rate and overrun <= max_overrun
+                print(f"{workers:>8} {len(clients):>8} {rate:>10.1f} {overrun * 100:>9.1f}%  {'ok' if ok else 'saturated'}")
+                if not ok:
+                    break
+                capacity = len(clients)
+        finally:
+            for player in players:
+                player.cancel()
+            await asyncio.gather(*players, return_exceptions=True)
+            await asyncio.gather(*(client.disconnect() for client in clients), return_exceptions=True)
+    return capacity
+
+def run(worker_counts: list, port: int, step: int, hold: float, max_players: int,
+        min_frame_ratio: float, max_overrun: float):
+    print(f"{os.cpu_count()} CPU cores; target {settings.ui_update_rate * min_frame_ratio:.1f} frames/s per player")
+    print(f"{'workers':>8} {'players':>8} {'frames/s':>10} {'overruns':>10}")
+    capacities = {}
+    for workers in worker_counts:
+        with run_server(port, {"WORKERS": str(workers)}, timeout=60.0):
+            for worker_port in worker_ports(port, workers):
+                wait_for_health(f"http://127.0.0.1:{worker_port}", 60.0)
+            capacities[workers] = asyncio.run(
+                ramp(port, workers, step, hold, max_players, min_frame_ratio, max_overrun)
+            )
+    print(f"\n{'workers':>8} {'max players':>12} {'scaling':>8}")
+    single = capacities.get(worker_counts[0]) or 1
+    for workers, capacity in capacities.items():
+        efficiency = capacity / (single * workers / worker_counts[0])
+        capped = "  (hit --max-players)" if capacity >= max_players else ""
+        print(f"{workers:>8} {capacity:>12} {efficiency:>7.0%}{capped}")
+    print("measured through the built-in single-process router; see the README before reading this as cluster scaling")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts to test")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--step", type=int, default=25, help="Players added per step")
+    parser.add_argument("--hold", type=float, default=5.0, help="Seconds measured at each step")
+    parser.add_argument("--max-players", type=int, default=5000)
+    parser.add_argument("--min-frame-ratio", type=float, default=0.9)
+    parser.add_argument("--max-overrun", type=float, default=0.05)
+    args = parser.parse_args()
+    run([int(count) for count in args.workers.split(",")], args.port, args.step, args.hold,
+        args.max_players, args.min_frame_ratio, args.max_overrun)
@@ -0,0 +1,108 @@
+"""Entity store microbenchmark.
+
+Measures the per-tick cost of moving, culling and collision-testing N
+entities (half obstacles, half coins), comparing the struct-of-arrays
+EntityStore path in GameEngine with the previous lists of pydantic
+Obstacle/Coin models, which are reproduced here.
+
+Usage: python -m benchmarks.entity_store [--sizes 10,1000,100000] [--ticks N]
+"""
+import argparse
+import random
+import time
+from app.components.game_engine import GameEngine, OBSTACLE_TYPES, OBSTACLE_SHAPES
+from models.game_models import GameObject, GameSession, GameState, ObstacleType, PlayerAction
+
+DT = 1 / 60
+
+class Obstacle(GameObject):
+    """The pre-EntityStore obstacle model"""
+    obstacle_type: ObstacleType
+    speed: float
+
+class Coin(GameObject):
+    """The pre-EntityStore coin model"""
+    collected: bool = False
+    spin_angle: float = 0.0
+
+class LegacyEntities:
+    """The pre-EntityStore hot loop over pydantic models, kept for comparison"""
+
+    def __init__(self, session: GameSession, obstacles: list, coins: list):
+        self.session = session
+        self.obstacles = obstacles
+        self.coins = coins
+
+    def step(self):
+        for obstacle in self.obstacles[:]:
+            obstacle.x -= obstacle.speed * 60 * DT
+            if obstacle.x < -obstacle.width:
+                self.obstacles.remove(obstacle)
+        for coin in self.coins[:]:
+            coin.x -= self.session.speed * 60 * DT
+            coin.spin_angle += 360 * DT
+            if coin.x < -coin.width:
+                self.coins.remove(coin)
+        player = self.session.player
+        for obstacle in self.obstacles:
+            if collide(player, obstacle):
+                if obstacle.obstacle_type == ObstacleType.HIGH and player.action == PlayerAction.JUMPING:
+                    continue
+                if obstacle.obstacle_type == ObstacleType.LOW and player.action == PlayerAction.SLIDING:
+                    continue
+        for coin in self.coins[:]:
+            if not coin.collected and collide(player, coin):
+                coin.collected = True
+
+def collide(obj1, obj2) -> bool:
+    return (obj1.x < obj2.x + obj2.width and obj1.x + obj1.width > obj2.x and
+            obj1.y < obj2.y + obj2.height and obj1.y + obj1.height > obj2.y)
+
+def layout(count: int, rng: random.Random) -> list:
+    """Entity placements spread along (and beyond) the track, away from the player"""
+    return [(400 + rng.random() * 4000, rng.randrange(len(OBSTACLE_TYPES))) for _ in range(count)]
+
+def bench_store(placements: list, ticks: int) -> float:
+    engine = GameEngine()
+    engine.start_game()
+    engine.session.state = GameState.PLAYING
+    for x, kind in placements:
+        y, height = OBSTACLE_SHAPES[OBSTACLE_TYPES[kind]]
+        engine.obstacles.add(engine.new_entity_id(), x, y, 40, height, kind=kind, speed=2.0)
+        engine.coins.add(engine.new_entity_id(), x, 250, 20, 20)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        engine.update_obstacles(DT)
+        engine.update_coins(DT)
+        engine.check_collisions()
+    return (time.perf_counter() - start) / ticks
+
+def bench_legacy(placements: list, ticks: int) -> float:
+    session = GameSession(state=GameState.PLAYING)
+    obstacles, coins = [], []
+    for x, kind in placements:
+        y, height = OBSTACLE_SHAPES[OBSTACLE_TYPES[kind]]
+        obstacles.append(Obstacle(x=x, y=y, width=40, height=height, obstacle_type=OBSTACLE_TYPES[kind], speed=2.0))
+        coins.append(Coin(x=x, y=250, width=20, height=20))
+    legacy = LegacyEntities(session, obstacles, coins)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        legacy.step()
+    return (time.perf_counter() - start) / ticks
+
+def run(sizes: list, ticks: int):
+    print(f"{'entities':>10} {'legacy ms/tick':>15} {'store ms/tick':>14} {'speedup':>8}")
+    for size in sizes:
+        placements = layout(max(1, size // 2), random.Random(size))
+        # Fewer ticks for huge stores so the legacy O(n^2) removal finishes
+        runs = max(1, min(ticks, ticks * 1000 // size))
+        legacy = bench_legacy(placements, runs)
+        store = bench_store(placements, runs)
+        print(f"{size:>10} {legacy * 1000:>15.3f} {store * 1000:>14.3f} {legacy / store:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,1000,100000", help="Entities per run")
+    parser.add_argument("--ticks", type=int, default=600)
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(",")], args.ticks)
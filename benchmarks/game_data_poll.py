@@ -0,0 +1,110 @@
+"""Game data polling benchmark.
+
+Starts the server, connects some simulated players and hammers
+GET /api/game/data from several pollers per session in three styles:
+
+  poll      plain GETs back to back
+  etag      GETs with If-None-Match, answered 304 while nothing changed
+  longpoll  GETs with ?after=<seq>, held until the next change
+
+Runs once with every session playing (the data changes every tick) and once
+with every session sitting in the menu (it never changes). Reports
+requests/s, fresh snapshots received per second and the server CPU they
+cost on top of a baseline with the same sessions and no pollers.
+
+Usage: python -m benchmarks.game_data_poll [--sessions N] [--pollers N] [--seconds N]
+                                           [--modes poll,etag,longpoll] [--port N]
+"""
+import argparse
+import asyncio
+import time
+import aiohttp
+from benchmarks.sim_client import SimulatedClient, keep_playing, process_cpu_seconds, run_server
+
+class PollStats:
+    def __init__(self):
+        self.requests = 0
+        self.fresh = 0  # 200 responses
+        self.not_modified = 0
+
+async def poller(http: aiohttp.ClientSession, url: str, session_id: str, mode: str, stats: PollStats,
+                 deadline: float):
+    """Fetch game data until the deadline in the given style"""
+    etag, seq = None, None
+    while time.perf_counter() < deadline:
+        headers = {"X-Session-Id": session_id}
+        params = {}
+        if mode == "etag" and etag:
+            headers["If-None-Match"] = etag
+        if mode == "longpoll" and seq is not None:
+            params["after"] = seq
+        async with http.get(url, headers=headers, params=params) as response:
+            await response.read()
+            stats.requests += 1
+            if response.status == 304:
+                stats.not_modified += 1
+            else:
+                stats.fresh += 1
+            etag = response.headers.get("ETag")
+            seq = response.headers.get("X-Snapshot-Seq")
+
+async def measure(pid: int, seconds: float, coroutines) -> float:
+    """Server CPU seconds used while the coroutines run"""
+    before = process_cpu_seconds(pid)
+    await asyncio.gather(*coroutines)
+    return process_cpu_seconds(pid) - before
+
+async def scenario(http: aiohttp.ClientSession, base_url: str, players: list, pollers: int, seconds: float,
+                   modes: list, pid: int):
+    """Measure each polling style against the players' sessions as they are now"""
+    idle = await measure(pid, seconds, [asyncio.sleep(seconds)]) / seconds
+    print(f"{'mode':>9} {'req/s':>8} {'fresh/s':>8} {'304/s':>8} {'poll CPU':>9} {'CPU us/req':>11}"
+          f"   (baseline {idle * 100:.0f}% of a core)")
+    for mode in modes:
+        stats = PollStats()
+        deadline = time.perf_counter() + seconds
+        cpu = await measure(pid, seconds, [
+            poller(http, f"{base_url}/api/game/data", player.client_id, mode, stats, deadline)
+            for player in players for _ in range(pollers)
+        ])
+        elapsed = seconds + max(0.0, time.perf_counter() - deadline)
+        extra = max(0.0, cpu / elapsed - idle)
+        print(f"{mode:>9} {stats.requests / elapsed:>8.0f} {stats.fresh / elapsed:>8.0f} "
+              f"{stats.not_modified / elapsed:>8.0f} {extra * 100:>8.0f}% "
+              f"{extra * elapsed / max(stats.requests, 1) * 1e6:>11.0f}")
+
+async def bench(port: int, sessions: int, pollers: int, seconds: float, modes: list, pid: int):
+    base_url = f"http://127.0.0.1:{port}"
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        players = [SimulatedClient(base_url, http) for _ in range(sessions)]
+        for player in players:
+            await player.connect()
+        print(f"{sessions} sessions, {pollers} pollers each, {seconds:.0f} s per mode")
+
+        print("\nsessions in the menu")
+        await scenario(http, base_url, players, pollers, seconds, modes, pid)
+
+        playing = [asyncio.create_task(keep_playing(player)) for player in players]
+        await asyncio.sleep(1.0)
+        print("\nsessions playing")
+        await scenario(http, base_url, players, pollers, seconds, modes, pid)
+
+        for task in playing:
+            task.cancel()
+        for player in players:
+            await player.disconnect()
+
+def run(port: int, sessions: int, pollers: int, seconds: float, modes: list):
+    with run_server(port) as server:
+        asyncio.run(bench(port, sessions, pollers, seconds, modes, server.pid))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--pollers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--modes", default="poll,etag,longpoll")
+    parser.add_argument("--port", type=int, default=8095)
+    args = parser.parse_args()
+    run(args.port, args.sessions, args.pollers, args.seconds, args.modes.split(","))
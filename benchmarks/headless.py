@@ -0,0 +1,161 @@
+"""Headless engine benchmark suite.
+
+Steps N bot-played sessions for M ticks with no event loop, sleeps or
+NiceGUI, and reports simulation throughput, tick latency percentiles,
+allocations per tick and the cost of serializing game state. Results can be
+saved as a baseline and later runs compared against it to catch
+performance regressions.
+
+Usage: python -m benchmarks.headless [--sessions N] [--ticks N] [--engine-mode object|batch]
+                                     [--save-baseline [FILE]] [--compare [FILE]]
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.profiler import allocation_tracer
+from app.services.state_sync import StateEncoder
+from benchmarks.bot import bot_inputs
+
+DT = 1 / settings.tick_rate
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+# Metrics where a larger value is better; for the rest smaller is better
+HIGHER_IS_BETTER = {"session_ticks_per_s"}
+
+def create_engines(sessions: int, mode: str) -> tuple:
+    """Seeded engines and the function that steps all of them one tick"""
+    if mode == "batch":
+        from app.components.batch_engine import BatchPhysics
+        batch = BatchPhysics(rows=sessions)
+        engines = [batch.create_engine(seed) for seed in range(sessions)]
+        return engines, lambda: batch.step(engines, DT)
+
+    engines = [GameEngine(seed) for seed in range(sessions)]
+
+    def step():
+        for engine in engines:
+            engine.step(DT)
+    return engines, step
+
+def play(engines: List[GameEngine], step: Callable[[], None], ticks: int) -> List[float]:
+    """Run the bot and the engines for ticks; return each tick's wall time"""
+    durations = []
+    for _ in range(ticks):
+        for engine in engines:
+            bot_inputs(engine)
+        start = time.perf_counter()
+        step()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def measure_allocations(sessions: int, mode: str, ticks: int) -> Dict[str, float]:
+    """Memory allocated while stepping, from the server's allocation tracer, per tick"""
+    engines, step = create_engines(sessions, mode)
+    for engine in engines:
+        engine.start_game()
+    play(engines, step, settings.tick_rate)  # Fill the track first
+    allocation_tracer.start()
+    for _ in range(ticks):
+        for engine in engines:
+            bot_inputs(engine)
+        allocation_tracer.begin()
+        step()
+        allocation_tracer.end()
+    allocation_tracer.stop()
+    return {
+        "alloc_kib_per_tick": round(allocation_tracer.bytes.sum / ticks / 1024, 2),
+        "net_blocks_per_tick": round(allocation_tracer.net_blocks / ticks, 1),
+    }
+
+def measure_serialization(engines: List[GameEngine]) -> Dict[str, float]:
+    """Per-session cost of get_game_data + json and of a delta-encoder keyframe"""
+    start = time.perf_counter()
+    size = sum(len(json.dumps(engine.get_game_data())) for engine in engines)
+    game_data = time.perf_counter() - start
+    encoders = [StateEncoder() for _ in engines]
+    start = time.perf_counter()
+    for engine, encoder in zip(engines, encoders):
+        encoder.encode(engine)
+    keyframe = time.perf_counter() - start
+    return {
+        "game_data_us": round(game_data / len(engines) * 1e6, 2),
+        "game_data_bytes": round(size / len(engines)),
+        "keyframe_us": round(keyframe / len(engines) * 1e6, 2),
+    }
+
+def run(sessions: int, ticks: int, mode: str) -> Dict[str, float]:
+    engines, step = create_engines(sessions, mode)
+    for engine in engines:
+        engine.start_game()
+    durations = play(engines, step, ticks)
+    results = {
+        "session_ticks_per_s": round(sessions * ticks / sum(durations)),
+        "tick_p50_ms": round(statistics.median(durations) * 1000, 3),
+        "tick_p99_ms": round(percentile(durations, 0.99) * 1000, 3),
+    }
+    results.update(measure_allocations(sessions, mode, min(ticks, 600)))
+    results.update(measure_serialization(engines))
+    return results
+
+def load_baseline(path: str) -> dict:
+    """Read a baseline, failing loudly when there is none to compare against"""
+    try:
+        with open(path) as baseline:
+            loaded = json.load(baseline)
+    except FileNotFoundError:
+        print(f"no baseline at {path}: baselines are machine-local and not committed; "
+              f"record one on this machine first with --save-baseline {path}")
+        raise SystemExit(2)
+    print(f"comparing against the machine-local baseline {path}")
+    return loaded
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Metrics that got worse than the baseline by more than tolerance"""
+    regressions = []
+    for key, old in baseline.get("results", {}).items():
+        new = results.get(key)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        worse = -change if key in HIGHER_IS_BETTER else change
+        if worse > tolerance:
+            regressions.append(f"{key}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=3600)
+    parser.add_argument("--engine-mode", choices=("object", "batch"), default=settings.engine_mode)
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="FILE")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="FILE")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression before failing")
+    args = parser.parse_args()
+
+    config = {"sessions": args.sessions, "ticks": args.ticks, "engine_mode": args.engine_mode}
+    results = run(args.sessions, args.ticks, args.engine_mode)
+    print(f"{args.sessions} sessions x {args.ticks} ticks, {args.engine_mode} engine")
+    for key, value in results.items():
+        print(f"  {key:<22} {value}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline:
+            json.dump({"config": config, "results": results}, baseline, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        if baseline.get("config") != config:
+            print(f"warning: baseline was recorded with {baseline.get('config')}")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        print("no regressions" if not regressions else f"{len(regressions)} regressions")
+        raise SystemExit(1 if regressions else 0)
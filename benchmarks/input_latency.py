@@ -0,0 +1,95 @@
+"""Input path benchmark: websocket input frames vs. REST POST per keypress.
+
+Starts the app, connects a simulated client and measures, for each path:
+
+* input-to-state latency: time from sending a jump until a state frame shows
+  the player jumping (includes waiting for the next broadcast)
+* server CPU per input and client-side inputs/sec when sending a burst
+
+Usage: python -m benchmarks.input_latency [--port N] [--trials N] [--burst N]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import aiohttp
+from app.services.input_protocol import encode_input
+from benchmarks.sim_client import SimulatedClient, process_cpu_seconds, run_server
+
+PATHS = ("socket", "rest")
+
+async def send(client: SimulatedClient, path: str, action: str):
+    if path == "socket":
+        await client.send_socket_input(encode_input(action, client.tick))
+    else:
+        route = "player" if action in ("jump", "slide") else "game"
+        await client.send_rest_input(f"/api/{route}/{action}")
+
+async def ensure_running(client: SimulatedClient, path: str):
+    """Get the player into the running action of a live game"""
+    if client.hud.get("state") != "playing":
+        await send(client, path, "start")
+        await client.wait_for(lambda hud: hud.get("state") == "playing")
+    await client.wait_for(lambda hud: hud.get("action") == "running" or hud.get("state") != "playing")
+
+async def measure_latency(client: SimulatedClient, path: str, trials: int) -> list:
+    samples = []
+    while len(samples) < trials:
+        await ensure_running(client, path)
+        if client.hud.get("state") != "playing":
+            continue
+        start = time.perf_counter()
+        await send(client, path, "jump")
+        try:
+            await client.wait_for(lambda hud: hud.get("action") == "jumping", timeout=2.0)
+        except TimeoutError:
+            continue  # Died before the jump landed in a frame
+        samples.append(time.perf_counter() - start)
+    return samples
+
+async def measure_burst(client: SimulatedClient, path: str, burst: int, pid: int):
+    """Send a burst of inputs; return (client inputs/sec, server CPU ms per input)"""
+    await send(client, path, "pause")
+    await client.wait_for(lambda hud: hud.get("state") in ("paused", "game_over", "menu"))
+    cpu_before = process_cpu_seconds(pid)
+    start = time.perf_counter()
+    if path == "rest":
+        await asyncio.gather(*(send(client, path, "slide") for _ in range(burst)))
+    else:
+        for _ in range(burst):
+            await send(client, path, "slide")
+    # Barrier: once the restart is visible every earlier input was handled.
+    # Retry because a full input queue drops frames.
+    while True:
+        await send(client, path, "start")
+        try:
+            await client.wait_for(lambda hud: hud.get("state") == "playing", timeout=0.5)
+            break
+        except TimeoutError:
+            pass
+    elapsed = time.perf_counter() - start
+    cpu = process_cpu_seconds(pid) - cpu_before
+    return burst / elapsed, cpu / burst * 1000
+
+async def run(port: int, trials: int, burst: int, pid: int):
+    async with aiohttp.ClientSession() as http:
+        client = SimulatedClient(f"http://127.0.0.1:{port}", http)
+        await client.connect()
+        await client.wait_for(lambda hud: "state" in hud)
+        print(f"{'path':>8} {'p50 ms':>8} {'p90 ms':>8} {'inputs/s':>10} {'cpu ms/input':>13}")
+        for path in PATHS:
+            samples = sorted(await measure_latency(client, path, trials))
+            rate, cpu = await measure_burst(client, path, burst, pid)
+            p50 = statistics.median(samples) * 1000
+            p90 = samples[int(len(samples) * 0.9) - 1] * 1000
+            print(f"{path:>8} {p50:>8.1f} {p90:>8.1f} {rate:>10.0f} {cpu:>13.3f}")
+        await client.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--trials", type=int, default=30)
+    parser.add_argument("--burst", type=int, default=2000)
+    args = parser.parse_args()
+    with run_server(args.port) as server:
+        asyncio.run(run(args.port, args.trials, args.burst, server.pid))
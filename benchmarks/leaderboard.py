@@ -0,0 +1,137 @@
+"""Leaderboard benchmark.
+
+Simulates bursts of concurrent game overs. Each burst submits one score
+per session to the write-behind leaderboard while its flush loop runs,
+and the benchmark reports:
+- the cost a submission adds to the tick loop
+- how fast scores become durable in SQLite, counting only the time spent
+  writing batches (bursts are paced one game tick apart)
+- the same rows committed one at a time, for comparison
+- top-N read throughput
+
+It also checks that syncing with the shared backend keeps scores that were
+submitted on this worker but not flushed yet in the served top-N list.
+
+Usage: python -m benchmarks.leaderboard [--sessions N] [--bursts N] [--naive N]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from app.services.backend import InProcessBackend
+from app.services.leaderboard import SCHEMA, Leaderboard
+
+async def bench_write_behind(path: str, sessions: int, bursts: int) -> dict:
+    board = Leaderboard(path=path, max_pending=sessions * bursts)
+    board.open()
+    rng = random.Random(1)
+    # Durable throughput counts only the time spent writing batches: the
+    # run itself is paced at one burst per game tick
+    write_time = 0.0
+    write_batch = board.write_batch
+
+    def timed_write_batch(batch):
+        nonlocal write_time
+        start = time.perf_counter()
+        write_batch(batch)
+        write_time += time.perf_counter() - start
+
+    board.write_batch = timed_write_batch
+
+    async def flush_loop():
+        while True:
+            await asyncio.sleep(0.05)
+            await board.flush()
+
+    flusher = asyncio.create_task(flush_loop())
+    submit_time = worst_burst = 0.0
+    for burst in range(bursts):
+        burst_start = time.perf_counter()
+        for session in range(sessions):
+            board.submit(f"Runner-{session:04x}", rng.randrange(10000), rng.randrange(2000), rng.randrange(50))
+        elapsed = time.perf_counter() - burst_start
+        submit_time += elapsed
+        worst_burst = max(worst_burst, elapsed)
+        await asyncio.sleep(1 / 60)  # One game tick between bursts
+    flusher.cancel()
+    drain_start = time.perf_counter()
+    await board.flush()
+    drain = time.perf_counter() - drain_start
+    board.close()
+    total = sessions * bursts
+    return {
+        "submits_per_s": total / submit_time,
+        "worst_burst_ms": worst_burst * 1000,
+        "durable_rows_per_s": total / write_time,
+        "drain_ms": drain * 1000,
+        "flushes": board.metrics.flushes,
+    }
+
+def bench_naive(path: str, rows: int) -> float:
+    """Rows/s when every game over commits its own transaction"""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    start = time.perf_counter()
+    for row in range(rows):
+        with connection:
+            connection.execute(
+                "INSERT INTO scores (player, score, distance, coins, replay, created) VALUES (?, ?, ?, ?, '', ?)",
+                ("Runner", row, row, 0, time.time())
+            )
+    elapsed = time.perf_counter() - start
+    connection.close()
+    return rows / elapsed
+
+def bench_reads(path: str, reads: int) -> float:
+    """Top-N API payloads served per second"""
+    board = Leaderboard(path=path)
+    board.open()
+    start = time.perf_counter()
+    for _ in range(reads):
+        board.response()
+    elapsed = time.perf_counter() - start
+    board.close()
+    return reads / elapsed
+
+async def check_sync_keeps_pending(path: str) -> list:
+    """A backend sync must not drop a score that is still waiting to be flushed"""
+    board = Leaderboard(path=path, backend=InProcessBackend())
+    board.open()
+    board.submit("Runner-flushed", 100, 10, 1)
+    await board.flush()
+    board.submit("Runner-pending", 200, 20, 2)
+    await board.sync([])  # As when another worker's flush finishes first
+    ranked = [entry["player"] for entry in board.top()]
+    board.close()
+    return ranked
+
+def run(sessions: int, bursts: int, naive: int):
+    with tempfile.TemporaryDirectory() as directory:
+        batched = asyncio.run(bench_write_behind(os.path.join(directory, "batched.db"), sessions, bursts))
+        naive_rate = bench_naive(os.path.join(directory, "naive.db"), naive)
+        reads = bench_reads(os.path.join(directory, "batched.db"), 100_000)
+        ranked = asyncio.run(check_sync_keeps_pending(os.path.join(directory, "sync.db")))
+    print(f"{sessions} concurrent game overs per tick x {bursts} ticks")
+    print(f"  submit (tick-loop cost)      {batched['submits_per_s']:>12,.0f} /s, "
+          f"worst burst {batched['worst_burst_ms']:.2f} ms")
+    print(f"  durable, write-behind        {batched['durable_rows_per_s']:>12,.0f} rows/s in {batched['flushes']} flushes, "
+          f"last flush after the final burst {batched['drain_ms']:.1f} ms")
+    print(f"  durable, commit per score    {naive_rate:>12,.0f} rows/s")
+    print(f"  top-N reads                  {reads:>12,.0f} /s")
+    synced = ranked == ["Runner-pending", "Runner-flushed"]
+    print(f"  backend sync                 {'keeps unflushed scores' if synced else f'DROPPED unflushed scores: {ranked}'}")
+    if not synced:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000, help="Game overs per burst")
+    parser.add_argument("--bursts", type=int, default=60)
+    parser.add_argument("--naive", type=int, default=5000, help="Rows for the commit-per-score comparison")
+    args = parser.parse_args()
+    run(args.sessions, args.bursts, args.naive)
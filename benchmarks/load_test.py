@@ -0,0 +1,333 @@
+"""End-to-end load test and capacity report.
+
+Starts the app, then adds simulated players in steps. Each player loads the
+game page, opens its socket.io connection and plays like a person: it
+watches the obstacles in its frames, jumps or slides after a human reaction
+time and restarts a second or so after crashing. At every step the harness
+records:
+
+- the server's tick latency and overruns
+- frame push latency
+- skipped frames
+- resident memory
+- the frame rate each player receives while playing
+- how long an input takes to show up in a frame
+
+A step passes while players get at least --min-frame-ratio of the
+configured frame rate, at most --max-overrun of ticks overrun and the p95
+input latency stays under --max-input-latency. The report gives the most
+concurrent players per core the build sustained, and how many sessions
+would fit in the memory of the VM in fly.toml.
+
+With two or more cores the server is pinned to one of them and the load
+generator to the rest. On a single core they share it, so the result is a
+lower bound.
+
+Usage: python -m benchmarks.load_test [--step N] [--hold SECONDS] [--max-players N]
+                                      [--report FILE] [--port N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import time
+from typing import Dict, List, Optional, Tuple
+import aiohttp
+from app.config import settings
+from app.services.input_protocol import encode_input
+from benchmarks.sim_client import SimulatedClient, process_cpu_seconds, run_server
+
+PLAYER_X, PLAYER_WIDTH = 100, 40
+REACTION_TIME = (0.15, 0.3)  # Seconds between seeing an obstacle and pressing a key
+RESTART_DELAY = (0.5, 1.5)  # Seconds spent on the game-over screen
+
+Scrape = Dict[Tuple[str, str], float]
+
+class Player:
+    """A simulated person playing through one client connection"""
+
+    def __init__(self, client: SimulatedClient, rng: random.Random):
+        self.client = client
+        self.rng = rng
+        self.playing_time = 0.0  # Seconds spent in a running game
+        self.playing_frames = 0  # Frames received during that time
+        self.input_latencies: List[float] = []  # Input sent -> frame showing it
+        self.deaths = 0
+
+    def server_tick(self) -> int:
+        """The tick the server is probably on, extrapolated from the last frame"""
+        elapsed = time.perf_counter() - self.client.last_frame_at
+        return self.client.tick + int(elapsed * settings.tick_rate)
+
+    def threat(self, reaction: float) -> Optional[str]:
+        """The dodge needed for the first obstacle that will be close once we react"""
+        elapsed = time.perf_counter() - self.client.last_frame_at + reaction
+        for x, kind, speed in self.client.obstacles.values():
+            gap = x - speed * 60 * elapsed - PLAYER_X - PLAYER_WIDTH
+            if 0 < gap < 60:
+                return "slide" if kind == "low" else "jump"
+        return None
+
+    async def dodge(self, action: str):
+        """Press the key for action and time how long the server takes to show it"""
+        sent = time.perf_counter()
+        await self.client.send_socket_input(encode_input(action, self.server_tick()))
+        try:
+            await self.client.wait_for(lambda hud: hud.get("action") != "running" or hud.get("state") != "playing",
+                                       timeout=2.0)
+            self.input_latencies.append(time.perf_counter() - sent)
+        except TimeoutError:
+            pass
+
+    async def play(self):
+        client = self.client
+        while True:
+            if client.hud.get("state") != "playing":
+                if client.hud.get("state") == "game_over":
+                    self.deaths += 1
+                    await asyncio.sleep(self.rng.uniform(*RESTART_DELAY))
+                await client.send_socket_input("g")
+                try:
+                    await client.wait_for(lambda hud: hud.get("state") == "playing", timeout=5.0)
+                except TimeoutError:
+                    pass
+                continue
+            start, frames = time.perf_counter(), client.frames
+            reaction = self.rng.uniform(*REACTION_TIME)
+            action = self.threat(reaction) if client.hud.get("action") == "running" else None
+            if action:
+                await asyncio.sleep(reaction)
+                await self.dodge(action)
+            else:
+                await asyncio.sleep(0.05)
+            if client.hud.get("state") == "playing":
+                self.playing_time += time.perf_counter() - start
+                self.playing_frames += client.frames - frames
+
+async def scrape(http: aiohttp.ClientSession, base_url: str) -> Scrape:
+    """Parse /metrics into {(name, labels): value}"""
+    async with http.get(f"{base_url}/metrics") as response:
+        text = await response.text()
+    samples = {}
+    for line in text.splitlines():
+        match = re.match(r"(\w+)(\{[^}]*\})? (\S+)$", line)
+        if match:
+            samples[(match.group(1), match.group(2) or "")] = float(match.group(3))
+    return samples
+
+def quantile(before: Scrape, after: Scrape, name: str, labels: str, q: float) -> float:
+    """Upper bucket bound holding the q-quantile of observations made between two scrapes"""
+    buckets = []
+    for (sample, sample_labels), value in after.items():
+        if sample == f"{name}_bucket" and sample_labels.startswith("{" + labels):
+            bound = re.search(r'le="([^"]+)"', sample_labels).group(1)
+            count = value - before.get((sample, sample_labels), 0.0)
+            buckets.append((float(bound), count))
+    buckets.sort()
+    if not buckets or buckets[-1][1] == 0:
+        return 0.0
+    target = q * buckets[-1][1]
+    return next(bound for bound, count in buckets if count >= target)
+
+async def get_json(http: aiohttp.ClientSession, url: str):
+    async with http.get(url) as response:
+        return await response.json()
+
+def rss_mb(pid: int) -> float:
+    """Resident memory of a process in MB (Linux only)"""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+async def measure(http: aiohttp.ClientSession, base_url: str, pid: int, players: List[Player], hold: float) -> dict:
+    """Server and client figures over hold seconds of play"""
+    metrics, scheduler = await scrape(http, base_url), await get_json(http, f"{base_url}/api/debug/scheduler")
+    loops = await get_json(http, f"{base_url}/api/debug/loops")
+    cpu = process_cpu_seconds(pid)
+    for player in players:
+        player.playing_time, player.playing_frames, player.input_latencies = 0.0, 0, []
+    await asyncio.sleep(hold)
+    cpu = process_cpu_seconds(pid) - cpu
+    metrics_after = await scrape(http, base_url)
+    scheduler_after = await get_json(http, f"{base_url}/api/debug/scheduler")
+    loops_after = await get_json(http, f"{base_url}/api/debug/loops")
+
+    ticks = max(1, scheduler_after["ticks"] - scheduler["ticks"])
+    skipped = (sum(loop["frames_skipped"] for loop in loops_after["loops"])
+               - sum(loop["frames_skipped"] for loop in loops["loops"]))
+    rates = [player.playing_frames / player.playing_time for player in players if player.playing_time > 1.0]
+    frames = sum(player.playing_frames for player in players)
+    expected = sum(player.playing_time for player in players) * settings.ui_update_rate
+    latencies = [latency for player in players for latency in player.input_latencies]
+    return {
+        "players": len(players),
+        "frames_per_s": round(statistics.median(rates), 2) if rates else 0.0,
+        "dropped_frames": round(max(0.0, 1 - frames / expected), 3) if expected else 0.0,
+        "skipped_frames": skipped,
+        "tick_p99_ms": round(quantile(metrics, metrics_after, "temple_tick_seconds", "", 0.99) * 1000, 2),
+        "overruns": round((scheduler_after["overruns"] - scheduler["overruns"]) / ticks, 4),
+        "dropped_ticks": scheduler_after["dropped_ticks"] - scheduler["dropped_ticks"],
+        "push_p99_ms": round(quantile(metrics, metrics_after, "temple_frame_phase_seconds",
+                                      'phase="ui_push"', 0.99) * 1000, 2),
+        "input_p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "input_p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "update_rate": scheduler_after.get("update_rate", settings.ui_update_rate),
+        "server_cpu": round(cpu / hold, 3),
+        "rss_mb": round(rss_mb(pid), 1),
+    }
+
+def passes(step: dict, args: argparse.Namespace) -> bool:
+    return (step["frames_per_s"] >= settings.ui_update_rate * args.min_frame_ratio
+            and step["overruns"] <= args.max_overrun
+            and step["input_p95_ms"] <= args.max_input_latency * 1000)
+
+async def ramp(port: int, pid: int, args: argparse.Namespace) -> Tuple[List[dict], float]:
+    """Add players step by step until a step fails; return the steps and the idle RSS"""
+    base_url = f"http://127.0.0.1:{port}"
+    rng = random.Random(args.seed)
+    steps = []
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar()) as http:
+        idle_rss = rss_mb(pid)
+        players: List[Player] = []
+        tasks = []
+        try:
+            while len(players) < args.max_players:
+                for _ in range(args.step):
+                    client = SimulatedClient(base_url, http)
+                    await client.connect()
+                    player = Player(client, random.Random(rng.random()))
+                    players.append(player)
+                    tasks.append(asyncio.create_task(player.play()))
+                await asyncio.sleep(1.0)  # Let the new games start
+                step = await measure(http, base_url, pid, players, args.hold)
+                step["ok"] = passes(step, args)
+                steps.append(step)
+                print_step(step)
+                if not step["ok"]:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.gather(*(player.client.disconnect() for player in players), return_exceptions=True)
+    return steps, idle_rss
+
+COLUMNS = (  # step key, title, format
+    ("players", "players", "{:>7}"), ("frames_per_s", "frames/s", "{:>8.1f}"),
+    ("dropped_frames", "dropped", "{:>7.1%}"), ("tick_p99_ms", "tick p99", "{:>8.2f}"),
+    ("overruns", "overrun", "{:>7.1%}"), ("push_p99_ms", "push p99", "{:>8.2f}"),
+    ("input_p95_ms", "input p95", "{:>9.0f}"), ("server_cpu", "CPU", "{:>5.0%}"), ("rss_mb", "RSS MB", "{:>7.1f}"),
+)
+
+def print_header():
+    print(" ".join(title.rjust(len(fmt.format(0))) for _, title, fmt in COLUMNS))
+
+def print_step(step: dict):
+    print(" ".join(fmt.format(step[key]) for key, _, fmt in COLUMNS) + ("  ok" if step["ok"] else "  saturated"))
+
+def build_id() -> str:
+    """Git commit of the build under test, marked dirty if the tree has changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def vm_memory_mb(path: str = "fly.toml") -> Optional[int]:
+    """memory_mb of the deployment VM"""
+    try:
+        with open(path) as config:
+            match = re.search(r"^\s*memory_mb\s*=\s*(\d+)", config.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(match.group(1)) if match else None
+
+def pin(pid: int) -> bool:
+    """Give the server one core and this process the others, if there are several"""
+    cores = sorted(os.sched_getaffinity(0))
+    if len(cores) < 2:
+        return False
+    os.sched_setaffinity(pid, {cores[0]})
+    os.sched_setaffinity(0, set(cores[1:]))
+    return True
+
+def report(steps: List[dict], idle_rss: float, pinned: bool, args: argparse.Namespace) -> dict:
+    passed = [step for step in steps if step["ok"]]
+    best = passed[-1] if passed else None
+    capacity = best["players"] if best else 0
+    last = steps[-1] if steps else None
+    per_session_kb = (last["rss_mb"] - idle_rss) * 1024 / last["players"] if last else 0.0
+    memory = vm_memory_mb()
+    fits = int((memory - idle_rss) * 1024 / per_session_kb) if memory and per_session_kb > 0 else None
+    summary = {
+        "build": build_id(),
+        "engine_mode": settings.engine_mode,
+        "tick_rate": settings.tick_rate,
+        "update_rate": settings.ui_update_rate,
+        "cores": len(os.sched_getaffinity(0)) + (1 if pinned else 0),
+        "server_pinned": pinned,
+        "criteria": {
+            "min_frames_per_s": settings.ui_update_rate * args.min_frame_ratio,
+            "max_overrun": args.max_overrun,
+            "max_input_p95_ms": args.max_input_latency * 1000,
+        },
+        "max_players_per_core": capacity,
+        "hit_max_players": bool(last and last["ok"] and last["players"] >= args.max_players),
+        "idle_rss_mb": round(idle_rss, 1),
+        "rss_kb_per_session": round(per_session_kb, 1),
+        "vm_memory_mb": memory,
+        "sessions_fitting_vm_memory": fits,
+        "steps": steps,
+    }
+    print(f"\nbuild {summary['build']} ({settings.engine_mode} engine, {settings.tick_rate} Hz ticks, "
+          f"{settings.ui_update_rate} Hz frames)")
+    where = "server pinned to one core" if pinned else "server and load generator sharing one core (lower bound)"
+    capped = " (hit --max-players)" if summary["hit_max_players"] else ""
+    print(f"max concurrent players per core: {capacity}{capped}, {where}")
+    if best:
+        print(f"  at that load: tick p99 {best['tick_p99_ms']} ms, push p99 {best['push_p99_ms']} ms, "
+              f"input p95 {best['input_p95_ms']:.0f} ms, {best['dropped_frames']:.1%} frames dropped")
+    print(f"memory: {idle_rss:.0f} MB idle + {per_session_kb:.0f} KB per session", end="")
+    print(f" -> about {fits} sessions in the {memory} MB VM from fly.toml" if fits is not None else "")
+    return summary
+
+def run(args: argparse.Namespace):
+    print(f"criteria: >= {settings.ui_update_rate * args.min_frame_ratio:.1f} frames/s, "
+          f"<= {args.max_overrun:.0%} overruns, input p95 <= {args.max_input_latency * 1000:.0f} ms")
+    print_header()
+    # PROFILER_ENABLED opens /api/debug/loops, where skipped frames are read
+    with run_server(args.port, {"WORKERS": "1", "PROFILER_ENABLED": "true"}) as server:
+        pinned = pin(server.pid)
+        steps, idle_rss = asyncio.run(ramp(args.port, server.pid, args))
+    summary = report(steps, idle_rss, pinned, args)
+    if args.report:
+        with open(args.report, "w") as out:
+            json.dump(summary, out, indent=2)
+        print(f"report saved to {args.report}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--step", type=int, default=50, help="Players added per step")
+    parser.add_argument("--hold", type=float, default=10.0, help="Seconds measured at each step")
+    parser.add_argument("--max-players", type=int, default=5000)
+    parser.add_argument("--min-frame-ratio", type=float, default=0.9)
+    parser.add_argument("--max-overrun", type=float, default=0.05)
+    parser.add_argument("--max-input-latency", type=float, default=0.3, help="Seconds, p95")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--report", metavar="FILE", help="Also write the report as JSON")
+    run(parser.parse_args())
@@ -0,0 +1,64 @@
+"""Client loop soak benchmark.
+
+Simulates many page loads, each of which connects, runs its update loop for a
+few frames and disconnects again, and checks that the number of live asyncio
+tasks stays flat instead of growing with the page-view count.
+
+Usage: python -m benchmarks.loop_soak [--page-loads N] [--concurrent N]
+"""
+import argparse
+import asyncio
+from collections import deque
+from app.services.client_loops import ClientLoopManager
+from app.services.session_registry import SessionRegistry
+
+class FakeClient:
+    """Stand-in for a NiceGUI client with an outbox and a context manager"""
+
+    def __init__(self):
+        self.outbox = type('Outbox', (), {'messages': deque()})()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+async def page_load(registry: SessionRegistry, loops: ClientLoopManager, index: int, frames: int):
+    """One page view: create session, connect, push a few frames, disconnect"""
+    session = registry.create(f"soak-{index}")
+    session.engine.start_game()
+    loop = loops.start(session.session_id, FakeClient(), session.engine.get_game_data)
+    while loop.frames_sent < frames:
+        await asyncio.sleep(loops.interval)
+    registry.remove(session.session_id)
+
+async def run(page_loads: int, concurrent: int, frames: int):
+    registry = SessionRegistry(max_sessions=concurrent, idle_timeout=float('inf'))
+    loops = ClientLoopManager(update_rate=1000)
+    registry.on_remove(lambda session: loops.stop(session.session_id))
+    await asyncio.sleep(0)
+    baseline = len(asyncio.all_tasks())
+    peak = baseline
+    print(f"{'page loads':>10} {'tasks':>8} {'loops':>8} {'sessions':>9}")
+    for start in range(0, page_loads, concurrent):
+        batch = range(start, min(start + concurrent, page_loads))
+        await asyncio.gather(*(page_load(registry, loops, i, frames) for i in batch))
+        await asyncio.sleep(0)  # Let cancelled tasks finish
+        tasks = len(asyncio.all_tasks())
+        peak = max(peak, tasks)
+        if (batch.stop // concurrent) % 10 == 0 or batch.stop == page_loads:
+            print(f"{batch.stop:>10} {tasks:>8} {len(loops):>8} {len(registry):>9}")
+    final = len(asyncio.all_tasks())
+    print(f"\nTasks: baseline {baseline}, final {final}, peak between batches {peak}")
+    if final != baseline or len(loops) or len(registry):
+        raise SystemExit("FAIL: tasks, loops or sessions leaked")
+    print("OK: task count stayed flat")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-loads", type=int, default=10_000)
+    parser.add_argument("--concurrent", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.page_loads, args.concurrent, args.frames))
@@ -0,0 +1,87 @@
+"""Replay benchmark and regression check.
+
+Plays bot-driven games, checks that each game's encoded replay re-simulates
+to exactly the recorded score, and reports how much faster than real time
+the headless replay runner is. Replays can be saved and re-checked later to
+catch engine changes that alter outcomes. Replays claiming a different tick
+rate than the server's must be rejected, since a longer timestep would
+otherwise score the same inputs far higher.
+
+Usage: python -m benchmarks.replay [--games N] [--seed N] [--save FILE | --check FILE]
+"""
+import argparse
+import time
+from typing import List, Tuple
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.replay import Replay, replay_score
+from benchmarks.bot import bot_inputs
+from models.game_models import GameState
+
+DT = 1 / settings.tick_rate
+
+def record_games(games: int, seed: int, max_ticks: int) -> List[Tuple[str, int]]:
+    """Play bot games and return (encoded replay, score) pairs"""
+    engine = GameEngine(seed)
+    recorded = []
+    for _ in range(games):
+        engine.start_game()
+        while engine.session.state != GameState.GAME_OVER and engine.game_tick < max_ticks:
+            bot_inputs(engine)
+            engine.step(DT)
+        recorded.append((Replay.from_engine(engine).encode(), engine.session.score))
+    return recorded
+
+def check_forged_rate(recorded: List[Tuple[str, int]]) -> int:
+    """Re-encode every replay at a foreign tick rate; return how many still decode"""
+    accepted = 0
+    for text, _ in recorded:
+        replay = Replay.decode(text)
+        for rate in (1, settings.tick_rate * 2, 1000000):
+            replay.tick_rate = rate
+            try:
+                Replay.decode(replay.encode())
+            except ValueError:
+                continue
+            accepted += 1
+            print(f"  forged tick rate {rate} accepted: {text[:60]}")
+    print(f"forged tick rates: {'rejected' if not accepted else f'{accepted} ACCEPTED'}")
+    return accepted
+
+def check(recorded: List[Tuple[str, int]]) -> int:
+    """Re-simulate every replay; return the number whose score differs"""
+    ticks = failures = 0
+    start = time.perf_counter()
+    for text, score in recorded:
+        replay = Replay.decode(text)
+        ticks += replay.ticks
+        actual = replay_score(text)
+        if actual != score:
+            failures += 1
+            print(f"  score mismatch: recorded {score}, replayed {actual}: {text[:60]}")
+    elapsed = time.perf_counter() - start
+    played = ticks / settings.tick_rate
+    print(f"{len(recorded)} replays, {played:.0f} s of play re-simulated in {elapsed:.2f} s "
+          f"({played / elapsed:.0f}x real time, {ticks / elapsed:,.0f} ticks/s)")
+    print(f"average replay size {sum(len(text) for text, _ in recorded) / len(recorded):.0f} bytes, "
+          f"{'OK' if not failures else f'{failures} FAILED'}")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-ticks", type=int, default=settings.tick_rate * 300, help="Cut games off after this many ticks")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--save", help="Write the recorded replays and scores to FILE")
+    group.add_argument("--check", help="Re-check replays previously written with --save")
+    args = parser.parse_args()
+    if args.check:
+        with open(args.check) as replays:
+            recorded = [(text, int(score)) for text, score in (line.split() for line in replays if line.strip())]
+    else:
+        recorded = record_games(args.games, args.seed, args.max_ticks)
+    if args.save:
+        with open(args.save, "w") as replays:
+            replays.writelines(f"{text} {score}\n" for text, score in recorded)
+    raise SystemExit(1 if check(recorded) + check_forged_rate(recorded) else 0)
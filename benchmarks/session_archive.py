@@ -0,0 +1,177 @@
+"""Session snapshot benchmark and round-trip check.
+
+Plays N bot-driven sessions for a while so they hold realistic games, then
+compares the binary snapshot format with a pydantic JSON dump of the same
+state (session model, entity rows, recorded inputs and the track RNG
+state). Reports size per session and encode and restore time per 1k
+sessions, including the lazy path a returning browser takes: one SQLite
+lookup by resume key plus the decode.
+
+Every restored session is then played on next to its original until its
+game ends, and must stay identical tick for tick; the game's replay must
+still verify.
+
+Finally a page reload is played through: the new page resumes while the
+old page's session is still registered and playing, and must get the
+running game back, with nothing the old session saves afterwards
+overwriting it.
+
+Usage: python -m benchmarks.session_archive [--sessions N] [--seconds N]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.replay import Replay, replay_score
+from app.services.session_archive import SessionArchive, decode_session, encode_session, new_resume_key
+from app.services.session_registry import SessionRegistry
+from benchmarks.bot import bot_inputs
+from models.game_models import GameSession, GameState
+
+DT = 1 / settings.tick_rate
+
+def play(engines: list, ticks: int):
+    for _ in range(ticks):
+        for engine in engines:
+            bot_inputs(engine)
+            engine.step(DT)
+
+def json_snapshot(engine: GameEngine) -> bytes:
+    """The same state as a pydantic JSON dump plus JSON entity rows"""
+    return json.dumps({
+        "session": engine.session.model_dump(mode="json"),
+        "obstacles": engine.obstacle_rows(),
+        "coins": engine.coin_rows(),
+        "inputs": engine.game_inputs,
+        "ticks": [engine.tick, engine.game_tick, engine.next_entity_id, engine.game_seed],
+        "rng": engine.game_rng.getstate(),
+    }).encode()
+
+def json_restore(data: bytes, engine: GameEngine):
+    state = json.loads(data)
+    engine.session = GameSession.model_validate(state["session"])
+    for entity_id, x, y, width, height, kind, speed in state["obstacles"]:
+        engine.obstacles.add(entity_id, x, y, width, height, 0, speed)
+    for entity_id, x, y, spin, collected in state["coins"]:
+        engine.coins.add(entity_id, x, y, 20, 20)
+    engine.game_inputs = [tuple(entry) for entry in state["inputs"]]
+    engine.tick, engine.game_tick, engine.next_entity_id, engine.game_seed = state["ticks"]
+    version, internal, gauss = state["rng"]
+    engine.game_rng.setstate((version, tuple(internal), gauss))
+
+def per_1k(seconds: float, count: int) -> str:
+    return f"{seconds / count * 1000 * 1000:8.1f} ms"
+
+def check_round_trip(engines: list, snapshots: list, max_ticks: int) -> int:
+    """Play restored sessions next to their originals; return how many diverged"""
+    failures = 0
+    for engine, snapshot in zip(engines, snapshots):
+        restored = GameEngine()
+        decode_session(snapshot, restored)
+        restored.rng.setstate(engine.rng.getstate())  # Not archived: it only seeds the next game
+        for _ in range(max_ticks):
+            if engine.session.state != GameState.PLAYING:
+                break
+            bot_inputs(engine)
+            bot_inputs(restored)
+            engine.step(DT)
+            restored.step(DT)
+        same = encode_session("", engine) == encode_session("", restored)
+        if same and engine.session.state == GameState.GAME_OVER:
+            same = replay_score(Replay.from_engine(restored).encode()) == restored.session.score
+        failures += not same
+    return failures
+
+def check_reload() -> bool:
+    """Resume a key still held by a live, playing session, as a page reload does"""
+    registry = SessionRegistry()
+    archive = SessionArchive(":memory:", registry)
+    old = registry.create("old-page")
+    old.resume_key = new_resume_key()
+    old.engine.start_game()
+    play([old.engine], settings.tick_rate * 5)
+    tick = old.engine.game_tick
+    new = registry.create("new-page")
+    resumed = archive.resume(new, old.resume_key or "")
+    play([old.engine], settings.tick_rate)  # NiceGUI keeps the old client for a few seconds
+    registry.remove(old.session_id)
+    archive.collect()
+    restored = GameEngine()
+    decode_session(archive.load(new.resume_key), restored)
+    ok = (resumed and old.resume_key is None and new.engine.game_tick == tick
+          and restored.game_tick == tick and restored.session.state != GameState.MENU)
+    print(f"page reload: {'game handed over' if ok else 'GAME LOST'} "
+          f"(resumed {resumed}, tick {new.engine.game_tick} of {tick}, archived {restored.session.state.value})")
+    return ok
+
+def run(sessions: int, seconds: int):
+    rng = random.Random(1)
+    engines = [GameEngine(seed) for seed in range(sessions)]
+    for engine in engines:
+        engine.start_game()
+    # Stagger the games so they are at different points
+    for engine in engines:
+        play([engine], rng.randrange(settings.tick_rate * seconds))
+
+    start = time.perf_counter()
+    binary = [encode_session(f"Runner-{i:04x}", engine) for i, engine in enumerate(engines)]
+    binary_encode = time.perf_counter() - start
+    start = time.perf_counter()
+    dumps = [json_snapshot(engine) for engine in engines]
+    json_encode = time.perf_counter() - start
+
+    restored = [GameEngine() for _ in engines]
+    start = time.perf_counter()
+    for snapshot, engine in zip(binary, restored):
+        decode_session(snapshot, engine)
+    binary_restore = time.perf_counter() - start
+    restored = [GameEngine() for _ in engines]
+    start = time.perf_counter()
+    for dump, engine in zip(dumps, restored):
+        json_restore(dump, engine)
+    json_restore_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = SessionArchive(os.path.join(directory, "sessions.db"), SessionRegistry())
+        archive.open()
+        keys = [new_resume_key() for _ in engines]
+        start = time.perf_counter()
+        archive.write_batch([(key, time.time(), snapshot) for key, snapshot in zip(keys, binary)])
+        write = time.perf_counter() - start
+        restored = [GameEngine() for _ in engines]
+        order = list(zip(keys, restored))
+        rng.shuffle(order)
+        start = time.perf_counter()
+        for key, engine in order:
+            decode_session(archive.load(key), engine)
+        lookup_restore = time.perf_counter() - start
+        file_size = os.path.getsize(archive.path) + os.path.getsize(archive.path + "-wal")
+        archive.close()
+
+    entities = statistics.mean(len(engine.obstacles) + len(engine.coins) for engine in engines)
+    print(f"{sessions} sessions, {entities:.1f} entities and "
+          f"{statistics.mean(len(engine.game_inputs) for engine in engines):.0f} recorded inputs on average")
+    print(f"{'':>22} {'bytes/session':>14} {'encode/1k':>11} {'restore/1k':>11}")
+    for name, sizes, encode, restore in (("binary snapshot", binary, binary_encode, binary_restore),
+                                         ("pydantic JSON", dumps, json_encode, json_restore_time)):
+        print(f"{name:>22} {statistics.mean(map(len, sizes)):>14.0f} {per_1k(encode, sessions):>11} "
+              f"{per_1k(restore, sessions):>11}")
+    print(f"SQLite: {per_1k(write, sessions)} to write 1k in one transaction, {file_size / sessions:.0f} bytes "
+          f"per session on disk, {per_1k(lookup_restore, sessions)} to look up and restore 1k one by one")
+
+    failures = check_round_trip(engines, binary, settings.tick_rate * 60)
+    print(f"round trip: {sessions - failures}/{sessions} restored sessions played on identically")
+    if failures + (not check_reload()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--seconds", type=int, default=30, help="Longest bot-played stretch per session")
+    args = parser.parse_args()
+    run(args.sessions, args.seconds)
@@ -0,0 +1,50 @@
+"""Session load benchmark.
+
+Measures how many concurrent game sessions one process can step at 60 Hz.
+Sessions are created through the session registry and stepped in batches by
+the shared tick scheduler, doubling the session count until one round of ticks no longer fits the frame
+budget.
+
+Usage: python -m benchmarks.session_load [--max-sessions N] [--ticks N]
+"""
+import argparse
+import time
+from app.services.session_registry import SessionRegistry
+from app.services.tick_scheduler import TickScheduler
+
+TICK_RATE = 60
+FRAME_BUDGET = 1 / TICK_RATE
+
+def measure_round(registry: SessionRegistry, ticks: int) -> float:
+    """Average wall time to step every session once"""
+    scheduler = TickScheduler(registry.engines, tick_rate=TICK_RATE)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        scheduler.tick()
+    return (time.perf_counter() - start) / ticks
+
+def run(max_sessions: int, ticks: int):
+    registry = SessionRegistry(max_sessions=max_sessions, idle_timeout=float('inf'))
+    count = 1
+    capacity = estimate = 0
+    print(f"{'sessions':>10} {'ms/round':>10} {'budget %':>10}")
+    while count <= max_sessions:
+        while len(registry) < count:
+            registry.create(f"bench-{len(registry)}").engine.start_game()
+        per_round = measure_round(registry, ticks)
+        estimate = int(count * FRAME_BUDGET / per_round)
+        usage = per_round / FRAME_BUDGET * 100
+        print(f"{count:>10} {per_round * 1000:>10.3f} {usage:>9.1f}%")
+        if per_round > FRAME_BUDGET:
+            break
+        capacity = count
+        count *= 2
+    # Linear extrapolation from the largest round measured
+    print(f"\nMax sessions at {TICK_RATE} Hz: {capacity} measured, ~{estimate} estimated")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-sessions", type=int, default=65536)
+    parser.add_argument("--ticks", type=int, default=60)
+    args = parser.parse_args()
+    run(args.max_sessions, args.ticks)
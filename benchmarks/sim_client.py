@@ -0,0 +1,174 @@
+"""Simulated browser client for benchmarks that talk to a running server.
+
+Loads the game page, opens the NiceGUI socket.io connection the way the
+browser does, decodes the state frames pushed to ``window.gameClient`` and
+sends inputs either as websocket input frames or as REST calls.
+"""
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import aiohttp
+import socketio
+
+FRAME_PATTERN = re.compile(r"updateGameDisplay\((\{.*\})\);")
+LISTENER_PATTERN = re.compile(r'"listener_id":"([^"]+)","type":"([^"]+)"')
+
+@contextmanager
+def run_server(port: int, env: Optional[Dict[str, str]] = None, timeout: float = 30.0) -> Iterator[subprocess.Popen]:
+    """Start the app in a subprocess and wait until /health answers"""
+    process = subprocess.Popen(
+        [sys.executable, "main.py"],
+        env={**os.environ, "PORT": str(port), **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_health(f"http://127.0.0.1:{port}", timeout)
+        yield process
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def wait_for_health(base_url: str, timeout: float) -> float:
+    """Poll /health until it returns 200; return the seconds waited"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"{base_url} did not become healthy within {timeout}s")
+
+def process_cpu_seconds(pid: int) -> float:
+    """User + system CPU time of a process (Linux only)"""
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+class SimulatedClient:
+    """One browser tab playing the game over the real page protocol"""
+
+    def __init__(self, base_url: str, http: aiohttp.ClientSession):
+        self.base_url = base_url
+        self.http = http
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.client_id = ""
+        self.listeners: Dict[str, str] = {}  # page event type -> listener id
+        self.cookie = ""  # Worker affinity cookie when talking to the cluster router
+        self.hud: Dict[str, Any] = {}
+        self.obstacles: Dict[int, list] = {}  # id -> [x, type, speed] as of the last frame
+        self.tick = 0
+        self.frames = 0
+        self.bytes_received = 0
+        self.messages = 0
+        self.message_counts: Counter = Counter()  # socket.io event -> messages received
+        self.message_bytes: Counter = Counter()  # socket.io event -> JSON bytes received
+        self.last_frame_at = 0.0
+        self.frame_event = asyncio.Event()
+        self.sio.on("*", self._on_message)
+
+    async def connect(self, path: str = "/"):
+        """Load a page and perform the socket.io handshake"""
+        async with self.http.get(f"{self.base_url}{path}") as response:
+            html = await response.text()
+            self.cookie = "; ".join(f"{name}={morsel.value}" for name, morsel in response.cookies.items())
+        self.client_id = re.search(r"'client_id': '([^']+)'", html).group(1)
+        self.listeners = {event: listener for listener, event in LISTENER_PATTERN.findall(html)}
+        await self.sio.connect(
+            f"{self.base_url}/?client_id={self.client_id}",
+            headers={"Cookie": self.cookie} if self.cookie else {},
+            socketio_path="/_nicegui_ws/socket.io", transports=["websocket"]
+        )
+        await self.sio.call("handshake", {"client_id": self.client_id, "tab_id": self.client_id})
+
+    async def disconnect(self):
+        await self.sio.disconnect()
+
+    async def _on_message(self, event: str, data: Any):
+        size = len(json.dumps(data))
+        self.messages += 1
+        self.bytes_received += size
+        self.message_counts[event] += 1
+        self.message_bytes[event] += size
+        if event != "run_javascript":
+            return
+        for match in FRAME_PATTERN.finditer(data.get("code", "")):
+            frame = json.loads(match.group(1))
+            if frame.get("kf"):
+                self.hud = {}
+                self.obstacles = {}
+            self.hud.update(frame.get("hud", {}))
+            self.apply_obstacles(frame.get("obs", {}))
+            self.tick = frame.get("t", self.tick)
+            self.frames += 1
+            self.last_frame_at = time.perf_counter()
+            self.frame_event.set()
+
+    def apply_obstacles(self, patch: Dict[str, list]):
+        """Track obstacles from a frame's add/rm/mv patch"""
+        for entity_id, x, _, _, _, kind, speed in patch.get("add", ()):
+            self.obstacles[entity_id] = [x, kind, speed]
+        for entity_id in patch.get("rm", ()):
+            self.obstacles.pop(entity_id, None)
+        for entity_id, x in patch.get("mv", ()):
+            if entity_id in self.obstacles:
+                self.obstacles[entity_id][0] = x
+
+    async def wait_for(self, predicate, timeout: float = 5.0) -> float:
+        """Wait until a frame makes predicate(hud) true; return the wait time"""
+        start = time.perf_counter()
+        while not predicate(self.hud):
+            self.frame_event.clear()
+            remaining = timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                raise TimeoutError("Expected state never arrived")
+            try:
+                await asyncio.wait_for(self.frame_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return time.perf_counter() - start
+
+    async def send_event(self, event: str, value: Any):
+        """Emit a page event the way the browser's emitEvent does"""
+        await self.sio.emit("event", {
+            "id": 0,
+            "client_id": self.client_id,
+            "listener_id": self.listeners.get(event, ""),
+            "args": [json.dumps(value)],
+        })
+
+    async def send_socket_input(self, frame: str):
+        """Send a compact input frame over the websocket"""
+        await self.send_event("game_input", frame)
+
+    async def set_hidden(self, hidden: bool):
+        """Report the tab as hidden or visible, like the page visibility API"""
+        await self.send_event("game_visibility", int(hidden))
+
+    async def send_rest_input(self, path: str):
+        """Send an input through the REST API"""
+        headers = {"X-Session-Id": self.client_id}
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        async with self.http.post(f"{self.base_url}{path}", headers=headers) as response:
+            await response.read()
+
+async def keep_playing(client: SimulatedClient):
+    """Start a game and restart it whenever it ends"""
+    while True:
+        if client.hud.get("state") != "playing":
+            await client.send_socket_input("g")
+        try:
+            await client.wait_for(lambda hud: hud.get("state") not in ("playing", None), timeout=5.0)
+        except TimeoutError:
+            pass
+        await asyncio.sleep(0.5)
@@ -0,0 +1,105 @@
+"""Spectator fan-out benchmark.
+
+Compares encoding each spectator's frames separately (what a per-viewer
+update loop would do) with encoding once per frame and sharing the packet,
+then starts the app with one bot player and measures server CPU per viewer
+as 1, 100 and 1000 spectators watch the run over real websockets.
+
+Usage: python -m benchmarks.spectators [--viewers 1,100,1000] [--hold SECONDS] [--port N]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import aiohttp
+from socketio import packet
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.state_sync import StateEncoder
+from benchmarks.sim_client import SimulatedClient, keep_playing, process_cpu_seconds, run_server
+
+def socket_packet(frame: str) -> str:
+    """The socket.io packet a run_javascript frame message is sent as"""
+    code = f"window.gameClient && window.gameClient.updateGameDisplay({frame});"
+    return packet.Packet(packet.EVENT, namespace="/", data=["run_javascript", {"code": code}]).encode()
+
+def encode_cost(viewers: int, seconds: int) -> tuple:
+    """Encoding ms per second of play: one encoder per viewer vs. one shared encoder"""
+    engine = GameEngine(seed=1)
+    engine.start_game()
+    separate = [StateEncoder() for _ in range(viewers)]
+    shared = StateEncoder()
+    separate_time = shared_time = 0.0
+    per_frame = settings.tick_rate // settings.ui_update_rate
+    for tick in range(seconds * settings.tick_rate):
+        engine.step(1 / settings.tick_rate)
+        if engine.session.state.value == "game_over":
+            engine.start_game()
+        if tick % per_frame:
+            continue
+        start = time.perf_counter()
+        for encoder in separate:
+            frame = encoder.encode(engine)
+            if frame is not None:
+                socket_packet(frame)
+        separate_time += time.perf_counter() - start
+        start = time.perf_counter()
+        frame = shared.encode(engine)
+        if frame is not None:
+            socket_packet(frame)
+        shared_time += time.perf_counter() - start
+    return separate_time / seconds * 1000, shared_time / seconds * 1000
+
+async def spectator_metrics(http: aiohttp.ClientSession, base_url: str) -> dict:
+    async with http.get(f"{base_url}/api/debug/spectators") as response:
+        return await response.json()
+
+async def watch_run(port: int, pid: int, viewer_counts: list, hold: float):
+    base_url = f"http://127.0.0.1:{port}"
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        player = SimulatedClient(base_url, http)
+        await player.connect()
+        playing = asyncio.create_task(keep_playing(player))
+        await player.wait_for(lambda hud: hud.get("state") == "playing")
+        watch_path = f"/watch/{(await (await http.get(f'{base_url}/api/watch')).json())[0]['player']}"
+
+        viewers = []
+        print(f"{'viewers':>8} {'server cpu %':>13} {'cpu us/viewer/s':>16} {'frames/s':>9} {'kf only':>8} {'dropped':>8}")
+        for count in viewer_counts:
+            while len(viewers) < count:
+                batch = [SimulatedClient(base_url, http) for _ in range(min(50, count - len(viewers)))]
+                await asyncio.gather(*(viewer.connect(watch_path) for viewer in batch))
+                viewers.extend(batch)
+            await asyncio.sleep(2.0)  # Let the joins settle onto a keyframe
+            frames = [viewer.frames for viewer in viewers]
+            before = await spectator_metrics(http, base_url)
+            cpu = process_cpu_seconds(pid)
+            await asyncio.sleep(hold)
+            cpu = process_cpu_seconds(pid) - cpu
+            after = await spectator_metrics(http, base_url)
+            rate = statistics.median((viewer.frames - seen) / hold for viewer, seen in zip(viewers, frames))
+            keyframes_only = sum(broadcast["keyframes_only"] for broadcast in after["broadcasts"])
+            print(f"{count:>8} {cpu / hold * 100:>12.1f}% {cpu / hold / count * 1e6:>16.0f} "
+                  f"{rate:>9.1f} {keyframes_only:>8} {after['dropped'] - before['dropped']:>8}")
+
+        playing.cancel()
+        await asyncio.gather(*(viewer.disconnect() for viewer in viewers), return_exceptions=True)
+        await player.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--viewers", default="1,100,1000", help="Comma-separated spectator counts")
+    parser.add_argument("--hold", type=float, default=5.0, help="Seconds measured at each count")
+    parser.add_argument("--seconds", type=int, default=10, help="Simulated seconds for the encoding comparison")
+    parser.add_argument("--port", type=int, default=8780)
+    args = parser.parse_args()
+    viewer_counts = [int(count) for count in args.viewers.split(",")]
+
+    print(f"{'viewers':>8} {'per-viewer ms/s':>16} {'shared ms/s':>12}")
+    for count in viewer_counts:
+        separate, shared = encode_cost(count, args.seconds)
+        print(f"{count:>8} {separate:>16.2f} {shared:>12.2f}")
+    print()
+    with run_server(args.port) as server:
+        asyncio.run(watch_run(args.port, server.pid, viewer_counts, args.hold))
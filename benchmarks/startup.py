@@ -0,0 +1,129 @@
+"""Cold start benchmark.
+
+Starts the app from scratch several times and measures, from process
+start:
+
+  health      first 200 from /health
+  page        first game page fully received
+  assets      the page's /static CSS and JavaScript received (as a browser
+              asks for them, with Accept-Encoding)
+  warm page   a second page load right after, for comparison
+
+It also reports how many bytes the assets took on the wire and their
+Cache-Control header. Pass --budget to fail when the median time to the
+first page exceeds it, or record a baseline and compare later runs
+against it like the headless benchmark does.
+
+Usage: python -m benchmarks.startup [--runs N] [--budget SECONDS] [--port N]
+                                    [--save-baseline [FILE]] [--compare [FILE]]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from email.message import Message
+from typing import Dict, List, Tuple
+from benchmarks.headless import compare, load_baseline
+
+DEFAULT_BASELINE = "benchmarks/startup_baseline.json"
+ASSET_PATTERN = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+def fetch(url: str, headers: Dict[str, str] = None, timeout: float = 10.0) -> Tuple[int, bytes, Message]:
+    """GET a URL; return status, body and headers, also for error statuses"""
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read(), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, b"", e.headers
+
+def cold_start(port: int, timeout: float) -> Dict[str, float]:
+    """Start the app once and time the way to a usable page"""
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as data:
+        env = {**os.environ, "PORT": str(port), "LEADERBOARD_PATH": os.path.join(data, "leaderboard.db"),
+               "SESSION_ARCHIVE_PATH": os.path.join(data, "sessions.db")}
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "main.py"], env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"{base_url} did not become healthy within {timeout}s")
+                try:
+                    if fetch(f"{base_url}/health", timeout=1)[0] == 200:
+                        break
+                except OSError:
+                    pass
+                time.sleep(0.005)
+            health = time.perf_counter() - start
+            _, page, _ = fetch(f"{base_url}/")
+            first_page = time.perf_counter() - start
+            asset_bytes, cache_control = 0, set()
+            for path in ASSET_PATTERN.findall(page.decode()):
+                status, body, headers = fetch(f"{base_url}{path}", {"Accept-Encoding": "br, gzip"})
+                asset_bytes += len(body) if status == 200 else 0
+                cache_control.add(headers.get("Cache-Control", "-") if status == 200 else f"HTTP {status}")
+            assets = time.perf_counter() - start
+            warm_start = time.perf_counter()
+            fetch(f"{base_url}/")
+            warm_page = time.perf_counter() - warm_start
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+    return {
+        "health_ms": health * 1000,
+        "first_page_ms": first_page * 1000,
+        "assets_ms": assets * 1000,
+        "warm_page_ms": warm_page * 1000,
+        "asset_bytes": asset_bytes,
+        "cache_control": ", ".join(sorted(cache_control)),
+    }
+
+def run(runs: int, port: int, timeout: float) -> Dict[str, float]:
+    samples: List[Dict[str, float]] = [cold_start(port, timeout) for _ in range(runs)]
+    print(f"{runs} cold starts, ms from process start")
+    print(f"{'':>14} {'median':>8} {'min':>8} {'max':>8}")
+    results = {}
+    for key in ("health_ms", "first_page_ms", "assets_ms", "warm_page_ms"):
+        values = [sample[key] for sample in samples]
+        results[key] = round(statistics.median(values), 1)
+        print(f"{key[:-3]:>14} {results[key]:>8.1f} {min(values):>8.1f} {max(values):>8.1f}")
+    results["asset_bytes"] = samples[-1]["asset_bytes"]
+    print(f"assets: {results['asset_bytes']} bytes on the wire, Cache-Control: {samples[-1]['cache_control']}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for /health")
+    parser.add_argument("--budget", type=float, help="Fail if the median first page takes longer (seconds)")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="FILE")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="FILE")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression before failing")
+    args = parser.parse_args()
+
+    results = run(args.runs, args.port, args.timeout)
+    failed = False
+    if args.budget is not None and results["first_page_ms"] > args.budget * 1000:
+        print(f"OVER BUDGET: first page after {results['first_page_ms']:.0f} ms, budget {args.budget * 1000:.0f} ms")
+        failed = True
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline:
+            json.dump({"config": {"runs": args.runs}, "results": results}, baseline, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.compare:
+        regressions = compare(results, load_baseline(args.compare), args.tolerance)
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        print("no regressions" if not regressions else f"{len(regressions)} regressions")
+        failed = failed or bool(regressions)
+    raise SystemExit(1 if failed else 0)
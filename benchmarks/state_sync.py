@@ -0,0 +1,60 @@
+"""State sync benchmark.
+
+Compares the legacy per-frame payload (two full ``json.dumps`` snapshots of
+``get_game_data`` pushed at 30 Hz) with the delta encoder at the configured
+client update rate over the same simulated run, and reports bytes and
+serialization time per second of play per session.
+
+Usage: python -m benchmarks.state_sync [--seconds N] [--sessions N] [--update-rate HZ]
+"""
+import argparse
+import json
+import time
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.state_sync import StateEncoder
+
+LEGACY_RATE = 30
+
+def legacy_frame(engine: GameEngine) -> int:
+    """Size of the payload the old update_game_display sent"""
+    game_data = engine.get_game_data()
+    return len(json.dumps(game_data)) + len(json.dumps(game_data))
+
+def run(seconds: int, sessions: int, update_rate: int):
+    engines = [GameEngine(seed) for seed in range(sessions)]
+    encoders = [StateEncoder() for _ in engines]
+    for engine in engines:
+        engine.start_game()
+    legacy_bytes = delta_bytes = 0
+    legacy_time = delta_time = 0.0
+    for tick in range(seconds * settings.tick_rate):
+        for engine in engines:
+            engine.step(1 / settings.tick_rate)
+            if engine.session.state.value == "game_over":
+                engine.start_game()
+        if tick % (settings.tick_rate // LEGACY_RATE) == 0:
+            start = time.perf_counter()
+            for engine in engines:
+                legacy_bytes += legacy_frame(engine)
+            legacy_time += time.perf_counter() - start
+        if tick % (settings.tick_rate // update_rate) == 0:
+            start = time.perf_counter()
+            for engine, encoder in zip(engines, encoders):
+                frame = encoder.encode(engine)
+                delta_bytes += len(frame) if frame else 0
+            delta_time += time.perf_counter() - start
+    total = seconds * sessions
+    print(f"{'':>16} {'bytes/s':>10} {'us/s':>10}")
+    print(f"{f'legacy {LEGACY_RATE} Hz':>16} {legacy_bytes / total:>10.0f} {legacy_time / total * 1e6:>10.1f}")
+    print(f"{f'delta {update_rate} Hz':>16} {delta_bytes / total:>10.0f} {delta_time / total * 1e6:>10.1f}")
+    print(f"\nBandwidth reduction {legacy_bytes / max(delta_bytes, 1):.1f}x, "
+          f"CPU reduction {legacy_time / max(delta_time, 1e-9):.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--update-rate", type=int, default=settings.ui_update_rate)
+    args = parser.parse_args()
+    run(args.seconds, args.sessions, args.update_rate)
@@ -0,0 +1,85 @@
+"""Track generation benchmark.
+
+Measures the per-tick cost of spawning from precomputed track chunks against
+the previous two random rolls per tick, the one-off cost of building the
+shared template pool, and checks that the same game seed lays out the same
+track at different tick rates.
+
+Usage: python -m benchmarks.track [--ticks N] [--rates 30,60,120]
+"""
+import argparse
+import random
+import time
+from app.components.game_engine import GameEngine, OBSTACLE_TYPES, COIN_HEIGHTS
+from app.components.track import template_pool
+from app.config import settings
+
+def roll_spawns(ticks: int) -> float:
+    """Seconds per tick for the old per-tick spawn rolls, without adding entities"""
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if rng.random() < settings.obstacle_spawn_rate:
+            rng.randrange(len(OBSTACLE_TYPES))
+        if rng.random() < settings.coin_spawn_rate:
+            rng.choice(COIN_HEIGHTS)
+    return (time.perf_counter() - start) / ticks
+
+def track_spawns(ticks: int) -> float:
+    """Seconds per tick for streaming the track at the initial speed, without adding entities"""
+    engine = GameEngine(seed=1)
+    engine.start_game()
+    track = engine.track
+    step = settings.initial_speed * 60 / settings.tick_rate
+    ignore = lambda lead, value: None
+    start = time.perf_counter()
+    for _ in range(ticks):
+        track.advance(step, ignore, ignore)
+    return (time.perf_counter() - start) / ticks
+
+def build_pool() -> float:
+    """Seconds to generate the template pool from scratch"""
+    template_pool.cache_clear()
+    start = time.perf_counter()
+    GameEngine(seed=1).start_game()
+    return time.perf_counter() - start
+
+def layout(tick_rate: int, seconds: float) -> list:
+    """Sorted (track position, y) of every entity spawned in a bot-free game"""
+    settings.tick_rate = tick_rate
+    dt = 1 / tick_rate
+    engine = GameEngine(seed=1)
+    engine.start_game(seed=42)
+    spawned = {}
+    for _ in range(int(seconds * tick_rate)):
+        engine.begin_step(dt)
+        engine.update_obstacles(dt)
+        engine.update_coins(dt)
+        engine.update_game_state(dt)
+        for store in (engine.obstacles, engine.coins):
+            for entity_id, x, y in zip(store.ids, store.x, store.y):
+                # Where on the track the entity sits, independent of when it was seen
+                spawned.setdefault((store is engine.coins, int(entity_id)), (engine.track.distance + x, y))
+    return sorted(spawned.values())
+
+def run(ticks: int, rates: list):
+    settings.max_obstacles_per_session = settings.max_coins_per_session = 1_000_000
+    print(f"template pool: {build_pool() * 1000:.1f} ms once per process "
+          f"({settings.track_templates} chunks of {settings.track_chunk_length} px)")
+    rolls, track = roll_spawns(ticks), track_spawns(ticks)
+    print(f"spawn cost per tick: random rolls {rolls * 1e9:.0f} ns, track {track * 1e9:.0f} ns")
+    tick_rate = settings.tick_rate
+    layouts = {rate: layout(rate, 60.0) for rate in rates}
+    settings.tick_rate = tick_rate
+    reference = layouts[rates[0]]
+    for rate, entities in layouts.items():
+        drift = max((abs(a[0] - b[0]) for a, b in zip(entities, reference)), default=0.0)
+        same = len(entities) == len(reference) and all(a[1] == b[1] for a, b in zip(entities, reference))
+        print(f"{rate:>4} Hz: {len(entities)} entities in 60 s, same layout: {same}, max drift {drift:.1f} px")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=1_000_000)
+    parser.add_argument("--rates", default="30,60,120", help="Tick rates to compare layouts at")
+    args = parser.parse_args()
+    run(args.ticks, [int(rate) for rate in args.rates.split(",")])
@@ -17,6 +17,13 @@ if __name__ in {"__main__", "__mp_main__"}: # Recommended by NiceGUI for multipr
     # title and favicon can be set here or in app.main using ui.run(title=..., favicon=...)
     # uvicorn_logging_level='warning' helps to reduce log noise in production
     # reload=False is important for production deployments like Fly.io
+    workers = int(os.getenv("WORKERS", 1))
+    if workers > 1 and __name__ == "__main__":
+        # Supervisor: spawn single-process workers behind a sticky router
+        from app.services.cluster import run_cluster
+        run_cluster(workers, host, port)
+        raise SystemExit(0)
+
     ui.run(
         host=host,
         port=port,
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional, Literal
+from typing import Optional, Literal
 from enum import Enum
 
 class GameState(str, Enum):
@@ -34,16 +34,6 @@ class Player(GameObject):
     action: PlayerAction = PlayerAction.RUNNING
     action_timer: float = 0.0
     
-class Obstacle(GameObject):
-    """Obstacle model"""
-    obstacle_type: ObstacleType
-    speed: float
-
-class Coin(GameObject):
-    """Collectible coin model"""
-    collected: bool = False
-    spin_angle: float = 0.0
-
 class GameSession(BaseModel):
     """Current game session data"""
     state: GameState = GameState.MENU
@@ -53,11 +43,14 @@ class GameSession(BaseModel):
     speed: float = 2.0
     high_score: int = 0
     
-    # Game objects
+    # Game objects; obstacles and coins live in the engine's entity stores
     player: Player = Player(x=100, y=300, width=40, height=60)
-    obstacles: List[Obstacle] = []
-    coins: List[Coin] = []
     
     # Timing
     last_update: float = 0.0
-    game_time: float = 0.0
\ No newline at end of file
+    game_time: float = 0.0
+
+class ReplayClaim(BaseModel):
+    """A score submitted together with the replay that produced it"""
+    replay: str
+    score: int
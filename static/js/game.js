@@ -1,14 +1,116 @@
 // Temple Run Game Client-Side Logic
 
+// Canvas fill colours, matching the gradients in game.css
+const OBSTACLE_COLORS = { high: '#92400e', low: '#dc2626', moving: '#7c3aed' };
+const COIN_COLOR = '#fbbf24';
+const PLAYER_COLOR = '#3b82f6';
+const FRAME_SAMPLES = 120;  // Frames the overlay's statistics cover
+
 class GameClient {
     constructor() {
         this.gameData = null;
+        this.lastSeq = 0;
+        this.player = { x: 100, y: 300 };
+        this.obstacles = new Map();  // id -> obstacle
+        this.coins = new Map();  // id -> coin
+        this.elements = new Map();  // entity id -> DOM element
+        this.pools = { obstacle: [], coin: [] };  // Hidden elements waiting for reuse
+        this.domCache = new Map();  // selector -> element
+        this.canvas = null;
+        this.context = null;
+        this.canvasWidth = 0;
+        this.canvasHeight = 0;
+        this.overlay = null;
+        this.frameTimes = new Float32Array(FRAME_SAMPLES);  // Time between frames, ms
+        this.workTimes = new Float32Array(FRAME_SAMPLES);  // Time spent simulating and rendering, ms
+        this.frameIndex = 0;
+        this.framesCounted = 0;
+        this.overlayUpdated = 0;
         this.updateInterval = null;
+        
+        // Prediction state; constants are replaced by configure()
+        this.config = {
+            tickRate: 60, updateRate: 10, maxSpeed: 8, speedIncrement: 0.1,
+            distanceScore: 1, jumpDuration: 0.6, slideDuration: 0.4
+        };
+        this.speed = 0;
+        this.actionTimer = 0;
+        this.predictedAction = null;
+        this.predictedUntil = 0;
+        this.sinceFrame = 0;
+        this.serverTick = 0;
+        this.lastFrameTime = 0;
+        this.spectating = false;
         this.keyStates = {};
         this.touchStartY = 0;
         this.touchStartX = 0;
         
         this.initializeControls();
+        this.applyDisplayOptions();
+        requestAnimationFrame((now) => this.renderLoop(now));
+    }
+    
+    configure(config) {
+        Object.assign(this.config, config);
+        this.applyDisplayOptions();
+        if (document.hidden) this.reportVisibility();
+    }
+    
+    applyDisplayOptions() {
+        // ?renderer=canvas and ?fps=1 override the server's defaults
+        const params = new URLSearchParams(window.location.search);
+        if ((params.get('renderer') || this.config.renderer) === 'canvas') this.useCanvas();
+        if (params.has('fps') ? params.get('fps') !== '0' : this.config.frameOverlay) this.showFrameOverlay();
+    }
+    
+    el(selector) {
+        // Cached lookup, redone if the element was replaced
+        let el = this.domCache.get(selector);
+        if (!el || !el.isConnected) {
+            el = document.querySelector(selector);
+            if (el) this.domCache.set(selector, el);
+        }
+        return el;
+    }
+    
+    setText(selector, text) {
+        // Only touch the DOM when the text actually changes
+        const el = this.el(selector);
+        text = String(text);
+        if (el && el.textContent !== text) el.textContent = text;
+    }
+    
+    reportVisibility() {
+        // Background tabs get fewer frames; spectators share one stream
+        if (this.spectating || typeof emitEvent !== 'function') return;
+        emitEvent('game_visibility', document.hidden ? 1 : 0);
+    }
+    
+    watch() {
+        // Spectators only render frames; inputs are never predicted or sent
+        this.spectating = true;
+    }
+    
+    endSession(message) {
+        // The server dropped this session: stop sending inputs and say why
+        this.spectating = true;
+        for (const selector of ['.pause-screen', '.game-over-screen']) {
+            const screen = this.el(selector);
+            if (screen) screen.style.display = 'none';
+        }
+        const menu = this.el('.game-menu');
+        if (menu) {
+            const notice = document.createElement('h2');
+            notice.className = 'game-over-title';
+            notice.textContent = message;
+            menu.replaceChildren(notice);
+            menu.style.display = 'block';
+        }
+    }
+    
+    endWatch() {
+        const banner = document.querySelector('.spectator-banner');
+        if (banner) banner.textContent = 'The run has ended';
     }
     
     initializeControls() {
@@ -23,6 +125,8 @@ class GameClient {
             } else if (e.code === 'Enter') {
                 e.preventDefault();
                 this.handleAction();
+            } else if (e.code === 'KeyF') {
+                this.overlay ? this.hideFrameOverlay() : this.showFrameOverlay();
             }
         });
         
@@ -54,6 +158,8 @@ class GameClient {
             this.touchStartX = 0;
         });
         
+        document.addEventListener('visibilitychange', () => this.reportVisibility());
+        
         // Prevent default touch behaviors
         document.addEventListener('touchmove', (e) => {
             e.preventDefault();
@@ -61,111 +167,389 @@ class GameClient {
     }
     
     jump() {
-        if (window.gameEngine) {
+        if (this.predictAction('jumping', this.config.jumpDuration) && window.gameEngine) {
             window.gameEngine.player_jump();
         }
     }
     
     slide() {
-        if (window.gameEngine) {
+        if (this.predictAction('sliding', this.config.slideDuration) && window.gameEngine) {
             window.gameEngine.player_slide();
         }
     }
     
+    sendInput(code) {
+        // Compact input frame: action code plus the base-36 server tick it
+        // was pressed on, sent over the page's existing websocket
+        if (this.spectating || typeof emitEvent !== 'function') return;
+        const tick = this.serverTick + Math.floor(this.sinceFrame * this.config.tickRate);
+        emitEvent('game_input', code + tick.toString(36));
+    }
+    
+    predictAction(action, duration) {
+        // Apply the input locally right away; the server confirms it later
+        const data = this.gameData;
+        if (this.spectating || !data || data.state !== 'playing' || data.action !== 'running') return false;
+        data.action = action;
+        this.actionTimer = duration;
+        this.predictedAction = action;
+        this.predictedUntil = performance.now() + 1000 / this.config.updateRate * 3;
+        return true;
+    }
+    
     handleAction() {
         if (window.gameEngine) {
             const state = window.gameEngine.session.state;
             if (state === 'menu' || state === 'game_over') {
                 window.gameEngine.start_game();
+            } else if (state === 'paused') {
+                window.gameEngine.resume_game();
+            }
+        }
+    }
+    
+    updateGameDisplay(frame) {
+        // Frames are sequenced deltas; drop stale ones and wait for the
+        // next keyframe if we missed something
+        let previous = null;
+        if (frame.kf) {
+            previous = new Map([...this.obstacles, ...this.coins]);
+            this.obstacles.clear();
+            this.coins.clear();
+            this.gameData = { action: this.gameData && this.gameData.action };
+            if (frame.player) this.player = frame.player;
+        } else if (!this.gameData || frame.seq !== this.lastSeq + 1) {
+            return;
+        }
+        this.lastSeq = frame.seq;
+        this.serverTick = frame.t;
+        this.sinceFrame = 0;
+        
+        this.applyHud(frame.hud || {});
+        this.applyObstaclePatch(frame.obs);
+        this.applyCoinPatch(frame.coin);
+        if (previous) {
+            // Keyframes re-add everything; reconcile entities we already had
+            previous.forEach((old, id) => {
+                const entity = this.obstacles.get(id) || this.coins.get(id);
+                if (entity) entity.offset = old.x + old.offset - entity.x;
+            });
+        }
+        if (window.gameEngine) window.gameEngine.session.state = this.gameData.state;
+        if (frame.hud && 'state' in frame.hud) this.applyScreens(this.gameData.state);
+    }
+    
+    applyScreens(state) {
+        // The menu and game-over screens follow the game state, which the
+        // server sends once per change; keyframes repeat it, so act on changes only
+        if (state === this.screenState) return;
+        this.screenState = state;
+        if (state === 'game_over') this.showGameOver(this.gameData);
+        else this.hideGameOver();
+        if (state === 'menu') this.showMenu();
+        else this.hideMenu();
+        const pauseScreen = this.el('.pause-screen');
+        if (pauseScreen) pauseScreen.style.display = state === 'paused' ? 'flex' : 'none';
+    }
+    
+    applyHud(hud) {
+        const data = this.gameData;
+        const localAction = data.action;
+        Object.assign(data, hud);
+        if ('speed' in hud) this.speed = hud.speed;
+        
+        // Keep a predicted jump/slide until the server has caught up with it
+        if (this.predictedAction) {
+            if (data.action === this.predictedAction || performance.now() > this.predictedUntil) {
+                this.predictedAction = null;
+            } else {
+                data.action = localAction;
             }
+        } else if ('action' in hud && hud.action !== localAction) {
+            this.actionTimer = hud.action === 'jumping' ? this.config.jumpDuration
+                : hud.action === 'sliding' ? this.config.slideDuration : 0;
+        }
+    }
+    
+    applyObstaclePatch(patch) {
+        if (!patch) return;
+        (patch.add || []).forEach(([id, x, y, width, height, type, speed]) => {
+            this.obstacles.set(id, { id, x, y, width, height, type, speed, offset: 0 });
+        });
+        (patch.rm || []).forEach(id => this.obstacles.delete(id));
+        (patch.mv || []).forEach(([id, x]) => {
+            const obstacle = this.obstacles.get(id);
+            if (obstacle) this.reconcile(obstacle, x);
+        });
+    }
+    
+    applyCoinPatch(patch) {
+        if (!patch) return;
+        (patch.add || []).forEach(([id, x, y, spin, collected]) => {
+            this.coins.set(id, { id, x, y, spin, collected, offset: 0 });
+        });
+        (patch.rm || []).forEach(id => this.coins.delete(id));
+        (patch.mv || []).forEach(([id, x, spin, collected]) => {
+            const coin = this.coins.get(id);
+            if (!coin) return;
+            this.reconcile(coin, x);
+            Object.assign(coin, { spin, collected });
+        });
+    }
+    
+    reconcile(entity, serverX) {
+        // Snap to the authoritative position but blend the prediction error
+        // out over a few frames instead of jumping
+        entity.offset += entity.x - serverX;
+        entity.x = serverX;
+    }
+    
+    renderLoop(now) {
+        const frameMs = this.lastFrameTime ? now - this.lastFrameTime : 0;
+        const dt = Math.min(frameMs / 1000, 0.1);
+        this.lastFrameTime = now;
+        if (this.gameData) {
+            this.simulate(dt);
+            this.render();
         }
+        if (this.overlay && frameMs) this.recordFrame(now, frameMs, performance.now() - now);
+        requestAnimationFrame((next) => this.renderLoop(next));
     }
     
-    updateGameDisplay(gameData) {
-        this.gameData = gameData;
+    simulate(dt) {
+        // Mirror of GameEngine.step between authoritative frames
+        const data = this.gameData;
+        const config = this.config;
+        const decay = Math.exp(-dt / 0.1);
+        this.sinceFrame += dt;
+        if (data.state !== 'playing') return;
         
-        // Update player position and animation
-        this.updatePlayer(gameData.player);
+        if (this.actionTimer > 0) {
+            this.actionTimer -= dt;
+            if (this.actionTimer <= 0) {
+                this.actionTimer = 0;
+                data.action = 'running';
+            }
+        }
         
-        // Update obstacles
-        this.updateObstacles(gameData.obstacles);
+        this.obstacles.forEach((obstacle, id) => {
+            obstacle.x -= obstacle.speed * 60 * dt;
+            obstacle.offset *= decay;
+            if (obstacle.x < -obstacle.width) this.obstacles.delete(id);
+        });
+        this.coins.forEach((coin, id) => {
+            coin.x -= this.speed * 60 * dt;
+            coin.spin = (coin.spin + 360 * dt) % 360;
+            coin.offset *= decay;
+            if (coin.x < -20) this.coins.delete(id);
+        });
         
-        // Update coins
-        this.updateCoins(gameData.coins);
+        if (this.speed < config.maxSpeed) {
+            this.speed += config.speedIncrement * dt;
+        }
+    }
+    
+    render() {
+        const data = this.gameData;
+        const ticks = Math.floor(this.sinceFrame * this.config.tickRate);
+        const playing = data.state === 'playing';
         
-        // Update UI
-        this.updateUI(gameData);
+        if (this.canvas) {
+            this.drawCanvas(data.action);
+        } else {
+            this.updatePlayer(this.player, data.action);
+            this.updateObstacles(this.obstacles);
+            this.updateCoins(this.coins);
+            this.removeStaleElements();
+        }
+        
+        // Update UI with predicted score/distance since the last frame
+        this.updateUI(
+            playing ? data.score + ticks * this.config.distanceScore : data.score,
+            playing ? data.distance + Math.floor(this.sinceFrame * 10) : data.distance,
+            data.coins,
+            playing ? this.speed.toFixed(1) : data.speed,
+            data.high_score
+        );
     }
     
-    updatePlayer(playerData) {
-        const player = document.querySelector('.player');
-        if (player) {
-            player.style.left = `${playerData.x}px`;
-            player.style.bottom = `${400 - playerData.y - 60}px`; // Adjust for ground level
+    updatePlayer(player, action) {
+        const playerEl = this.el('.player');
+        if (playerEl) {
+            playerEl.style.left = `${player.x}px`;
+            playerEl.style.bottom = `${400 - player.y - 60}px`; // Adjust for ground level
             
             // Update animation class
-            player.className = `player ${playerData.action}`;
+            const className = `player ${action}`;
+            if (playerEl.className !== className) playerEl.className = className;
         }
     }
     
+    entityElement(kind, id) {
+        // Reuse a pooled element before creating one; entities keep theirs by id
+        let el = this.elements.get(id);
+        if (el) return el;
+        const gameArea = this.el('.game-area');
+        if (!gameArea) return null;
+        el = this.pools[kind].pop();
+        if (el) {
+            el.style.display = '';
+        } else {
+            el = document.createElement('div');
+            gameArea.appendChild(el);
+        }
+        el.dataset.kind = kind;
+        this.elements.set(id, el);
+        return el;
+    }
+    
     updateObstacles(obstacles) {
-        const gameArea = document.querySelector('.game-area');
-        if (!gameArea) return;
-        
-        // Remove existing obstacles
-        const existingObstacles = gameArea.querySelectorAll('.obstacle');
-        existingObstacles.forEach(obs => obs.remove());
-        
-        // Add current obstacles
+        // Elements are moved with the translate property, which skips layout
+        // and does not fight the CSS animations on transform
         obstacles.forEach(obstacle => {
-            const obstacleEl = document.createElement('div');
-            obstacleEl.className = `obstacle ${obstacle.type}`;
-            obstacleEl.style.left = `${obstacle.x}px`;
-            obstacleEl.style.bottom = `${400 - obstacle.y - obstacle.height}px`;
-            obstacleEl.style.width = `${obstacle.width}px`;
-            obstacleEl.style.height = `${obstacle.height}px`;
-            gameArea.appendChild(obstacleEl);
+            let obstacleEl = this.elements.get(obstacle.id);
+            if (!obstacleEl) {
+                obstacleEl = this.entityElement('obstacle', obstacle.id);
+                if (!obstacleEl) return;
+                obstacleEl.className = `obstacle ${obstacle.type}`;
+                obstacleEl.style.bottom = `${400 - obstacle.y - obstacle.height}px`;
+                obstacleEl.style.width = `${obstacle.width}px`;
+                obstacleEl.style.height = `${obstacle.height}px`;
+            }
+            obstacleEl.style.translate = `${obstacle.x + obstacle.offset}px`;
         });
     }
     
     updateCoins(coins) {
-        const gameArea = document.querySelector('.game-area');
-        if (!gameArea) return;
-        
-        // Remove existing coins
-        const existingCoins = gameArea.querySelectorAll('.coin');
-        existingCoins.forEach(coin => coin.remove());
-        
-        // Add current coins
         coins.forEach(coin => {
-            if (!coin.collected) {
-                const coinEl = document.createElement('div');
+            let coinEl = this.elements.get(coin.id);
+            if (!coinEl) {
+                coinEl = this.entityElement('coin', coin.id);
+                if (!coinEl) return;
                 coinEl.className = 'coin';
-                coinEl.style.left = `${coin.x}px`;
                 coinEl.style.bottom = `${400 - coin.y - 20}px`;
-                coinEl.style.transform = `rotateY(${coin.spin}deg)`;
-                gameArea.appendChild(coinEl);
             }
+            const display = coin.collected ? 'none' : '';
+            if (coinEl.style.display !== display) coinEl.style.display = display;
+            coinEl.style.translate = `${coin.x + coin.offset}px`;
         });
     }
     
-    updateUI(gameData) {
-        // Update score display
-        const scoreEl = document.querySelector('.score-value');
-        if (scoreEl) scoreEl.textContent = gameData.score;
-        
-        const distanceEl = document.querySelector('.distance-value');
-        if (distanceEl) distanceEl.textContent = `${gameData.distance}m`;
+    removeStaleElements() {
+        // Hide and pool elements whose entity is gone instead of removing them
+        this.elements.forEach((el, id) => {
+            if (!this.obstacles.has(id) && !this.coins.has(id)) {
+                el.style.display = 'none';
+                this.pools[el.dataset.kind].push(el);
+                this.elements.delete(id);
+            }
+        });
+    }
+    
+    useCanvas() {
+        // Draw entities on one canvas instead of positioning an element each
+        const gameArea = this.el('.game-area');
+        if (this.canvas || !gameArea) return;
+        this.canvas = document.createElement('canvas');
+        this.canvas.className = 'game-canvas';
+        gameArea.appendChild(this.canvas);
+        this.context = this.canvas.getContext('2d');
+        const playerEl = this.el('.player');
+        if (playerEl) playerEl.style.display = 'none';
+        this.elements.forEach(el => el.remove());
+        this.elements.clear();
+        this.pools = { obstacle: [], coin: [] };
+        this.resizeCanvas();
+        window.addEventListener('resize', () => this.resizeCanvas());
+    }
+    
+    resizeCanvas() {
+        const ratio = window.devicePixelRatio || 1;
+        const area = this.canvas.parentElement;
+        this.canvasWidth = area.clientWidth;
+        this.canvasHeight = area.clientHeight;
+        this.canvas.width = Math.round(this.canvasWidth * ratio);
+        this.canvas.height = Math.round(this.canvasHeight * ratio);
+        this.context.setTransform(ratio, 0, 0, ratio, 0, 0);
+    }
+    
+    drawCanvas(action) {
+        const ctx = this.context;
+        // Game y is measured down from 400px above the area's bottom edge,
+        // like the DOM path's bottom offsets
+        const top = this.canvasHeight - 400;
+        ctx.clearRect(0, 0, this.canvasWidth, this.canvasHeight);
         
-        const coinsEl = document.querySelector('.coins-value');
-        if (coinsEl) coinsEl.textContent = gameData.coins;
+        this.obstacles.forEach(obstacle => {
+            ctx.fillStyle = OBSTACLE_COLORS[obstacle.type] || OBSTACLE_COLORS.high;
+            ctx.fillRect(obstacle.x + obstacle.offset, top + obstacle.y, obstacle.width, obstacle.height);
+        });
         
-        const speedEl = document.querySelector('.speed-value');
-        if (speedEl) speedEl.textContent = `${gameData.speed}x`;
+        ctx.fillStyle = COIN_COLOR;
+        this.coins.forEach(coin => {
+            if (coin.collected) return;
+            // Squash horizontally with the spin angle
+            const radiusX = Math.max(1, 10 * Math.abs(Math.cos(coin.spin * Math.PI / 180)));
+            ctx.beginPath();
+            ctx.ellipse(coin.x + coin.offset + 10, top + coin.y + 10, radiusX, 10, 0, 0, 2 * Math.PI);
+            ctx.fill();
+        });
         
-        // Update high score
-        const highScoreEl = document.querySelector('.high-score-value');
-        if (highScoreEl) highScoreEl.textContent = gameData.high_score;
+        const player = this.player;
+        let lift = 0;
+        let height = 60;
+        if (action === 'jumping') {
+            lift = 80 * Math.sin(Math.PI * (1 - this.actionTimer / this.config.jumpDuration));
+        } else if (action === 'sliding') {
+            height = 30;
+        }
+        ctx.fillStyle = PLAYER_COLOR;
+        ctx.fillRect(player.x, top + player.y + 60 - height - lift, 40, height);
+    }
+    
+    showFrameOverlay() {
+        if (this.overlay) return;
+        this.overlay = document.createElement('div');
+        this.overlay.className = 'frame-overlay';
+        document.body.appendChild(this.overlay);
+        this.framesCounted = 0;
+        this.overlayUpdated = performance.now();
+    }
+    
+    hideFrameOverlay() {
+        if (!this.overlay) return;
+        this.overlay.remove();
+        this.overlay = null;
+    }
+    
+    recordFrame(now, frameMs, workMs) {
+        // Ring buffers of recent frames; the text is refreshed twice a second
+        this.frameTimes[this.frameIndex] = frameMs;
+        this.workTimes[this.frameIndex] = workMs;
+        this.frameIndex = (this.frameIndex + 1) % FRAME_SAMPLES;
+        this.framesCounted++;
+        const elapsed = now - this.overlayUpdated;
+        if (elapsed < 500) return;
+        const count = Math.min(this.framesCounted, FRAME_SAMPLES);
+        const frames = Array.from(this.frameTimes.subarray(0, count)).sort((a, b) => a - b);
+        let work = 0;
+        for (let i = 0; i < count; i++) work += this.workTimes[i];
+        const fps = this.framesCounted / elapsed * 1000;
+        this.overlay.textContent =
+            `${fps.toFixed(0)} fps  ${this.canvas ? 'canvas' : 'dom'}\n` +
+            `frame p50 ${frames[count >> 1].toFixed(1)} p95 ${frames[Math.floor(count * 0.95)].toFixed(1)} ` +
+            `max ${frames[count - 1].toFixed(1)} ms\n` +
+            `work ${(work / count).toFixed(2)} ms/frame`;
+        this.framesCounted = 0;
+        this.overlayUpdated = now;
+    }
+    
+    updateUI(score, distance, coins, speed, highScore) {
+        this.setText('.score-value', score);
+        this.setText('.distance-value', `${distance}m`);
+        this.setText('.coins-value', coins);
+        this.setText('.speed-value', `${speed}x`);
+        this.setText('.high-score-value', highScore);
     }
     
     showGameOver(gameData) {
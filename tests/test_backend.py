@@ -0,0 +1,36 @@
+"""State backends: in-process, and RESP against the stand-in server"""
+import asyncio
+import pytest
+from app.services.backend import InProcessBackend, RespBackend, RespServer, StateBackend
+
+async def exercise(backend: StateBackend):
+    await backend.set_many({"worker:0": "a", "worker:1": "b", "session:x": "c"})
+    await backend.set_many({"worker:gone": "d"}, ttl=0.01)
+    await asyncio.sleep(0.02)
+    assert await backend.get("session:x") == "c"
+    assert await backend.get("session:missing") is None
+    assert await backend.scan("worker:") == {"worker:0": "a", "worker:1": "b"}
+    await backend.delete("worker:1")
+    assert await backend.scan("worker:") == {"worker:0": "a"}
+    await backend.zadd("top", {"low": 1, "mid": 5, "high": 9})
+    await backend.ztrim("top", 2)
+    assert await backend.ztop("top", 10) == [("high", 9.0), ("mid", 5.0)]
+
+def test_in_process_backend():
+    asyncio.run(exercise(InProcessBackend()))
+
+def test_resp_backend():
+    async def run():
+        server = RespServer()
+        port = await server.start()
+        backend = RespBackend(f"redis://127.0.0.1:{port}/0")
+        try:
+            await exercise(backend)
+        finally:
+            await backend.close()
+            await server.stop()
+    asyncio.run(run())
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        StateBackend()
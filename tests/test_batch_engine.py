@@ -0,0 +1,51 @@
+"""The NumPy batch engine must play exactly like the per-object engine"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.components.batch_engine import BatchPhysics
+from app.components.game_engine import GameEngine
+from app.config import settings
+from benchmarks.batch_physics import snapshot
+from benchmarks.bot import bot_inputs
+from models.game_models import GameState
+
+DT = 1 / settings.tick_rate
+
+def test_batch_matches_objects_tick_for_tick():
+    sessions = 20
+    batch = BatchPhysics(rows=8)  # Fewer rows than sessions, so the table has to grow
+    objects = [GameEngine(seed) for seed in range(sessions)]
+    batched = [batch.create_engine(seed) for seed in range(sessions)]
+    for engine in objects + batched:
+        engine.start_game()
+    game_overs = 0
+    for _ in range(settings.tick_rate * 30):
+        for engine in objects + batched:
+            bot_inputs(engine)
+        for engine in objects:
+            engine.step(DT)
+        batch.step(batched, DT)
+        game_overs += sum(engine.session.state == GameState.GAME_OVER for engine in objects)
+        for expected, actual in zip(objects, batched):
+            assert snapshot(actual) == snapshot(expected), f"diverged at tick {expected.tick}"
+    assert game_overs > 0  # Crashes and restarts were covered too
+
+def test_released_row_is_reused_once_and_not_shared():
+    batch = BatchPhysics(rows=2)
+    released = batch.create_engine(1)
+    row = released.obstacles.row
+    batch.release(released)
+    batch.release(released)  # A second release must not free the row twice
+    assert batch.free_rows.count(row) == 1
+    reused = batch.create_engine(2)
+    assert reused.obstacles.row == row
+    reused.start_game()
+    for _ in range(settings.tick_rate * 5):
+        batch.step([reused], DT)
+    count = len(reused.obstacles)
+    assert count
+    released.start_game()  # The old engine now only has stores of its own
+    for _ in range(settings.tick_rate * 5):
+        released.step(DT)
+    assert len(reused.obstacles) == count
@@ -0,0 +1,15 @@
+"""Websocket input frames"""
+import pytest
+from app.services.input_protocol import ACTION_CODES, base36, decode_input, encode_input
+
+@pytest.mark.parametrize("action", list(ACTION_CODES.values()))
+@pytest.mark.parametrize("tick", [None, 0, 35, 36, 1_000_000])
+def test_round_trip(action, tick):
+    assert decode_input(encode_input(action, tick)) == (action, tick)
+
+@pytest.mark.parametrize("frame", ["", "x", "x1", "j!", "j" + "z" * 16, None, 7, ["j"]])
+def test_malformed_frames_are_dropped(frame):
+    assert decode_input(frame) is None
+
+def test_base36():
+    assert [base36(value) for value in (0, 35, 36, 1295)] == ["0", "z", "10", "zz"]
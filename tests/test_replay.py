@@ -0,0 +1,56 @@
+"""Replays must re-simulate to exactly the score the game earned"""
+import pytest
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.replay import Replay, replay_score
+from benchmarks.bot import bot_inputs
+from models.game_models import GameState
+
+DT = 1 / settings.tick_rate
+
+def play_game(seed: int) -> GameEngine:
+    engine = GameEngine(seed)
+    engine.start_game()
+    while engine.session.state != GameState.GAME_OVER and engine.game_tick < settings.tick_rate * 120:
+        bot_inputs(engine)
+        engine.step(DT)
+    return engine
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replay_scores_match(seed):
+    engine = play_game(seed)
+    text = Replay.from_engine(engine).encode()
+    assert Replay.decode(text).encode() == text
+    assert replay_score(text) == engine.session.score
+
+@pytest.mark.parametrize("rate", [1, settings.tick_rate * 2, 1_000_000])
+def test_foreign_tick_rate_is_rejected(rate):
+    replay = Replay.from_engine(play_game(0))
+    replay.tick_rate = rate
+    with pytest.raises(ValueError):
+        Replay.decode(replay.encode())
+
+@pytest.mark.parametrize("text", ["", "r1.60.1.2.", "r2.60.1.2", "r2.60.1.2.x1", "r2.60.1.2.g1",
+                                  f"r2.60.1.{settings.max_replay_ticks + 1:x}."])
+def test_malformed_replays_are_rejected(text):
+    with pytest.raises(ValueError):
+        Replay.decode(text)
+
+def test_button_inputs_are_replayed(monkeypatch):
+    from app.components.ui_components import GameUI
+    engine = GameEngine(7)
+    buttons = GameUI(engine)
+    monkeypatch.setattr(buttons, "hide_menu", lambda: None)
+    monkeypatch.setattr(buttons, "hide_pause", lambda: None)
+    buttons.start_game()
+    paused = False
+    while engine.session.state != GameState.GAME_OVER and engine.game_tick < settings.tick_rate * 120:
+        if not paused and engine.game_tick == settings.tick_rate * 2:
+            engine.queue_input("pause")
+            paused = True
+        elif engine.session.state == GameState.PAUSED and engine.tick % settings.tick_rate == 0:
+            buttons.resume_game()  # The pause screen's Continue button
+        bot_inputs(engine)
+        engine.step(DT)
+    assert any(action == "resume" for _, action in engine.game_inputs)
+    assert replay_score(Replay.from_engine(engine).encode()) == engine.session.score
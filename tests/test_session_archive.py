@@ -0,0 +1,64 @@
+"""Session snapshots: restored games play on identically, and reloads keep the game"""
+import pytest
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.session_archive import SessionArchive, decode_session, encode_session, new_resume_key
+from app.services.session_registry import SessionRegistry
+from benchmarks.bot import bot_inputs
+from models.game_models import GameState
+
+DT = 1 / settings.tick_rate
+
+def play(engine: GameEngine, ticks: int):
+    for _ in range(ticks):
+        bot_inputs(engine)
+        engine.step(DT)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_restored_session_plays_on_identically(seed):
+    engine = GameEngine(seed)
+    engine.start_game()
+    play(engine, settings.tick_rate * (seed + 1) * 2)
+    restored = GameEngine()
+    assert decode_session(encode_session("Runner-test", engine), restored) == "Runner-test"
+    restored.rng.setstate(engine.rng.getstate())  # Not archived: it only seeds the next game
+    for _ in range(settings.tick_rate * 30):
+        bot_inputs(engine)
+        bot_inputs(restored)
+        engine.step(DT)
+        restored.step(DT)
+    assert encode_session("", restored) == encode_session("", engine)
+
+@pytest.mark.parametrize("data", [b"", b"TRSS", b"XXXX\x01" + b"\0" * 200])
+def test_unreadable_snapshots_raise_value_error(data):
+    with pytest.raises(ValueError):
+        decode_session(data, GameEngine())
+
+def test_truncated_snapshot_raises_value_error():
+    engine = GameEngine(1)
+    engine.start_game()
+    play(engine, settings.tick_rate * 3)
+    data = encode_session("Runner-test", engine)
+    with pytest.raises(ValueError):
+        decode_session(data[:-5], GameEngine())
+
+def test_reload_hands_the_running_game_over():
+    registry = SessionRegistry()
+    archive = SessionArchive(":memory:", registry)
+    old = registry.create("old-page")
+    key = old.resume_key = new_resume_key()
+    old.engine.start_game()
+    player = old.player
+    for _ in range(300):
+        old.engine.step(DT)
+    new = registry.create("new-page")  # NiceGUI still holds the old page for a few seconds
+    assert archive.resume(new, key)
+    assert new.engine.game_tick == 300
+    assert new.engine.session.state == GameState.PAUSED
+    assert new.player == player and old.player != player  # Names stay unique among live sessions
+    assert registry.find_player(player) is new
+    registry.remove(old.session_id)
+    archive.collect()
+    restored = GameEngine()
+    decode_session(archive.load(key), restored)
+    assert restored.game_tick == 300
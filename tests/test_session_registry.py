@@ -0,0 +1,36 @@
+"""Session registry bookkeeping"""
+import itertools
+from app.services import session_registry as registry_module
+from app.services.session_registry import SessionRegistry
+
+def test_player_names_are_unique(monkeypatch):
+    names = itertools.chain(["Runner-0000", "Runner-0000", "Runner-0000"], (f"Runner-{i}" for i in itertools.count(1)))
+    monkeypatch.setattr(registry_module, "new_player_name", lambda: next(names))
+    registry = SessionRegistry()
+    first, second = registry.create("a"), registry.create("b")
+    assert first.player == "Runner-0000"
+    assert second.player != first.player
+    assert registry.find_player(second.player) is second
+
+def test_evicted_session_shares_no_stores():
+    registry = SessionRegistry(max_sessions=1, idle_timeout=0.0)
+    evicted = registry.create("a")
+    old_engine, old_ui = evicted.engine, evicted.ui
+    pooled = {id(old_engine.obstacles), id(old_engine.coins)}
+    evicted.last_active -= 1
+    fresh = registry.create("b")  # Full, so "a" is evicted and its stores go back to the pool
+    assert registry.get("a") is None
+    assert {id(fresh.engine.obstacles), id(fresh.engine.coins)} == pooled
+    fresh.engine.start_game(seed=2)
+    for _ in range(300):
+        fresh.engine.step(1 / 60)
+    entities = (list(fresh.engine.obstacles.ids), list(fresh.engine.coins.ids))
+    assert entities[0]
+    # The evicted page's buttons no longer reach an engine, and anything
+    # else still holding the old engine only touches its own stores
+    assert old_ui.engine is None
+    old_ui.restart_game()
+    old_engine.start_game(seed=3)
+    for _ in range(300):
+        old_engine.step(1 / 60)
+    assert (list(fresh.engine.obstacles.ids), list(fresh.engine.coins.ids)) == entities
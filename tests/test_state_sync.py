@@ -0,0 +1,67 @@
+"""Delta frames, applied the way game.js applies them, must reproduce the engine state"""
+import json
+from app.components.game_engine import GameEngine
+from app.config import settings
+from app.services.state_sync import StateEncoder
+from benchmarks.bot import bot_inputs
+
+DT = 1 / settings.tick_rate
+
+class ClientState:
+    """What a client holds after applying frames"""
+
+    def __init__(self):
+        self.seq = 0
+        self.hud = {}
+        self.obstacles = {}
+        self.coins = {}
+
+    def apply(self, frame: dict):
+        assert frame.get("kf") or frame["seq"] == self.seq + 1, "frame out of sequence"
+        self.seq = frame["seq"]
+        if frame.get("kf"):
+            self.hud, self.obstacles, self.coins = {}, {}, {}
+        self.hud.update(frame.get("hud", {}))
+        obstacles = frame.get("obs", {})
+        for row in obstacles.get("add", ()):
+            self.obstacles[row[0]] = list(row)
+        for entity_id in obstacles.get("rm", ()):
+            del self.obstacles[entity_id]
+        for entity_id, x in obstacles.get("mv", ()):
+            self.obstacles[entity_id][1] = x
+        coins = frame.get("coin", {})
+        for row in coins.get("add", ()):
+            self.coins[row[0]] = list(row)
+        for entity_id in coins.get("rm", ()):
+            del self.coins[entity_id]
+        for entity_id, x, spin, collected in coins.get("mv", ()):
+            self.coins[entity_id][1:] = [x, self.coins[entity_id][2], spin, collected]
+
+def expected(engine: GameEngine) -> tuple:
+    obstacles = (list(engine.obstacle_row(i)) for i in range(len(engine.obstacles)))
+    coins = (list(engine.coin_row(i)) for i in range(len(engine.coins)))
+    return engine.get_hud(), {row[0]: row for row in obstacles}, {row[0]: row for row in coins}
+
+def test_patches_reproduce_engine_state():
+    engine = GameEngine(3)
+    engine.start_game()
+    encoder = StateEncoder(keyframe_interval=100)
+    client = ClientState()
+    most = 0
+    for tick in range(settings.tick_rate * 60):
+        bot_inputs(engine)
+        engine.step(DT)
+        if tick == 1000:
+            encoder.reset()  # A reconnect starts over from a keyframe
+        text = encoder.encode(engine)
+        if text is not None:
+            client.apply(json.loads(text))
+        assert (client.hud, client.obstacles, client.coins) == expected(engine)
+        most = max(most, len(client.obstacles) + len(client.coins))
+    assert most > 0
+
+def test_unchanged_state_sends_nothing():
+    engine = GameEngine(1)
+    encoder = StateEncoder()
+    assert encoder.encode(engine) is not None  # Keyframe
+    assert encoder.encode(engine) is None